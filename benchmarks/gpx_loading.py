@@ -0,0 +1,68 @@
+"""
+Benchmark the streaming GPX loader against the gpxpy loader on the files in Data/,
+plus the KML loader on tracks that have a .kml twin
+Run from the project root: python -m benchmarks.gpx_loading [repeats]
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from modules.data_processing import load_gpx_data_gpxpy, load_gpx_data_streaming, load_kml_data, find_kml_twin
+
+def time_loader(loader, filename, repeats):
+    # best wall time over several runs plus peak traced memory of a single run
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        loader(filename)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = loader(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+def main(repeats=5):
+    gpx_files = sorted(glob.glob(os.path.join('Data', '*.gpx')))
+    if not gpx_files:
+        print("No GPX files found in Data folder!")
+        return
+
+    print(f"{'File':<45} {'Points':>7} {'gpxpy ms':>9} {'stream ms':>9} {'Speedup':>8} {'gpxpy MB':>9} {'stream MB':>9}")
+    print("-" * 101)
+    total_gpxpy = total_stream = 0.0
+    for filename in gpx_files:
+        gpxpy_time, gpxpy_peak, reference = time_loader(load_gpx_data_gpxpy, filename, repeats)
+        stream_time, stream_peak, streamed = time_loader(load_gpx_data_streaming, filename, repeats)
+        total_gpxpy += gpxpy_time
+        total_stream += stream_time
+
+        # both loaders must agree point for point
+        match = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(reference, streamed))
+        name = os.path.basename(filename)
+        print(f"{name[:45]:<45} {len(reference[0]):>7} {gpxpy_time * 1e3:>9.2f} {stream_time * 1e3:>9.2f} "
+              f"{gpxpy_time / stream_time:>7.1f}x {gpxpy_peak / 1e6:>9.2f} {stream_peak / 1e6:>9.2f}"
+              f"{'' if match else '  MISMATCH'}")
+
+    print("-" * 101)
+    print(f"Total: gpxpy {total_gpxpy * 1e3:.2f} ms, stream {total_stream * 1e3:.2f} ms "
+          f"({total_gpxpy / total_stream:.1f}x)")
+
+    print(f"\n{'KML twin':<45} {'Points':>7} {'stream ms':>9} {'kml ms':>9} {'Speedup':>8}")
+    print("-" * 81)
+    for filename in gpx_files:
+        twin = find_kml_twin(filename)
+        if twin is None:
+            continue
+        stream_time, _, streamed = time_loader(load_gpx_data_streaming, filename, repeats)
+        kml_time, _, from_kml = time_loader(load_kml_data, twin, repeats)
+        match = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(streamed, from_kml))
+        name = os.path.basename(twin)
+        print(f"{name[:45]:<45} {len(from_kml[0]):>7} {stream_time * 1e3:>9.2f} {kml_time * 1e3:>9.2f} "
+              f"{stream_time / kml_time:>7.1f}x{'' if match else '  MISMATCH'}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,153 @@
+"""
+End-to-end live mapping benchmark: replays a recorded track through the live ingestion service
+(simulated source, no Pixhawk needed) and times every batch through preprocess -> incremental
+triangulation -> analytics, writing a JSON report
+
+Run from the project root:
+    python -m benchmarks.replay_latency Data/7_4_Tech_Park.gpx --rate 25
+    python -m benchmarks.replay_latency Data/7_4_Tech_Park.gpx --rate 0 --loops 20   (accelerated)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+from modules.live_ingest import FileReplaySource, LiveIngestService
+from modules.mapping_pipeline import MappingPipeline
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERCENTILES = (50, 90, 99)
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def summarize(values_ms):
+    values = np.asarray(values_ms, dtype=np.float64)
+    if len(values) == 0:
+        return {}
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary.update(mean=float(values.mean()), max=float(values.max()))
+    return summary
+
+class ReplayLoopSource(FileReplaySource):
+    # replays the track several times, shifting each pass slightly so the points stay distinct
+    def __init__(self, filename, rate_hz, loops):
+        super().__init__(filename, rate_hz=rate_hz)
+        self.loops = loops
+
+    def load(self):
+        lats, lons, alts = super().load()
+        shift = (np.max(lats) - np.min(lats)) * 1e-3
+        passes = [(lats + i * shift, lons + i * shift, alts) for i in range(self.loops)]
+        return tuple(np.concatenate([p[k] for p in passes]) for k in range(3))
+
+async def replay(args):
+    source = ReplayLoopSource(args.file, args.rate or None, args.loops)
+    service = LiveIngestService(source, flush_interval=args.flush_interval, flush_size=args.batch_size,
+                                buffer_capacity=max(4096, 4 * args.batch_size))
+    queue = service.subscribe()
+    pipeline = MappingPipeline(use_cache=False)
+    records = []
+
+    async def consume():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            start = time.perf_counter()
+            x, y, z = pipeline.project_batch(batch['latitude'], batch['longitude'], batch['altitude'])
+            projected = time.perf_counter()
+            if pipeline.incremental_mesh is None:
+                pipeline.x, pipeline.y, pipeline.z = x, y, z
+                pipeline.create_incremental_triangulation()
+                triangulated = analyzed = time.perf_counter()
+            else:
+                update = pipeline.incremental_mesh.add_points(x, y, z)
+                triangulated = time.perf_counter()
+                pipeline.update_mesh_quality(update.changed_triangles, update.removed_triangles,
+                                             update.affected_vertices)
+                analyzed = time.perf_counter()
+            # latency counts from the acquisition of the oldest sample in the batch
+            records.append({
+                'samples': len(batch),
+                'latency_ms': (time.time() - float(batch['timestamp'][0])) * 1e3,
+                'processing_ms': (analyzed - start) * 1e3,
+                'preprocess_ms': (projected - start) * 1e3,
+                'triangulation_ms': (triangulated - projected) * 1e3,
+                'analytics_ms': (analyzed - triangulated) * 1e3,
+            })
+
+    consumer = asyncio.create_task(consume())
+    wall_start = time.perf_counter()
+    await service.run()
+    await consumer
+    wall_time = time.perf_counter() - wall_start
+    return service, pipeline, records, wall_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay latency benchmark for live mapping")
+    parser.add_argument('file', nargs='?', default=os.path.join('Data', '7_4_Tech_Park.gpx'))
+    parser.add_argument('--rate', type=float, default=25.0, help="replay rate in Hz, 0 = accelerated (flat out)")
+    parser.add_argument('--loops', type=int, default=1, help="replay the track this many times")
+    parser.add_argument('--batch-size', type=int, default=25, help="samples per flush")
+    parser.add_argument('--flush-interval', type=float, default=0.5, help="seconds between flushes")
+    parser.add_argument('--report', default='replay_latency_report.json')
+    args = parser.parse_args()
+
+    service, pipeline, records, wall_time = asyncio.run(replay(args))
+    samples = sum(r['samples'] for r in records)
+    processing_time = sum(r['processing_ms'] for r in records) / 1e3
+    mesh = pipeline.incremental_mesh
+
+    report = {
+        'file': args.file,
+        'rate_hz': args.rate or 'accelerated',
+        'loops': args.loops,
+        'flush_size': args.batch_size,
+        'flush_interval_s': args.flush_interval,
+        'batches': len(records),
+        # samples per delivered batch, the flush_interval can cut batches short of flush_size
+        'batch_samples': summarize([r['samples'] for r in records]),
+        'samples': samples,
+        'dropped_samples': service.buffer.dropped,
+        'dropped_batches': service.dropped_batches,
+        'final_triangles': int(len(mesh.triangle_ids)) if mesh is not None else 0,
+        'wall_time_s': wall_time,
+        'throughput_samples_per_s': samples / wall_time if wall_time > 0 else None,
+        'processing_throughput_samples_per_s': samples / processing_time if processing_time > 0 else None,
+        'latency_ms': summarize([r['latency_ms'] for r in records]),
+        'processing_ms': summarize([r['processing_ms'] for r in records]),
+        'stage_ms': {stage: summarize([r[f'{stage}_ms'] for r in records])
+                     for stage in ('preprocess', 'triangulation', 'analytics')},
+        'peak_rss_bytes': peak_rss_bytes(),
+        'batches_detail': records,
+    }
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Replayed {samples} samples in {len(records)} batches over {wall_time:.2f}s "
+          f"({report['throughput_samples_per_s']:.0f} samples/s)")
+    if records:
+        print(f"  batches     {report['batch_samples']['mean']:.1f} samples on average, "
+              f"max {report['batch_samples']['max']:.0f} (flush size {args.batch_size})")
+    for name in ('latency_ms', 'processing_ms'):
+        stats = report[name]
+        if stats:
+            print(f"  {name[:-3]:<11} p50 {stats['p50']:8.2f} ms  p90 {stats['p90']:8.2f} ms  "
+                  f"p99 {stats['p99']:8.2f} ms  max {stats['max']:8.2f} ms")
+    if report['peak_rss_bytes'] is not None:
+        print(f"  peak RSS    {report['peak_rss_bytes'] / 1e6:.1f} MB")
+    print(f"Report written to: {os.path.abspath(args.report)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Space-filling-curve reordering benchmark: times the mesh-analysis stages on the same survey in track
+order and after Hilbert / Morton reordering (points and triangles), writing a JSON report
+
+Run from the project root:
+    python -m benchmarks.spatial_order Data/7_4_Tech_Park.gpx Data/Track1_24_4_2025.gpx --copies 200
+    python -m benchmarks.spatial_order --synthetic 500000        (random-walk tracks, merged order)
+"""
+import argparse
+import json
+import time
+import numpy as np
+from scipy.spatial import Delaunay
+from scipy.interpolate import LinearNDInterpolator
+from modules.mapping_pipeline import MappingPipeline
+from modules.mesh_topology import MeshTopology
+from modules.curvature import corner_angles
+from modules.analytics import calculate_triangle_fatness
+from modules.spatial_order import spatial_order, sort_simplices, SPACE_FILLING_CURVES
+
+def load_points(files, copies):
+    # survey points, copies > 1 repeats the survey shifted by its own extent (a merged multi-day set)
+    pipeline = MappingPipeline(use_cache=False)
+    pipeline.load_data(files if len(files) > 1 else files[0], is_multiple=len(files) > 1)
+    pipeline.preprocess_data()
+    x, y, z = np.asarray(pipeline.x), np.asarray(pipeline.y), np.asarray(pipeline.z)
+    width = np.ptp(x) + 1.0
+    side = int(np.ceil(np.sqrt(copies)))
+    tiles = [(x + (i % side) * width, y + (i // side) * width, z) for i in range(copies)]
+    return tuple(np.concatenate([tile[k] for tile in tiles]) for k in range(3))
+
+def synthetic_points(n, days=8, seed=0):
+    # noisy random-walk tracks, one per day, concatenated day after day
+    rng = np.random.default_rng(seed)
+    parts = []
+    for day in range(days):
+        steps = rng.normal(scale=1.5, size=(n // days, 2))
+        track = np.cumsum(steps, axis=0) + rng.uniform(-200, 200, size=2)
+        parts.append(track)
+    xy = np.concatenate(parts)
+    z = np.sin(xy[:, 0] / 50) * 5 + np.cos(xy[:, 1] / 70) * 3
+    return xy[:, 0], xy[:, 1], z
+
+def time_stage(function, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def run_order(name, x, y, z, repeat, with_fatness):
+    points = np.column_stack((x, y))
+    start = time.perf_counter()
+    triangles = Delaunay(points).simplices
+    if name != 'track':
+        triangles = sort_simplices(triangles)
+    stages = {'triangulation': (time.perf_counter() - start) * 1000}
+
+    points_3d = np.column_stack((x, y, z))
+    stages['gather'] = time_stage(lambda: points_3d[triangles].sum(), repeat)
+    stages['topology'] = time_stage(lambda: MeshTopology(triangles, len(x)), repeat)
+    stages['curvature'] = time_stage(
+        lambda: np.bincount(triangles.ravel(), weights=corner_angles(points_3d, triangles).ravel(),
+                            minlength=len(x)), repeat)
+    if with_fatness:
+        stages['fatness'] = time_stage(lambda: calculate_triangle_fatness(points, triangles), 1)
+    interpolator = LinearNDInterpolator(points, z)
+    query = points[::7] + 0.1
+    stages['interpolation'] = time_stage(lambda: interpolator(query), repeat)
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesh analysis timings before/after space-filling-curve reordering")
+    parser.add_argument('files', nargs='*', help=".gpx/.kml survey files (merged)")
+    parser.add_argument('--copies', type=int, default=1, help="repeat the survey side by side this many times")
+    parser.add_argument('--synthetic', type=int, help="use this many random-walk points instead of files")
+    parser.add_argument('--shuffle', action='store_true', help="start from a random order instead of track order")
+    parser.add_argument('--repeat', type=int, default=3, help="best of this many runs per stage")
+    parser.add_argument('--fatness', action='store_true', help="also time calculate_triangle_fatness (slow)")
+    parser.add_argument('--report', default='spatial_order_report.json')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        x, y, z = synthetic_points(args.synthetic)
+    elif args.files:
+        x, y, z = load_points(args.files, args.copies)
+    else:
+        parser.error("give survey files or --synthetic N")
+    if args.shuffle:
+        order = np.random.default_rng(0).permutation(len(x))
+        x, y, z = x[order], y[order], z[order]
+    print(f"\n{len(x)} points")
+
+    results = {'points': len(x), 'orders': {}}
+    for name in ('track',) + SPACE_FILLING_CURVES:
+        if name == 'track':
+            ox, oy, oz = x, y, z
+        else:
+            start = time.perf_counter()
+            order = spatial_order(x, y, name)
+            ox, oy, oz = x[order], y[order], z[order]
+            reorder_ms = (time.perf_counter() - start) * 1000
+        stages = run_order(name, ox, oy, oz, args.repeat, args.fatness)
+        if name != 'track':
+            stages['reorder'] = reorder_ms
+        results['orders'][name] = stages
+
+    baseline = results['orders']['track']
+    print(f"\n{'stage':<15}" + ''.join(f"{name:>22}" for name in results['orders']))
+    for stage in baseline:
+        row = f"{stage:<15}"
+        for name, stages in results['orders'].items():
+            speedup = baseline[stage] / stages[stage] if stages[stage] > 0 else float('nan')
+            row += f"{stages[stage]:>12.1f} ms ({speedup:4.2f}x)"
+        print(row)
+    print(f"{'reorder':<15}" + ''.join(f"{stages.get('reorder', 0.0):>12.1f} ms        "
+                                       for stages in results['orders'].values()))
+
+    with open(args.report, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nReport written to: {args.report}")
+
+if __name__ == "__main__":
+    main()
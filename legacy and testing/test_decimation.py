@@ -0,0 +1,53 @@
+"""
+Check that terrain mesh decimation keeps every dropped vertex within the vertical tolerance
+"""
+import glob
+import numpy as np
+import matplotlib.tri as mtri
+from scipy.spatial import Delaunay
+from modules.data_processing import load_gpx_data, coord_transform
+from modules.mesh_decimation import decimate_terrain_mesh
+
+def decimated_error(x, y, z, max_error):
+    triangles = Delaunay(np.column_stack((x, y))).simplices
+    mesh, kept, stats = decimate_terrain_mesh(x, y, z, triangles, max_error=max_error)
+
+    # measure the error independently: the decimated surface at every dropped vertex
+    surface = mtri.LinearTriInterpolator(mtri.Triangulation(mesh.x, mesh.y, mesh.simplices), mesh.z)
+    dropped = np.setdiff1d(np.arange(len(x)), kept)
+    error = np.abs(z[dropped] - surface(x[dropped], y[dropped]))
+    assert not np.ma.is_masked(error), "a dropped vertex lies outside the decimated mesh"
+    print(f"  tolerance {max_error} m: {stats['input_triangles']} -> {stats['output_triangles']} triangles, "
+          f"max error {np.max(error):.4f} m (reported {stats['max_error']:.4f} m)")
+    return error, stats
+
+def test_error_bound_on_track():
+    """A recorded track, decimated at a few tolerances"""
+    print("Decimating a recorded track...")
+    gpx_file = 'Data/3_28_Home_street_layout_28_3.gpx'
+    lats, lons, alts = load_gpx_data(gpx_file)
+    x, y = coord_transform(lats, lons)
+    # a vertex at the same x/y as a kept one can't be represented, keep one fix per position
+    _, first = np.unique(np.column_stack((x, y)), axis=0, return_index=True)
+    keep = np.sort(first)
+    x, y, z = x[keep], y[keep], alts[keep]
+
+    for max_error in (0.05, 0.5, 2.0):
+        error, stats = decimated_error(x, y, z, max_error)
+        assert np.max(error) <= max_error + 1e-9
+        assert np.isclose(np.max(error), stats['max_error'])
+
+def test_planar_surface():
+    """A tilted plane needs only its boundary vertices"""
+    rng = np.random.default_rng(0)
+    x, y = rng.random((2, 2000)) * 100
+    z = 0.3 * x - 0.1 * y + 5
+    error, stats = decimated_error(x, y, z, 1e-6)
+    assert np.max(error) <= 1e-6
+    hull = len(Delaunay(np.column_stack((x, y))).convex_hull)
+    assert stats['output_vertices'] == hull
+
+if __name__ == "__main__":
+    test_error_bound_on_track()
+    test_planar_surface()
+    print("\nSUCCESS: decimation stays within the vertical tolerance")
@@ -0,0 +1,66 @@
+"""
+Check the DEM pyramid levels and resampled grids against direct interpolation
+"""
+import numpy as np
+from modules.interpolation import InterpolatorCache, create_grid
+from modules.dem_pyramid import build_dem_pyramid, pyramid_size
+
+def sample_surface(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    x, y = rng.random((2, n)) * 500
+    z = 100 + 0.05 * x - 0.02 * y + 3 * np.sin(x / 40) * np.cos(y / 60)
+    interpolators = InterpolatorCache(x, y)
+    interpolators.add_field('elevation', z)
+    return x, y, z, interpolators
+
+def test_levels_match_direct_interpolation():
+    """Every 2^k + 1 level is the grid interpolating the points directly would give"""
+    print("Comparing pyramid levels with direct interpolation...")
+    x, y, _, interpolators = sample_surface()
+    pyramid = build_dem_pyramid(interpolators, 'elevation', 129, parallel=False)
+    assert pyramid.finest_size == pyramid_size(129) == 129
+
+    for xs, _, _ in pyramid.levels:
+        size = len(xs)
+        xi, yi, zi = pyramid.grid(size)
+        direct_xi, direct_yi = create_grid(x, y, size)
+        direct = interpolators.interpolate('elevation', direct_xi, direct_yi)
+        print(f"  {size}x{size}: max difference {np.nanmax(np.abs(zi - direct)):.2e}")
+        assert np.allclose(xi, direct_xi) and np.allclose(yi, direct_yi)
+        assert np.array_equal(np.isnan(zi), np.isnan(direct))
+        assert np.allclose(zi, direct, equal_nan=True)
+
+def test_resampled_grids():
+    """Other sizes are resampled from the nearest finer level, close to direct interpolation"""
+    print("Comparing resampled grids with direct interpolation...")
+    x, y, z, interpolators = sample_surface()
+    pyramid = build_dem_pyramid(interpolators, 'elevation', 257, parallel=False)
+    relief = np.ptp(z)
+
+    for size in (20, 50, 100, 200):
+        xi, yi, zi = pyramid.grid(size)
+        direct = interpolators.interpolate('elevation', *create_grid(x, y, size))
+        both = np.isfinite(zi) & np.isfinite(direct)
+        error = np.max(np.abs(zi[both] - direct[both]))
+        print(f"  {size}x{size}: max difference {error:.3f} m, "
+              f"{np.count_nonzero(np.isnan(zi))} vs {np.count_nonzero(np.isnan(direct))} NaN cells")
+        assert zi.shape == (size, size)
+        # bilinear on the level vs linear on the points, within 1% of the relief
+        assert error < 0.01 * relief
+        # only cells at the hull edge may differ in coverage
+        assert np.count_nonzero(np.isnan(zi) != np.isnan(direct)) <= 4 * size
+
+def test_mask():
+    """Cells outside the mask are NaN"""
+    _, _, _, interpolators = sample_surface()
+    pyramid = build_dem_pyramid(interpolators, 'elevation', 65, parallel=False)
+    mask = np.zeros((40, 40), dtype=bool)
+    mask[10:30, 10:30] = True
+    _, _, zi = pyramid.grid(40, mask=mask)
+    assert np.all(np.isnan(zi[~mask])) and np.all(np.isfinite(zi[mask]))
+
+if __name__ == "__main__":
+    test_levels_match_direct_interpolation()
+    test_resampled_grids()
+    test_mask()
+    print("\nSUCCESS: DEM pyramid matches direct interpolation")
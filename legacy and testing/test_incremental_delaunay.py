@@ -0,0 +1,48 @@
+"""
+Check that batch-by-batch incremental Delaunay insertion ends with scipy's triangulation
+"""
+import glob
+import numpy as np
+from scipy.spatial import Delaunay
+from modules.data_processing import load_gpx_data, coord_transform
+from modules.incremental_delaunay import IncrementalTriangulation
+
+def triangle_set(simplices):
+    return {tuple(t) for t in np.sort(simplices, axis=1).tolist()}
+
+def check_batches(x, y, batch_size, label):
+    mesh = IncrementalTriangulation(x[:batch_size], y[:batch_size], np.zeros(batch_size))
+    for start in range(batch_size, len(x), batch_size):
+        stop = start + batch_size
+        mesh.add_points(x[start:stop], y[start:stop], np.zeros(len(x[start:stop])))
+
+    expected = triangle_set(Delaunay(np.column_stack((x, y))).simplices)
+    incremental = triangle_set(mesh.simplices)
+    print(f"  {label}: {len(incremental)} incremental vs {len(expected)} scipy triangles, "
+          f"{len(incremental ^ expected)} different")
+    assert incremental == expected, f"{label}: incremental triangles differ from scipy"
+
+def test_random_points():
+    """Random points, including batches that land outside the current hull"""
+    print("Comparing incremental Delaunay with scipy...")
+    rng = np.random.default_rng(0)
+    x, y = rng.random((2, 5000))
+    # sorted by x the later batches all lie outside the hull built so far
+    check_batches(x, y, 250, "random points")
+    order = np.argsort(x)
+    check_batches(x[order], y[order], 250, "random points, left to right")
+
+def test_gps_track():
+    """A recorded track, points arriving in recording order like a live feed"""
+    gpx_file = sorted(glob.glob('Data/*.gpx'))[0]
+    lats, lons, _ = load_gpx_data(gpx_file)
+    x, y = coord_transform(lats, lons)
+    # repeated fixes are skipped by the incremental mesh and dropped by scipy, compare the distinct ones
+    _, first = np.unique(np.column_stack((x, y)), axis=0, return_index=True)
+    keep = np.sort(first)
+    check_batches(x[keep], y[keep], 20, gpx_file)
+
+if __name__ == "__main__":
+    test_random_points()
+    test_gps_track()
+    print("\nSUCCESS: incremental Delaunay matches scipy")
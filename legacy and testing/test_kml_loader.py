@@ -0,0 +1,31 @@
+"""
+Check the vectorised KML loader against the GPX tracks the .kml files were exported from
+"""
+import glob
+import numpy as np
+from modules.data_processing import load_gpx_data, load_kml_data, find_kml_twin, resolve_track_file
+
+def test_kml_twins_match_gpx():
+    """Each .kml twin holds the same points as its .gpx track"""
+    print("Comparing .kml twins with their .gpx tracks...")
+    pairs = [(gpx_file, find_kml_twin(gpx_file)) for gpx_file in sorted(glob.glob('Data/*.gpx'))]
+    pairs = [(gpx_file, kml_file) for gpx_file, kml_file in pairs if kml_file is not None]
+    assert pairs, "no .gpx/.kml pairs found, run from the repository root"
+
+    for gpx_file, kml_file in pairs:
+        expected = load_gpx_data(gpx_file)
+        loaded = load_kml_data(kml_file)
+        same = all(np.array_equal(a, b) for a, b in zip(expected, loaded))
+        print(f"  {kml_file}: {len(loaded[0])} points, {'same' if same else 'DIFFERENT'}")
+        assert same, f"{kml_file} differs from {gpx_file}"
+
+def test_twin_only_when_asked():
+    """The requested file is read unless the .kml twin is explicitly preferred"""
+    gpx_file = next(f for f in sorted(glob.glob('Data/*.gpx')) if find_kml_twin(f) is not None)
+    assert resolve_track_file(gpx_file) == gpx_file
+    assert resolve_track_file(gpx_file, prefer_kml=True) == find_kml_twin(gpx_file)
+
+if __name__ == "__main__":
+    test_kml_twins_match_gpx()
+    test_twin_only_when_asked()
+    print("\nSUCCESS: KML loader matches the GPX tracks")
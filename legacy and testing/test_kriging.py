@@ -0,0 +1,69 @@
+"""
+Check the local kriging engine: variogram fitting, agreement with a dense global ordinary kriging
+solve, and exact reproduction of the samples
+"""
+import numpy as np
+from scipy.spatial.distance import cdist
+from modules.interpolation import InterpolatorCache, Variogram, fit_variogram, interpolate_kriging
+
+def test_variogram_fit():
+    """The fit recovers the model a random field was simulated from"""
+    print("Fitting a variogram to a simulated field...")
+    rng = np.random.default_rng(0)
+    points = rng.random((1500, 2)) * 100
+    model = Variogram('exponential', nugget=0.0, sill=4.0, range_=30.0)
+    covariance = model.sill - model(cdist(points, points))
+    z = np.linalg.cholesky(covariance + 1e-9 * np.eye(len(points))) @ rng.standard_normal(len(points))
+
+    fitted = fit_variogram(points[:, 0], points[:, 1], z, model='exponential')
+    print(f"  simulated {model}")
+    print(f"  fitted    {fitted}")
+    # one realization only, so the bounds are loose
+    assert abs(fitted.nugget + fitted.sill - 4.0) < 1.0
+    assert 15.0 < fitted.range < 60.0
+
+def test_matches_global_kriging():
+    """With every sample in the neighbourhood local kriging is ordinary kriging"""
+    print("Comparing local kriging with a dense ordinary kriging solve...")
+    rng = np.random.default_rng(1)
+    x, y = rng.random((2, 40)) * 50
+    z = np.sin(x / 10) + np.cos(y / 7)
+    xi, yi = np.meshgrid(np.linspace(0, 50, 15), np.linspace(0, 50, 15))
+
+    interpolators = InterpolatorCache(x, y)
+    interpolators.add_field('elevation', z)
+    estimate, variance = interpolate_kriging(interpolators, 'elevation', xi, yi, parallel=False, k=len(x))
+
+    variogram = interpolators.variogram('elevation')
+    samples = np.column_stack((x, y))
+    query = np.column_stack((xi.ravel(), yi.ravel()))
+    system = np.ones((len(x) + 1, len(x) + 1))
+    system[:-1, :-1] = variogram(cdist(samples, samples))
+    system[-1, -1] = 0.0
+    rhs = np.ones((len(x) + 1, len(query)))
+    rhs[:-1] = variogram(cdist(samples, query))
+    solution = np.linalg.solve(system, rhs)
+    expected = (z @ solution[:-1]).reshape(xi.shape)
+    expected_variance = np.sum(solution * rhs, axis=0).reshape(xi.shape)
+
+    print(f"  {variogram}, max estimate difference {np.max(np.abs(estimate - expected)):.2e}")
+    assert np.allclose(estimate, expected, atol=1e-8)
+    assert np.allclose(variance, np.maximum(expected_variance, 0.0), atol=1e-8)
+
+def test_exact_at_samples():
+    """Kriging reproduces the samples with zero variance"""
+    rng = np.random.default_rng(2)
+    x, y = rng.random((2, 500)) * 200
+    z = 0.05 * x + np.sin(y / 20)
+    interpolators = InterpolatorCache(x, y)
+    interpolators.add_field('elevation', z)
+    estimate, variance = interpolators.interpolator('elevation', 'kriging').predict(np.column_stack((x, y)))
+    print(f"  at the samples: max error {np.max(np.abs(estimate - z)):.2e}, max variance {np.max(variance):.2e}")
+    assert np.allclose(estimate, z, atol=1e-6)
+    assert np.max(variance) < 1e-6 * np.var(z)
+
+if __name__ == "__main__":
+    test_variogram_fit()
+    test_matches_global_kriging()
+    test_exact_at_samples()
+    print("\nSUCCESS: kriging checks passed")
@@ -0,0 +1,46 @@
+"""
+Check that a pipeline backed by the memory-mapped point store sees the same points as an in-memory one
+"""
+import glob
+import tempfile
+import numpy as np
+from modules.mapping_pipeline import MappingPipeline
+from modules.point_store import PointStore
+
+def test_column_appender():
+    """Chunks appended to a column read back as one memory-mapped array"""
+    rng = np.random.default_rng(0)
+    chunks = [rng.random(n) for n in (0, 5, 1000, 1, 70_000)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = PointStore(directory)
+        appender = store.appender('values')
+        for chunk in chunks:
+            appender.append(chunk)
+        column = store.close_appender('values', appender)
+        assert isinstance(column, np.memmap)
+        assert np.array_equal(column, np.concatenate(chunks))
+        assert np.array_equal(PointStore(directory)['values'], np.concatenate(chunks))
+
+def test_store_matches_memory():
+    """Streamed into the store, the track preprocesses to the same x/y/z as in memory"""
+    print("Loading tracks into the point store and into memory...")
+    gpx_files = sorted(glob.glob('Data/*.gpx'))[:3]
+    with tempfile.TemporaryDirectory() as directory:
+        in_memory = MappingPipeline(use_cache=False)
+        in_memory.load_data(gpx_files, is_multiple=True)
+        in_memory.preprocess_data()
+
+        stored = MappingPipeline(use_cache=False, point_store_dir=directory)
+        stored.load_data(gpx_files, is_multiple=True)
+        stored.preprocess_data()
+
+        for name in ('lats', 'lons', 'alts', 'x', 'y', 'z'):
+            expected, column = getattr(in_memory, name), getattr(stored, name)
+            assert isinstance(column, np.memmap), f"{name} is not a view into the store"
+            assert np.array_equal(column, expected), f"{name} differs between the store and memory"
+        print(f"  {len(stored.x)} points from {len(gpx_files)} files, {stored.point_store.nbytes()} bytes on disk")
+
+if __name__ == "__main__":
+    test_column_appender()
+    test_store_matches_memory()
+    print("\nSUCCESS: point store matches the in-memory pipeline")
@@ -0,0 +1,58 @@
+"""
+Check the space-filling-curve keys and the point/triangle reordering built on them
+"""
+import numpy as np
+from scipy.spatial import Delaunay
+from modules.spatial_order import (hilbert_keys, morton_keys, spatial_order, inverse_permutation,
+                                   sort_simplices)
+
+def test_hilbert_curve():
+    """On a full lattice the Hilbert keys visit every cell once, each step to a neighbouring cell"""
+    print("Walking the Hilbert curve over a 64x64 lattice...")
+    bits = 6
+    ix, iy = (a.ravel() for a in np.meshgrid(np.arange(1 << bits), np.arange(1 << bits)))
+    keys = hilbert_keys(ix, iy, bits)
+    assert np.array_equal(np.sort(keys), np.arange(1 << (2 * bits)))
+
+    order = np.argsort(keys)
+    steps = np.abs(np.diff(ix[order])) + np.abs(np.diff(iy[order]))
+    print(f"  {len(keys)} cells, largest step {steps.max()} cell(s)")
+    assert np.all(steps == 1)
+
+def test_morton_keys():
+    """Morton keys are a bijection too, with the x bit below the y bit"""
+    bits = 6
+    ix, iy = (a.ravel() for a in np.meshgrid(np.arange(1 << bits), np.arange(1 << bits)))
+    keys = morton_keys(ix, iy, bits)
+    assert np.array_equal(np.sort(keys), np.arange(1 << (2 * bits)))
+    assert morton_keys(np.array([1]), np.array([0]), bits)[0] == 1
+    assert morton_keys(np.array([0]), np.array([1]), bits)[0] == 2
+
+def test_reordering_keeps_the_mesh():
+    """Reordering points and triangles relabels the same triangulation"""
+    rng = np.random.default_rng(0)
+    x, y = rng.random((2, 3000))
+    simplices = Delaunay(np.column_stack((x, y))).simplices
+
+    for curve in ('hilbert', 'morton'):
+        order = spatial_order(x, y, curve)
+        inverse = inverse_permutation(order)
+        assert np.array_equal(np.sort(order), np.arange(len(x)))
+        assert np.array_equal(order[inverse], np.arange(len(x)))
+
+        renumbered = sort_simplices(inverse[simplices])
+        relabelled = {tuple(t) for t in np.sort(order[renumbered], axis=1).tolist()}
+        assert relabelled == {tuple(t) for t in np.sort(simplices, axis=1).tolist()}
+        assert np.all(np.diff(np.min(renumbered, axis=1)) >= 0)
+
+        # consecutive points along the curve are much closer than in the input order
+        ordered = np.hypot(np.diff(x[order]), np.diff(y[order])).mean()
+        unordered = np.hypot(np.diff(x), np.diff(y)).mean()
+        print(f"  {curve}: mean step {ordered:.4f} along the curve vs {unordered:.4f} in input order")
+        assert ordered < 0.2 * unordered
+
+if __name__ == "__main__":
+    test_hilbert_curve()
+    test_morton_keys()
+    test_reordering_keeps_the_mesh()
+    print("\nSUCCESS: space-filling-curve ordering checks passed")
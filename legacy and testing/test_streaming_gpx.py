@@ -0,0 +1,34 @@
+"""
+Check that the streaming GPX parser reads the same points as gpxpy
+"""
+import glob
+import numpy as np
+from modules.data_processing import load_gpx_data_gpxpy, load_gpx_data_streaming, iter_gpx_chunks
+
+def test_streaming_matches_gpxpy():
+    """Every track in Data/ parses to the same lat/lon/ele arrays with both parsers"""
+    print("Comparing the streaming GPX parser with gpxpy...")
+    gpx_files = sorted(glob.glob('Data/*.gpx'))
+    assert gpx_files, "no .gpx tracks found, run from the repository root"
+
+    for gpx_file in gpx_files:
+        expected = load_gpx_data_gpxpy(gpx_file)
+        streamed = load_gpx_data_streaming(gpx_file)
+        same = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(expected, streamed))
+        print(f"  {gpx_file}: {len(expected[0])} points, {'same' if same else 'DIFFERENT'}")
+        assert same, f"{gpx_file}: streaming parser differs from gpxpy"
+
+def test_chunks_cover_the_track():
+    """Small chunks concatenate back to the full track"""
+    gpx_file = sorted(glob.glob('Data/*.gpx'))[0]
+    expected = load_gpx_data_streaming(gpx_file)
+    chunks = list(iter_gpx_chunks(gpx_file, chunk_size=100))
+    joined = [np.concatenate([chunk[i] for chunk in chunks]) for i in range(3)]
+    print(f"  {gpx_file}: {len(chunks)} chunks of at most 100 points")
+    assert all(len(chunk[0]) <= 100 for chunk in chunks)
+    assert all(np.array_equal(a, b, equal_nan=True) for a, b in zip(expected, joined))
+
+if __name__ == "__main__":
+    test_streaming_matches_gpxpy()
+    test_chunks_cover_the_track()
+    print("\nSUCCESS: streaming GPX parser matches gpxpy")
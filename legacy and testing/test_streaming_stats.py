@@ -0,0 +1,57 @@
+"""
+Check the constant-memory streaming statistics against numpy on the full arrays
+"""
+import numpy as np
+from scipy.spatial import Delaunay
+from modules.streaming_stats import StreamingStats
+from modules.analytics import calculate_triangle_fatness, stream_triangle_fatness
+
+def test_moments_and_quantiles():
+    """Chunked updates give numpy's mean/std/min/max, quantiles within one bin width"""
+    print("Streaming 1M values in uneven chunks...")
+    rng = np.random.default_rng(0)
+    values = np.concatenate((rng.beta(2, 5, 700_000), rng.beta(8, 2, 300_000)))
+    rng.shuffle(values)
+    stats = StreamingStats(value_range=(0.0, 1.0))
+    bounds = np.sort(rng.choice(len(values), 50, replace=False))
+    for chunk in np.split(values, bounds):
+        stats.update(chunk)
+
+    assert stats.count == len(values)
+    assert np.isclose(stats.mean, np.mean(values), rtol=1e-12)
+    assert np.isclose(stats.std, np.std(values), rtol=1e-12)
+    assert stats.min == np.min(values) and stats.max == np.max(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        approx, exact = stats.quantile(q), np.percentile(values, 100 * q)
+        print(f"  q={q:<4}: streamed {approx:.5f}, numpy {exact:.5f}, bin width {stats.bin_width:.5f}")
+        assert abs(approx - exact) <= stats.bin_width
+
+def test_out_of_range_values():
+    """Values outside the histogram range keep exact extremes and are counted in the end bins"""
+    values = np.array([-3.0, 0.2, 0.4, 0.6, 5.0])
+    stats = StreamingStats(value_range=(0.0, 1.0), bins=10)
+    stats.update(values)
+    assert stats.min == -3.0 and stats.max == 5.0
+    assert stats.histogram.sum() == len(values)
+    assert abs(stats.median - 0.4) <= stats.bin_width
+
+def test_streamed_fatness_report():
+    """The streamed fatness report matches the in-memory one, the median within a bin"""
+    rng = np.random.default_rng(1)
+    points = rng.random((20_000, 2))
+    triangles = Delaunay(points).simplices
+    _, exact = calculate_triangle_fatness(points, triangles)
+    streamed = stream_triangle_fatness(points, triangles, chunk_size=4096)
+    for key in exact:
+        if key == 'median_fatness':
+            assert abs(streamed[key] - exact[key]) <= streamed['fatness_stats'].bin_width
+        else:
+            assert np.isclose(streamed[key], exact[key], rtol=1e-9), key
+    print(f"  {len(triangles)} triangles: median {streamed['median_fatness']:.4f} streamed, "
+          f"{exact['median_fatness']:.4f} exact")
+
+if __name__ == "__main__":
+    test_moments_and_quantiles()
+    test_out_of_range_values()
+    test_streamed_fatness_report()
+    print("\nSUCCESS: streaming statistics match numpy")
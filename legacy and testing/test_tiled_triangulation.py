@@ -0,0 +1,49 @@
+"""
+Check that the tiled triangulation stitches into the same mesh as a single scipy Delaunay
+"""
+import numpy as np
+from scipy.spatial import Delaunay
+from modules.tiled_triangulation import tiled_delaunay, TiledTriangulation
+
+def triangle_set(simplices):
+    return {tuple(t) for t in np.sort(simplices, axis=1).tolist()}
+
+def check_tiled(points, label, **options):
+    tiled = tiled_delaunay(points, **options)
+    # a fallback would hide a stitching bug behind scipy's answer
+    assert isinstance(tiled, TiledTriangulation), f"{label}: fell back to a single Delaunay"
+    expected = triangle_set(Delaunay(points).simplices)
+    stitched = triangle_set(tiled.simplices)
+    print(f"  {label}: {tiled.tiles} tiles, {tiled.filled} filled, {len(stitched)} vs {len(expected)} "
+          f"triangles, {len(stitched ^ expected)} different")
+    return stitched, expected
+
+def test_random_points():
+    """Uniform and clustered points, tiles run in this process and in a pool"""
+    print("Comparing tiled triangulation with scipy...")
+    rng = np.random.default_rng(0)
+    uniform = rng.random((60_000, 2))
+    stitched, expected = check_tiled(uniform, "uniform", tile_points=8000, parallel=False)
+    assert stitched == expected
+
+    # dense clusters along a path, like several passes over the same street
+    t = rng.random(60_000) * 20
+    clustered = np.column_stack((t + rng.normal(0, 0.05, len(t)), np.sin(t) + rng.normal(0, 0.05, len(t))))
+    stitched, expected = check_tiled(clustered, "clustered", tile_points=8000, parallel=True, max_workers=2)
+    assert stitched == expected
+
+def test_repeated_fixes():
+    """Exact duplicates triangulate once, with the same triangle count as scipy"""
+    rng = np.random.default_rng(1)
+    points = rng.random((40_000, 2))
+    points[::4] = points[7]
+    stitched, expected = check_tiled(points, "10k copies of one fix", tile_points=8000, parallel=False)
+    # scipy may keep another copy of the repeated fix, compare without it
+    repeated = set(np.flatnonzero(np.all(points == points[7], axis=1)).tolist())
+    assert len(stitched) == len(expected)
+    assert {t for t in stitched if not repeated & set(t)} == {t for t in expected if not repeated & set(t)}
+
+if __name__ == "__main__":
+    test_random_points()
+    test_repeated_fixes()
+    print("\nSUCCESS: tiled triangulation matches scipy")
@@ -11,7 +11,10 @@ def main():
     while True:
         clear_terminal()
         # Get user choices from UI
-        method, data_source, is_multiple, grid_size, vertical_exaggeration, interpolation_method, norm_mode, vmax = get_user_choices()
+        (method, data_source, is_multiple, grid_size, vertical_exaggeration, interpolation_method,
+         norm_mode, vmax, min_spacing, merge_policy, idw_options, support_distance,
+         adaptive_grid, refine_options, decimation_options, point_order, point_storage,
+         parallel_triangulation) = get_user_choices()
 
         if method is None:
             print("Goodbye!")
@@ -19,7 +22,9 @@ def main():
 
         # Run the selected method
         success = run_pipeline(method, data_source, is_multiple, grid_size, vertical_exaggeration,
-                             interpolation_method, norm_mode, vmax)
+                             interpolation_method, norm_mode, vmax, min_spacing, merge_policy, idw_options,
+                             support_distance, adaptive_grid, refine_options, decimation_options,
+                             point_order, point_storage, parallel_triangulation)
         if success:
             print("\nAnalysis Completed!")
         else:
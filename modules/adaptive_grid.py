@@ -0,0 +1,141 @@
+"""
+Adaptive quadtree grid - square cells refined where samples are dense or elevation varies,
+coarse elsewhere, as a drop-in for create_grid's fixed lattice
+"""
+import csv
+import numpy as np
+from scipy.spatial import Delaunay
+from .interpolation import support_mask
+
+# a cell is split while it holds more samples than this ...
+QUADTREE_MAX_POINTS = 4
+# ... or while the elevation spread (std, metres) of its samples is larger than this
+QUADTREE_MAX_STD = 0.25
+# deepest refinement below the base cells
+QUADTREE_MAX_DEPTH = 12
+
+class AdaptiveGrid:
+    '''
+    leaves of a quadtree over base cells of side finest * 2^depth, each leaf is (level, i, j) with
+    level 0 = base cell and i, j the cell index on that level's lattice
+    nodes are the unique leaf corners, the only places the surface is evaluated
+    '''
+    def __init__(self, x0, y0, finest, depth, leaves):
+        self.x0 = x0
+        self.y0 = y0
+        self.finest = finest
+        self.depth = depth
+        self.leaves = leaves
+
+        # leaf corners on the finest lattice, shared corners are evaluated once
+        scale = (1 << (depth - leaves[:, 0])).astype(np.int64)
+        i, j = leaves[:, 1] * scale, leaves[:, 2] * scale
+        corners_i = np.concatenate((i, i + scale, i, i + scale))
+        corners_j = np.concatenate((j, j, j + scale, j + scale))
+        width = int(corners_j.max()) + 1
+        nodes = np.unique(corners_i * width + corners_j)
+        self.node_x = x0 + (nodes // width) * finest
+        self.node_y = y0 + (nodes % width) * finest
+        self.values = None
+        self._triangles = None
+
+    def __len__(self):
+        return len(self.leaves)
+
+    @property
+    def nodes(self):
+        return np.column_stack((self.node_x, self.node_y))
+
+    def leaf_bounds(self):
+        # return: (n, 4) array of x_min, y_min, x_max, y_max per leaf
+        size = self.finest * (1 << (self.depth - self.leaves[:, 0])).astype(np.float64)
+        x_min = self.x0 + self.leaves[:, 1] * size
+        y_min = self.y0 + self.leaves[:, 2] * size
+        return np.column_stack((x_min, y_min, x_min + size, y_min + size))
+
+    def triangles(self):
+        # triangulation of the nodes, hanging corners of finer neighbours become vertices so the
+        # surface has no cracks along level changes
+        if self._triangles is None:
+            self._triangles = Delaunay(self.nodes).simplices
+        return self._triangles
+
+    def evaluate(self, interpolators, name, method='linear', support_distance=None, **options):
+        '''
+        interpolate a field of an InterpolatorCache at the nodes
+        support_distance: nodes farther than this from every sample are NaN (not evaluated)
+        return: node values, also kept in self.values
+        '''
+        nodes = self.nodes
+        self.values = np.full(len(nodes), np.nan)
+        inside = np.ones(len(nodes), dtype=bool)
+        if support_distance is not None:
+            inside = support_mask(interpolators.tree, nodes, support_distance)
+        if inside.any():
+            self.values[inside] = interpolators.interpolator(name, method, **options)(nodes[inside])
+        return self.values
+
+    def export_csv(self, filename):
+        # one row per node: X, Y (pipeline metres) and interpolated elevation
+        with open(filename, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['X_Coord', 'Y_Coord', 'Elevation'])
+            for x, y, z in zip(self.node_x, self.node_y, self.values):
+                writer.writerow([f"{x:.2f}", f"{y:.2f}", '' if np.isnan(z) else f"{z:.3f}"])
+
+def build_quadtree(x, y, z, grid_size, max_points=QUADTREE_MAX_POINTS, max_std=QUADTREE_MAX_STD,
+                   max_depth=QUADTREE_MAX_DEPTH):
+    '''
+    refine square cells level by level where samples are dense or their elevation varies
+    arguments: x, y, z sample arrays, grid_size - the uniform grid size this replaces, the finest cells
+               match its spacing along the longer side, max_points / max_std - split thresholds,
+               max_depth - refinement levels below the base cells
+    return: AdaptiveGrid
+    '''
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    x0, y0 = float(np.min(x)), float(np.min(y))
+    width, height = float(np.max(x)) - x0, float(np.max(y)) - y0
+    finest = max(width, height) / max(grid_size - 1, 1) or 1.0
+
+    # base cells about as large as the shorter side, so narrow tracks start from a row of squares
+    depth = int(np.clip(np.floor(np.log2(max(min(width, height), finest) / finest)), 0, max_depth))
+    base = finest * (1 << depth)
+    base_nx = int(np.floor(width / base)) + 1
+    base_ny = int(np.floor(height / base)) + 1
+
+    cells_i, cells_j = np.meshgrid(np.arange(base_nx), np.arange(base_ny), indexing='ij')
+    cells_i, cells_j = cells_i.ravel(), cells_j.ravel()
+    active = np.arange(len(x))
+    leaves = []
+    for level in range(depth + 1):
+        size = base / (1 << level)
+        ny = base_ny << level
+        cell_keys = cells_i * ny + cells_j
+        order = np.argsort(cell_keys)
+
+        # point -> candidate cell on this level
+        pi = np.minimum(np.floor((x[active] - x0) / size).astype(np.int64), (base_nx << level) - 1)
+        pj = np.minimum(np.floor((y[active] - y0) / size).astype(np.int64), ny - 1)
+        cell = order[np.searchsorted(cell_keys[order], pi * ny + pj)]
+
+        counts = np.bincount(cell, minlength=len(cell_keys))
+        mean = np.bincount(cell, weights=z[active], minlength=len(cell_keys)) / np.maximum(counts, 1)
+        spread = np.bincount(cell, weights=(z[active] - mean[cell]) ** 2, minlength=len(cell_keys))
+        std = np.sqrt(spread / np.maximum(counts, 1))
+
+        split = (counts > max_points) | ((counts > 1) & (std > max_std))
+        if level == depth:
+            split[:] = False
+        leaves.append(np.column_stack((np.full((~split).sum(), level), cells_i[~split], cells_j[~split])))
+        if not split.any():
+            break
+
+        # the four children of every split cell, points in unsplit cells are done
+        active = active[split[cell]]
+        cells_i = (2 * cells_i[split])[:, None] + np.array([0, 1, 0, 1])
+        cells_j = (2 * cells_j[split])[:, None] + np.array([0, 0, 1, 1])
+        cells_i, cells_j = cells_i.ravel(), cells_j.ravel()
+
+    return AdaptiveGrid(x0, y0, finest, depth, np.concatenate(leaves).astype(np.int64))
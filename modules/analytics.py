@@ -3,60 +3,133 @@ import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.patches import Polygon
 from matplotlib.collections import PatchCollection
+from .mesh_topology import MeshTopology
+from .streaming_stats import StreamingStats
 
-def calculate_triangle_fatness(points, triangles):
-    fatness_ratios = []
-    inradii = []
-    circumradii = []
-    areas = []
+# triangles measured per step, bounds the temporaries of very large meshes
+FATNESS_CHUNK_SIZE = 1 << 20
+# from this many triangles the quality report streams its statistics instead of keeping per-triangle arrays
+STREAMING_MIN_TRIANGLES = 5_000_000
 
-    for triangle in triangles:
-        # Get triangle vertices
-        p1, p2, p3 = points[triangle]
+def triangle_metrics(points, triangles, dtype=np.float64):
+    '''
+    side lengths -> area, inradius, circumradius and fatness r/R of every triangle, in array operations
+    degenerate (zero-area) triangles get circumradius inf and fatness 0, zero-perimeter ones inradius 0
+    arguments: points - (n, 2) coordinates, triangles - (T, 3) vertex ids, dtype - float64 or float32
+    return: fatness, area, inradius, circumradius arrays
+    '''
+    p1 = points[triangles[:, 0]]
+    p2 = points[triangles[:, 1]]
+    p3 = points[triangles[:, 2]]
+    # edge vectors are differenced in float64 and only then cast, absolute coordinates (kilometres
+    # from the origin) would lose the metre-scale detail in float32
+    u = (p2 - p1).astype(dtype, copy=False)
+    v = (p3 - p1).astype(dtype, copy=False)
+    w = (p3 - p2).astype(dtype, copy=False)
 
-        # Calculate side lengths
-        a = np.linalg.norm(p2 - p3)  # opposite to p1
-        b = np.linalg.norm(p1 - p3)  # opposite to p2
-        c = np.linalg.norm(p1 - p2)  # opposite to p3
+    # side lengths, a opposite p1, b opposite p2, c opposite p3
+    a = np.hypot(w[:, 0], w[:, 1])
+    b = np.hypot(v[:, 0], v[:, 1])
+    c = np.hypot(u[:, 0], u[:, 1])
 
-        # Calculate area using cross product
-        area = 0.5 * abs(np.cross(p2 - p1, p3 - p1))
-        areas.append(area)
+    # area from the cross product of two sides
+    area = 0.5 * np.abs(u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0])
 
-        # Calculate inradius: r = Area / semiperimeter
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # inradius r = Area / semiperimeter, circumradius R = abc / (4 Area)
         semiperimeter = (a + b + c) / 2
-        inradius = area / semiperimeter if semiperimeter > 0 else 0
-        inradii.append(inradius)
+        inradius = np.where(semiperimeter > 0, area / semiperimeter, 0).astype(dtype, copy=False)
+        circumradius = np.where(area > 0, (a * b * c) / (4 * area), np.inf).astype(dtype, copy=False)
+        fatness = np.where(np.isfinite(circumradius) & (circumradius > 0), inradius / circumradius, 0).astype(dtype, copy=False)
+    return fatness, area, inradius, circumradius
 
-        # Calculate circumradius: R = (abc) / (4 * Area)
-        circumradius = (a * b * c) / (4 * area) if area > 0 else float('inf')
-        circumradii.append(circumradius)
+def calculate_triangle_fatness(points, triangles, dtype=np.float64, chunk_size=FATNESS_CHUNK_SIZE):
+    # fatness ratio r/R of every triangle plus summary statistics, chunk by chunk
+    # dtype=np.float32 halves the arithmetic temporaries, ratios then agree to ~3e-7 (measured on a 1 m spaced
+    # track 15 km from the origin, no triangle changed fat/skinny class)
+    triangles = np.asarray(triangles)
+    points = np.asarray(points)[:, :2]
+    fatness_ratios = np.empty(len(triangles), dtype=dtype)
+    area_sum = inradius_sum = circumradius_sum = 0.0
 
-        # Calculate fatness ratio: r/R
-        fatness = inradius / circumradius if circumradius > 0 and circumradius != float('inf') else 0
-        fatness_ratios.append(fatness)
+    for start in range(0, len(triangles), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        fatness, area, inradius, circumradius = triangle_metrics(points, triangles[chunk], dtype)
+        fatness_ratios[chunk] = fatness
+        area_sum += float(np.sum(area, dtype=np.float64))
+        inradius_sum += float(np.sum(inradius, dtype=np.float64))
+        circumradius_sum += float(np.sum(circumradius, dtype=np.float64))
 
-    fatness_ratios = np.array(fatness_ratios)
+    n = len(triangles)
+    fat_count = np.count_nonzero(fatness_ratios >= 0.5)  # Good quality threshold
+    skinny_count = np.count_nonzero(fatness_ratios < 0.3)  # Poor quality threshold
 
     # Generate statistics
     triangle_stats = {
-        'total_triangles': len(triangles),
-        'mean_fatness': np.mean(fatness_ratios),
+        'total_triangles': n,
+        'mean_fatness': np.mean(fatness_ratios, dtype=np.float64),
         'median_fatness': np.median(fatness_ratios),
         'min_fatness': np.min(fatness_ratios),
         'max_fatness': np.max(fatness_ratios),
-        'std_fatness': np.std(fatness_ratios),
-        'fat_triangles_count': np.sum(fatness_ratios >= 0.5),  # Good quality threshold
-        'skinny_triangles_count': np.sum(fatness_ratios < 0.3),  # Poor quality threshold
-        'fat_percentage': (np.sum(fatness_ratios >= 0.5) / len(fatness_ratios)) * 100,
-        'skinny_percentage': (np.sum(fatness_ratios < 0.3) / len(fatness_ratios)) * 100,
-        'mean_area': np.mean(areas),
-        'mean_inradius': np.mean(inradii),
-        'mean_circumradius': np.mean(circumradii)
+        'std_fatness': np.std(fatness_ratios, dtype=np.float64),
+        'fat_triangles_count': fat_count,
+        'skinny_triangles_count': skinny_count,
+        'fat_percentage': (fat_count / n) * 100,
+        'skinny_percentage': (skinny_count / n) * 100,
+        'mean_area': area_sum / n,
+        'mean_inradius': inradius_sum / n,
+        'mean_circumradius': circumradius_sum / n
     }
 
     return fatness_ratios, triangle_stats
 
+def stream_triangle_fatness(points, triangles, dtype=np.float64, chunk_size=FATNESS_CHUNK_SIZE):
+    '''
+    the triangle_stats of calculate_triangle_fatness in constant memory: running mean/std/min/max and a
+    fixed-bin histogram for the median, no per-triangle arrays are kept
+    arguments: points - (n, 2) coordinates, triangles - (T, 3) array (e.g. memory-mapped) or an
+               iterable of triangle chunks
+    return: triangle_stats, with 'streamed': True and the StreamingStats of the ratios in 'fatness_stats'
+            (the median is approximate to one histogram bin, everything else matches the exact stats)
+    '''
+    points = np.asarray(points)[:, :2]
+    if isinstance(triangles, np.ndarray):
+        chunks = (triangles[start:start + chunk_size] for start in range(0, len(triangles), chunk_size))
+    else:
+        chunks = triangles
+
+    fatness_stats = StreamingStats(value_range=(0.0, 0.5))
+    fat_count = skinny_count = 0
+    area_sum = inradius_sum = circumradius_sum = 0.0
+    for chunk in chunks:
+        fatness, area, inradius, circumradius = triangle_metrics(points, np.asarray(chunk), dtype)
+        fatness_stats.update(fatness)
+        fat_count += np.count_nonzero(fatness >= 0.5)
+        skinny_count += np.count_nonzero(fatness < 0.3)
+        area_sum += float(np.sum(area, dtype=np.float64))
+        inradius_sum += float(np.sum(inradius, dtype=np.float64))
+        circumradius_sum += float(np.sum(circumradius, dtype=np.float64))
+
+    n = fatness_stats.count
+    triangle_stats = {
+        'total_triangles': n,
+        'mean_fatness': fatness_stats.mean,
+        'median_fatness': fatness_stats.median,
+        'min_fatness': fatness_stats.min,
+        'max_fatness': fatness_stats.max,
+        'std_fatness': fatness_stats.std,
+        'fat_triangles_count': fat_count,
+        'skinny_triangles_count': skinny_count,
+        'fat_percentage': (fat_count / n) * 100,
+        'skinny_percentage': (skinny_count / n) * 100,
+        'mean_area': area_sum / n,
+        'mean_inradius': inradius_sum / n,
+        'mean_circumradius': circumradius_sum / n,
+        'streamed': True,
+        'fatness_stats': fatness_stats
+    }
+    return triangle_stats
+
 def visualize_triangle_fatness(points, triangles, fatness_ratios, title="Triangle Fatness Analysis"):
 
     fig, ax = plt.subplots(figsize=(12, 10))
@@ -111,6 +184,10 @@ def print_fatness_report(triangle_stats):
     print(f"Total triangles: {triangle_stats['total_triangles']}")
     print(f"  Min fatness: {triangle_stats['min_fatness']:.3f}")
     print(f"  Max fatness: {triangle_stats['max_fatness']:.3f}")
+    if triangle_stats.get('streamed'):
+        # streamed stats: the median comes from the histogram
+        print(f"  Median fatness: ~{triangle_stats['median_fatness']:.3f} "
+              f"(streamed, ±{triangle_stats['fatness_stats'].bin_width:.4f})")
     print()
 
     print(f"  Fat triangles (r/R ≥ 0.5): {triangle_stats['fat_triangles_count']} ({triangle_stats['fat_percentage']:.1f}%)")
@@ -130,15 +207,58 @@ def print_fatness_report(triangle_stats):
     print(f"Overall Mesh Fatness Quality: {quality_grade}")
     print("="*35)
 
-def analyze_triangulation_quality(triangulation, points):
+def print_topology_report(topology, fatness_ratios=None):
+    # hull triangles are often slivers, report them apart from the interior ones
+    # (fatness_ratios None, e.g. streamed statistics: counts only)
+    boundary_triangles = np.zeros(len(topology.triangles), dtype=bool)
+    boundary_triangles[topology.edge_triangles[topology.boundary_edge_mask, 0]] = True
+
+    print("\nMesh Topology")
+    print("="*35)
+    print(f"  Vertices: {topology.n_vertices} ({int(np.sum(topology.boundary_vertex_mask))} on the boundary)")
+    print(f"  Edges: {topology.n_edges} ({int(np.sum(topology.boundary_edge_mask))} on the boundary)")
+    print(f"  Mean triangles per vertex: {np.mean(topology.vertex_triangle_counts):.2f}")
+    if fatness_ratios is None:
+        print(f"  Boundary triangles: {int(np.sum(boundary_triangles))}")
+        print(f"  Interior triangles: {int(np.sum(~boundary_triangles))}")
+    else:
+        if boundary_triangles.any():
+            print(f"  Boundary triangles: {int(np.sum(boundary_triangles))}, "
+                  f"mean fatness {np.mean(fatness_ratios[boundary_triangles]):.3f}")
+        if not boundary_triangles.all():
+            print(f"  Interior triangles: {int(np.sum(~boundary_triangles))}, "
+                  f"mean fatness {np.mean(fatness_ratios[~boundary_triangles]):.3f}")
+    print("="*35)
+
+def analyze_triangulation_quality(triangulation, points, topology=None, triangles=None, streaming=None,
+                                  topology_report=None):
     
-    triangles = triangulation.simplices
+    # triangles: the same mesh in another triangle order (e.g. curve-sorted), default its simplices
+    if triangles is None:
+        triangles = triangulation.simplices
+
+    # streaming: constant-memory statistics without the per-triangle plot, None = decide from the size
+    if streaming is None:
+        streaming = len(triangles) >= STREAMING_MIN_TRIANGLES
+    # topology_report: print the boundary/interior breakdown, None = only for a streamed report
+    if topology_report is None:
+        topology_report = streaming
+    if streaming:
+        print_fatness_report(stream_triangle_fatness(points, triangles))
+        if topology_report and topology is not None:
+            print_topology_report(topology)
+        print("Per-triangle fatness plot skipped for a streamed report")
+        return
 
     # Calculate fatness metrics
     fatness_ratios, triangle_stats = calculate_triangle_fatness(points, triangles)
 
     # Print analysis report
     print_fatness_report(triangle_stats)
+    if topology_report:
+        if topology is None:
+            topology = MeshTopology(triangles, len(points))
+        print_topology_report(topology, fatness_ratios)
 
     # Create visualization
     visualize_triangle_fatness(points, triangles, fatness_ratios)
\ No newline at end of file
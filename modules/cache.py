@@ -0,0 +1,200 @@
+"""
+On-disk cache of parsed and projected survey points, keyed by source file content,
+and of interpolated surfaces, keyed by dataset hash and interpolation settings
+"""
+import hashlib
+import os
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_CACHE_DIR = '.mapping_cache'
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_SURFACE_MEMORY_BYTES = 256 * 1024 * 1024
+# bump when the cached array layout or the loaders' output changes
+CACHE_VERSION = 1
+
+def hash_file(filename, chunk_size=1 << 20):
+    '''
+    hash the content of a file
+    arguments: file path
+    return: hex digest string
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_settings(*settings):
+    # short stable hash of settings that change the cached values (e.g. projection CRS)
+    return hashlib.blake2b(repr(settings).encode(), digest_size=8).hexdigest()
+
+class PointCache:
+    '''
+    per source file cache stored as plain .npy files under cache_dir
+    raw entries hold lat/lon/ele rows, projected entries hold absolute x/y rows (z is the raw ele row)
+    entries are loaded memory-mapped and evicted least-recently-used once the directory exceeds max_bytes
+    '''
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # (path, size, mtime) -> content hash, saves re-hashing unchanged files within a session
+        self._key_memo = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def source_key(self, filename):
+        # any change to the file content gives a new key, so stale entries are never read
+        stat = os.stat(filename)
+        memo_key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._key_memo:
+            self._key_memo[memo_key] = f"v{CACHE_VERSION}_{hash_file(filename)}"
+        return self._key_memo[memo_key]
+
+    def _path(self, kind, key, settings=None):
+        name = f"{kind}_{key}" if settings is None else f"{kind}_{key}_{hash_settings(*settings)}"
+        return os.path.join(self.cache_dir, name + '.npy')
+
+    def _load(self, path):
+        try:
+            rows = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        # touch the entry so eviction sees it as recently used
+        os.utime(path)
+        self.hits += 1
+        return rows
+
+    def _store(self, path, rows):
+        # write to a temporary file first so a crash never leaves a truncated entry behind
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, rows)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def load_raw(self, key):
+        # return: lats, lons, alts read-only views, or None on a miss
+        rows = self._load(self._path('raw', key))
+        return None if rows is None else (rows[0], rows[1], rows[2])
+
+    def store_raw(self, key, lats, lons, alts):
+        self._store(self._path('raw', key), np.vstack((lats, lons, alts)).astype(np.float64))
+
+    def load_projected(self, key, projection):
+        # projection: tuple of settings that produced the values, e.g. (source_crs, target_crs)
+        rows = self._load(self._path('proj', key, projection))
+        return None if rows is None else (rows[0], rows[1])
+
+    def store_projected(self, key, projection, x, y):
+        self._store(self._path('proj', key, projection), np.vstack((x, y)).astype(np.float64))
+
+    def evict(self, keep=None):
+        '''
+        delete least recently used entries until the cache fits in max_bytes
+        arguments: keep - path never removed (the entry just stored, even if it alone exceeds max_bytes)
+        return: number of removed entries
+        '''
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # still open elsewhere (a memory-mapped entry on Windows), try again next time
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npy'):
+                os.remove(os.path.join(self.cache_dir, name))
+
+def hash_arrays(*arrays, chunk_size=1 << 20):
+    # content hash of numeric arrays (dtype, shape and values), memory-mapped columns are read in chunks
+    digest = hashlib.blake2b(digest_size=16)
+    for values in arrays:
+        values = np.ascontiguousarray(values).ravel()
+        digest.update(f"{values.dtype.str}{values.shape}".encode())
+        for start in range(0, len(values), chunk_size):
+            digest.update(memoryview(values[start:start + chunk_size]))
+    return digest.hexdigest()
+
+class SurfaceCache(PointCache):
+    '''
+    interpolated grids keyed by dataset hash and interpolation settings
+    an in-memory LRU tier (memory_bytes) sits in front of the on-disk tier, which shares cache_dir and
+    its size-based eviction with the point cache; returned grids are read-only and may be shared
+    '''
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES,
+                 memory_bytes=DEFAULT_SURFACE_MEMORY_BYTES):
+        super().__init__(cache_dir, max_bytes)
+        self.memory_bytes = memory_bytes
+        self.memory_hits = 0
+        self._memory = OrderedDict()
+        self._memory_used = 0
+
+    def key(self, dataset_key, *settings):
+        # settings: method, grid size, extent and anything else that changes the grid
+        return f"v{CACHE_VERSION}_{dataset_key}_{hash_settings(*settings)}"
+
+    def _remember(self, key, grid):
+        if grid.nbytes > self.memory_bytes:
+            return
+        self._memory[key] = grid
+        self._memory_used += grid.nbytes
+        while self._memory_used > self.memory_bytes:
+            _, oldest = self._memory.popitem(last=False)
+            self._memory_used -= oldest.nbytes
+
+    def load(self, key):
+        # return: the grid, or None on a miss in both tiers
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+        grid = self._load(self._path('surf', key))
+        if grid is None:
+            return None
+        # promote disk hits so the next lookup doesn't touch the file
+        grid = np.array(grid)
+        grid.setflags(write=False)
+        self._remember(key, grid)
+        return grid
+
+    def store(self, key, grid):
+        self._store(self._path('surf', key), grid)
+        grid = np.array(grid)
+        grid.setflags(write=False)
+        self._remember(key, grid)
+        return grid
+
+    def report(self):
+        return (f"Surface cache: {self.memory_hits} memory hit(s), {self.hits} disk hit(s), "
+                f"{self.misses} miss(es)")
+
+    def clear(self):
+        super().clear()
+        self._memory.clear()
+        self._memory_used = 0
@@ -1,18 +1,39 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from .interpolation import create_grid, interpolate_elevation
+from .mesh_topology import MeshTopology
+
+def corner_angles(points, triangles):
+    # interior angle at every corner, column i holds the angle at vertex triangles[:, i]
+    # degenerate corners (zero-length edge) get 0, like the per-vertex loop in compute_curvature
+    corners = points[triangles]
+    angles = np.zeros(triangles.shape, dtype=np.float64)
+    for i in range(3):
+        edge1 = corners[:, (i + 1) % 3] - corners[:, i]
+        edge2 = corners[:, (i + 2) % 3] - corners[:, i]
+        len1 = np.linalg.norm(edge1, axis=1)
+        len2 = np.linalg.norm(edge2, axis=1)
+        valid = (len1 > 0) & (len2 > 0)
+        cos_angle = np.einsum('ij,ij->i', edge1[valid], edge2[valid]) / (len1[valid] * len2[valid])
+        angles[valid, i] = np.arccos(np.clip(cos_angle, -1.0, 1.0))
+    return angles
 
 def visualize_curvature_heatmap(x, y, vertex_curvatures, grid_size=50, method='cubic',
-                                norm_mode='normal', vmax=None):
+                                norm_mode='normal', vmax=None, interpolators=None):
     # Create interpolation grid
     xi, yi = create_grid(x, y, grid_size)
 
     # Interpolate curvature values onto the grid
-    curvature_interpolated = interpolate_elevation(
-        x, y, vertex_curvatures,
-        xi, yi,
-        method=method
-    )
+    # interpolators: InterpolatorCache over the same points, skips re-triangulating them
+    if interpolators is not None:
+        interpolators.add_field('curvature', vertex_curvatures)
+        curvature_interpolated = interpolators.interpolate('curvature', xi, yi, method=method)
+    else:
+        curvature_interpolated = interpolate_elevation(
+            x, y, vertex_curvatures,
+            xi, yi,
+            method=method
+        )
 
     # Create the heatmap visualization
     plt.figure(figsize=(12, 10))
@@ -100,95 +121,42 @@ def visualize_vertex_labels(points, vertex_curvatures=None):
     plt.tight_layout()
     plt.show()
 
-def compute_curvature(points, triangles, interpolation_method='cubic', norm_mode='normal', vmax=None):
+def compute_curvature(points, triangles, interpolation_method='cubic', norm_mode='normal', vmax=None,
+                      interpolators=None, topology=None, vertex_ids=None):
 
-    vertex_curvatures = []
     n_vertices = len(points)
+    # vertex_ids: id reported for each vertex (e.g. its id before a spatial reordering), default its index
+    vertex_ids = np.arange(n_vertices) if vertex_ids is None else np.asarray(vertex_ids)
+
+    # edges, vertex-to-triangle adjacency and boundary masks come from one MeshTopology
+    # (pass the pipeline's to skip rebuilding it)
+    if topology is None:
+        topology = MeshTopology(triangles, n_vertices)
+    incident_triangles = topology.vertex_triangle_counts
 
-    # vertex to triangle dicitionary
-    # to map which trianges each vertex is part of
-    vertex_to_triangles = {i: [] for i in range(n_vertices)}
-    for triangle_id, triangle in enumerate(triangles):
-        for vertex_id in triangle:
-            vertex_to_triangles[vertex_id].append(triangle_id)
-
-    # edge-to-triangle-count mapping to identify boundary edges
-    # An edge is represented as a sorted tuple (v1, v2) where v1 < v2
-    edge_to_triangle_count = {}
-    for triangle in triangles:
-        # Each triangle has 3 edges
-        edges = [
-            tuple(sorted([triangle[0], triangle[1]])),
-            tuple(sorted([triangle[1], triangle[2]])),
-            tuple(sorted([triangle[2], triangle[0]]))
-        ]
-        for edge in edges:
-            edge_to_triangle_count[edge] = edge_to_triangle_count.get(edge, 0) + 1
-
-    # Identify boundary edges (edges that belong to only 1 triangle)
-    boundary_edges = {edge for edge, count in edge_to_triangle_count.items() if count == 1}
-
-    # Identify boundary vertices (vertices connected to any boundary edge)
-    boundary_vertices = set()
-    for edge in boundary_edges:
-        boundary_vertices.add(edge[0])
-        boundary_vertices.add(edge[1])
+    # Boundary edges belong to only 1 triangle, boundary vertices touch a boundary edge
+    boundary_vertices = topology.boundary_vertex_mask
+    n_boundary_vertices = int(np.sum(boundary_vertices))
 
     print(f"\nCurvature Analysis Report:")
     print("="*35)
     print(f"Boundary Detection:")
     print("-"*35)
-    print(f"  Total edges: {len(edge_to_triangle_count)}")
-    print(f"  Boundary edges: {len(boundary_edges)}")
-    print(f"  Boundary vertices: {len(boundary_vertices)}")
-    print(f"  Interior vertices: {n_vertices - len(boundary_vertices)}")
-
-    for vertex_id in range(n_vertices):
-        # Skip boundary vertices - assign curvature of 0
-        if vertex_id in boundary_vertices:
-            vertex_curvatures.append(0.0)
-            continue
-
-        connected_triangles = vertex_to_triangles[vertex_id]
-        angle_sum = 0.0
-
-        # calculate the angle at this vertex in each triangle
-        for triangle_id in connected_triangles:
-            triangle = triangles[triangle_id]
-
-            # determineind which position in the triangle corresponds to our vertex
-            local_idx = np.where(triangle == vertex_id)[0][0]
-
-            # Get the three vertices (reorder so our vertex is first)
-            v0 = points[triangle[local_idx]]      # Our vertex (center)
-            v1 = points[triangle[(local_idx + 1) % 3]]  # Next vertex
-            v2 = points[triangle[(local_idx + 2) % 3]]  # Previous vertex
-
-            # Calculate edges from center vertex
-            edge1 = v1 - v0
-            edge2 = v2 - v0
-
-            # calculating the angle using dot product
-            len1 = np.linalg.norm(edge1)
-            len2 = np.linalg.norm(edge2)
-
-            if len1 > 0 and len2 > 0: # check for division by zero
-                cos_angle = np.dot(edge1, edge2) / (len1 * len2)
-                # force values to [-1, 1] to avoid numerical errors
-                # due to python float quirks
-                cos_angle = np.clip(cos_angle, -1.0, 1.0)
-                angle = np.arccos(cos_angle)
-                angle_sum += angle
-
-        # calculate angle deficit k = 2pi - sum(angles)
-        curvature = abs(2 * np.pi - angle_sum)
-        vertex_curvatures.append(curvature)
-
-    vertex_curvatures_array = np.array(vertex_curvatures)
+    print(f"  Total edges: {topology.n_edges}")
+    print(f"  Boundary edges: {int(np.sum(topology.boundary_edge_mask))}")
+    print(f"  Boundary vertices: {n_boundary_vertices}")
+    print(f"  Interior vertices: {n_vertices - n_boundary_vertices}")
+
+    # sum of the angles at each vertex over its triangles
+    angle_sums = np.bincount(np.asarray(triangles).ravel(), weights=corner_angles(points, triangles).ravel(),
+                             minlength=n_vertices)
+
+    # calculate angle deficit k = 2pi - sum(angles), boundary vertices get curvature 0
+    vertex_curvatures_array = np.where(boundary_vertices, 0.0, np.abs(2 * np.pi - angle_sums))
 
     # Get interior vertices only for stats
-    interior_curvatures = np.array([vertex_curvatures_array[i] for i in range(n_vertices)
-                                     if i not in boundary_vertices])
+    interior_indices = np.flatnonzero(~boundary_vertices)
+    interior_curvatures = vertex_curvatures_array[interior_indices]
 
     print(f"\nCurvature Statistics (Interior vertices only):")
     print("-"*35)
@@ -202,26 +170,21 @@ def compute_curvature(points, triangles, interpolation_method='cubic', norm_mode
 
     # Identify vertices with highest and lowest curvature, interior only
     # filtering out boundary vertices (curvature = 0)
-    interior_indices = [i for i in range(n_vertices) if i not in boundary_vertices]
-
     if len(interior_indices) > 0:
-        interior_curvatures_with_idx = [(i, vertex_curvatures_array[i]) for i in interior_indices]
-        interior_curvatures_with_idx.sort(key=lambda x: x[1])
+        ranked = interior_indices[np.argsort(interior_curvatures, kind='stable')]
 
         print(f"\n5 Interior Vertices with LOWEST curvature (flattest):")
         print("-"*35)
-        for i in range(min(5, len(interior_curvatures_with_idx))):
-            idx, curv = interior_curvatures_with_idx[i]
-            print(f"  Vertex {idx:4d}: {curv:.6f} rad | "
-                  f"Triangles: {len(vertex_to_triangles[idx]):2d} | "
+        for idx in ranked[:5]:
+            print(f"  Vertex {vertex_ids[idx]:4d}: {vertex_curvatures_array[idx]:.6f} rad | "
+                  f"Triangles: {incident_triangles[idx]:2d} | "
                   f"Coords: ({points[idx, 0]:.2f}, {points[idx, 1]:.2f})")
 
         print(f"\n5 Interior Vertices with HIGHEST curvature (most curved):")
         print("-"*35)
-        for i in range(min(5, len(interior_curvatures_with_idx))):
-            idx, curv = interior_curvatures_with_idx[-(i+1)]
-            print(f"  Vertex {idx:4d}: {curv:.6f} rad | "
-                  f"Triangles: {len(vertex_to_triangles[idx]):2d} | "
+        for idx in ranked[::-1][:5]:
+            print(f"  Vertex {vertex_ids[idx]:4d}: {vertex_curvatures_array[idx]:.6f} rad | "
+                  f"Triangles: {incident_triangles[idx]:2d} | "
                   f"Coords: ({points[idx, 0]:.2f}, {points[idx, 1]:.2f})")
 
     print("="*35)
@@ -235,10 +198,10 @@ def compute_curvature(points, triangles, interpolation_method='cubic', norm_mode
             writer.writerow(['Vertex_ID', 'Curvature_Radians', 'Incident_Triangles', 'Is_Boundary', 'X_Coord', 'Y_Coord'])
             for i in range(n_vertices):
                 writer.writerow([
-                    i,
+                    vertex_ids[i],
                     f"{vertex_curvatures_array[i]:.6f}",
-                    len(vertex_to_triangles[i]),
-                    'Boundary' if i in boundary_vertices else 'Interior',
+                    incident_triangles[i],
+                    'Boundary' if boundary_vertices[i] else 'Interior',
                     f"{points[i, 0]:.2f}",
                     f"{points[i, 1]:.2f}"
                 ])
@@ -255,4 +218,4 @@ def compute_curvature(points, triangles, interpolation_method='cubic', norm_mode
     y_coords = points[:, 1]
     visualize_curvature_heatmap(x_coords, y_coords, vertex_curvatures_array,
                                grid_size=50, method=interpolation_method,
-                               norm_mode=norm_mode, vmax=vmax)
+                               norm_mode=norm_mode, vmax=vmax, interpolators=interpolators)
@@ -1,8 +1,34 @@
+import os
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import gpxpy
 from pyproj import Transformer
 import numpy as np
 
-def load_gpx_data(filename):
+# how many parsed trackpoints to keep attached to their segment before dropping them
+STREAM_CLEAR_INTERVAL = 4096
+# points per chunk of the streaming gpx loader (and per write into a point store)
+STREAM_CHUNK_SIZE = 1 << 16
+# projection used by coord_transform, the resolved target CRS is also part of the point cache key
+# 'auto' picks the UTM zone of the data centroid (zone 36N, epsg:32636, for our surveys)
+SOURCE_CRS = "epsg:4326"
+TARGET_CRS = "auto"
+# points projected per pyproj call, bounds the working set for very large surveys
+PROJECTION_CHUNK_SIZE = 1 << 20
+# multi-file loads switch to the process pool once at least this many files are selected
+PARALLEL_MIN_FILES = 4
+
+def _local_name(tag):
+    # strip the xml namespace, GPX 1.0 and 1.1 use different ones
+    return tag.rsplit('}', 1)[-1]
+
+def load_gpx_data_gpxpy(filename):
+    '''
+    load trackpoints by building the full gpxpy object tree
+    arguments: gpx file path
+    return: lats, lons, alts float64 arrays (missing elevations are NaN)
+    '''
     with open(filename, 'r') as f:
         gpx = gpxpy.parse(f)
 
@@ -13,32 +39,317 @@ def load_gpx_data(filename):
                 lats.append(point.latitude)
                 lons.append(point.longitude)
                 alts.append(point.elevation)
+    return (np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64),
+            np.array(alts, dtype=np.float64))
+
+def load_gpx_data_streaming(filename):
+    '''
+    stream <trkpt> elements with incremental xml parsing and write them straight into float64 arrays
+    arguments: gpx file path
+    return: lats, lons, alts float64 arrays (missing elevations are NaN)
+    '''
+    chunks = list(iter_gpx_chunks(filename))
+    if not chunks:
+        return tuple(np.empty(0, dtype=np.float64) for _ in range(3))
+    if len(chunks) == 1:
+        return chunks[0]
+    return tuple(np.concatenate([chunk[k] for chunk in chunks]) for k in range(3))
+
+def iter_gpx_chunks(filename, chunk_size=STREAM_CHUNK_SIZE):
+    '''
+    stream a gpx file as (lats, lons, alts) float64 chunks of at most chunk_size points, parsed
+    incrementally so neither the xml tree nor the whole file's arrays are ever built
+    '''
+    chunk = np.empty((3, chunk_size), dtype=np.float64)
+    lats, lons, alts = chunk
+    count = 0
+    total = 0
+    parents = []
+
+    for event, elem in ET.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if _local_name(elem.tag) != 'trkpt':
+            continue
+
+        ele = np.nan
+        for child in elem:
+            if _local_name(child.tag) == 'ele' and child.text is not None:
+                ele = float(child.text)
+                break
+        lats[count] = float(elem.get('lat'))
+        lons[count] = float(elem.get('lon'))
+        alts[count] = ele
+        count += 1
+        total += 1
+
+        # drop parsed trackpoints so the tree never holds the whole file
+        elem.clear()
+        if total % STREAM_CLEAR_INTERVAL == 0 and parents:
+            del parents[-1][:]
+
+        if count == chunk_size:
+            yield lats, lons, alts
+            chunk = np.empty((3, chunk_size), dtype=np.float64)
+            lats, lons, alts = chunk
+            count = 0
+
+    if count:
+        yield lats[:count], lons[:count], alts[:count]
+
+def load_gpx_data(filename, parser='auto'):
+    '''
+    load trackpoints from a gpx file
+    arguments: gpx file path, parser - 'stream', 'gpxpy' or 'auto' (stream, fall back to gpxpy
+               for files the streaming parser can't handle)
+    return: lats, lons, alts float64 arrays
+    '''
+    if parser == 'gpxpy':
+        return load_gpx_data_gpxpy(filename)
+    if parser == 'stream':
+        return load_gpx_data_streaming(filename)
+
+    try:
+        lats, lons, alts = load_gpx_data_streaming(filename)
+    except (ET.ParseError, TypeError, ValueError) as e:
+        print(f"Streaming parser failed on {filename} ({e}), falling back to gpxpy")
+        return load_gpx_data_gpxpy(filename)
+    if len(lats) == 0:
+        # no plain <trkpt> elements found, let gpxpy make sense of the structure
+        return load_gpx_data_gpxpy(filename)
     return lats, lons, alts
 
-def load_multiple_gpx(gpx_files):
+def _parse_kml_coordinates(blob):
+    # one <coordinates> blob is whitespace separated "lon,lat[,alt]" tuples, convert it in one go
+    tuples = blob.split()
+    if not tuples:
+        return np.empty((0, 3), dtype=np.float64)
+    values = np.array(','.join(tuples).split(','), dtype=np.float64)
+    if len(values) == 3 * len(tuples):
+        return values.reshape(-1, 3)
+    if len(values) == 2 * len(tuples):
+        # no altitudes in this block
+        return np.column_stack((values.reshape(-1, 2), np.full(len(tuples), np.nan)))
+
+    # mixed 2D/3D tuples, rare enough to handle one at a time
+    rows = np.full((len(tuples), 3), np.nan)
+    for i, item in enumerate(tuples):
+        fields = item.split(',')
+        rows[i, :len(fields)] = [float(v) for v in fields[:3]]
+    return rows
+
+def _iter_kml_blocks(filename):
+    # (k, 3) lon,lat,alt rows of each <coordinates> block of a LineString/LinearRing geometry
+    parents = []
+    for event, elem in ET.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if _local_name(elem.tag) != 'coordinates':
+            continue
+        # skip Point placemarks (start/end markers), they would duplicate track vertices
+        if parents and _local_name(parents[-1].tag) in ('LineString', 'LinearRing'):
+            yield _parse_kml_coordinates(elem.text or '')
+        elem.clear()
+
+def load_kml_data(filename):
+    '''
+    stream <coordinates> blocks of LineString/LinearRing geometries and parse each block in bulk
+    arguments: kml file path
+    return: lats, lons, alts float64 arrays (missing altitudes are NaN)
+    '''
+    blocks = list(_iter_kml_blocks(filename))
+    coords = np.concatenate(blocks) if blocks else np.empty((0, 3), dtype=np.float64)
+    # kml orders tuples as lon,lat,alt
+    return (np.ascontiguousarray(coords[:, 1]), np.ascontiguousarray(coords[:, 0]),
+            np.ascontiguousarray(coords[:, 2]))
+
+def find_kml_twin(filename):
+    # the .kml export next to a .gpx track, or None if there isn't one
+    root, ext = os.path.splitext(filename)
+    if ext.lower() != '.gpx':
+        return None
+    for twin in (root + '.kml', root + '.KML'):
+        if os.path.isfile(twin):
+            return twin
+    return None
+
+def resolve_track_file(filename, prefer_kml=False):
+    # swap a .gpx track for its .kml twin when there is one, the coordinate blocks parse much faster
+    if prefer_kml:
+        twin = find_kml_twin(filename)
+        if twin is not None:
+            return twin
+    return filename
+
+def load_track_data(filename):
     '''
-    load and combine data from multiple gpx files
-    arguments: list of gpx file paths
-    return: combined lats, lons, alts lists
+    load a track file, picking the loader from the file extension (.gpx or .kml)
+    arguments: track file path
+    return: lats, lons, alts float64 arrays
     '''
-    all_lats, all_lons, all_alts = [], [], []
-    for filename in gpx_files:
-        print(f"loading {filename}...")
-        lats, lons, alts = load_gpx_data(filename)
-        all_lats.extend(lats)
-        all_lons.extend(lons)
-        all_alts.extend(alts)
-    return all_lats, all_lons, all_alts
+    if filename.lower().endswith('.kml'):
+        return load_kml_data(filename)
+    return load_gpx_data(filename)
+
+def iter_track_chunks(filename, chunk_size=STREAM_CHUNK_SIZE):
+    '''
+    stream a track file (.gpx or .kml) as (lats, lons, alts) chunks without building its full arrays,
+    e.g. to fill a point store; gpx files the streaming parser can't read fall back to gpxpy (in memory)
+    arguments: track file path, chunk_size - points per chunk
+    '''
+    if filename.lower().endswith('.kml'):
+        for block in _iter_kml_blocks(filename):
+            for start in range(0, len(block), chunk_size):
+                rows = block[start:start + chunk_size]
+                yield rows[:, 1], rows[:, 0], rows[:, 2]
+        return
+
+    count = 0
+    try:
+        for chunk in iter_gpx_chunks(filename, chunk_size):
+            count += len(chunk[0])
+            yield chunk
+    except (ET.ParseError, TypeError, ValueError) as e:
+        if count:
+            raise
+        print(f"Streaming parser failed on {filename} ({e}), falling back to gpxpy")
+    if count == 0:
+        lats, lons, alts = load_gpx_data_gpxpy(filename)
+        for start in range(0, len(lats), chunk_size):
+            yield lats[start:start + chunk_size], lons[start:start + chunk_size], alts[start:start + chunk_size]
+
+def _load_gpx_timed(filename):
+    # process pool worker, returns the arrays together with the parse time
+    start = time.perf_counter()
+    lats, lons, alts = load_track_data(filename)
+    return lats, lons, alts, time.perf_counter() - start
+
+def load_gpx_parts(gpx_files, parallel=None, max_workers=None):
+    '''
+    load every track file (.gpx or .kml) into its own set of arrays, optionally in a process pool
+    arguments: list of track file paths, parallel - True/False or None to decide from the file count,
+               max_workers - process pool size (None = number of CPUs)
+    return: list of (lats, lons, alts) tuples in the same order as the input files
+    '''
+    if parallel is None:
+        parallel = len(gpx_files) >= PARALLEL_MIN_FILES
+    total = len(gpx_files)
+    parts = [None] * total
+    start = time.perf_counter()
+
+    if parallel and total > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_load_gpx_timed, filename): i for i, filename in enumerate(gpx_files)}
+            # files finish in any order, results are slotted back by index so the output stays deterministic
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                lats, lons, alts, elapsed = future.result()
+                parts[i] = (lats, lons, alts)
+                print(f"[{done}/{total}] loaded {gpx_files[i]}: {len(lats)} points in {elapsed:.3f}s")
+    else:
+        for i, filename in enumerate(gpx_files):
+            lats, lons, alts, elapsed = _load_gpx_timed(filename)
+            parts[i] = (lats, lons, alts)
+            print(f"[{i + 1}/{total}] loaded {filename}: {len(lats)} points in {elapsed:.3f}s")
+
+    mode = "parallel" if parallel and total > 1 else "sequential"
+    print(f"Loaded {total} files ({mode}) in {time.perf_counter() - start:.3f}s")
+    return parts
+
+def concatenate_parts(parts, out=None):
+    '''
+    join per-file arrays with a single preallocated copy
+    arguments: list of (lats, lons, alts) tuples, out - optional preallocated (lats, lons, alts) arrays,
+               e.g. memory-mapped point store columns
+    return: combined lats, lons, alts float64 arrays
+    '''
+    total = sum(len(part[0]) for part in parts)
+    columns = out if out is not None else tuple(np.empty(total, dtype=np.float64) for _ in range(3))
+    offset = 0
+    for part in parts:
+        n = len(part[0])
+        for column, values in zip(columns, part):
+            column[offset:offset + n] = values
+        offset += n
+    return columns
+
+def load_multiple_gpx(gpx_files, parallel=None, max_workers=None):
+    '''
+    load and combine data from multiple track files (.gpx or .kml)
+    arguments: list of track file paths, parallel/max_workers - see load_gpx_parts
+    return: combined lats, lons, alts float64 arrays, in file order
+    '''
+    return concatenate_parts(load_gpx_parts(gpx_files, parallel=parallel, max_workers=max_workers))
 
 def normalize_elevation(alts):
     alts = np.array(alts) # convert to numpy array
     alts -= np.min(alts) # normalizing elevation so min(alts) = 0
     return alts
 
-def coord_transform(lats, lons):
-    transformer = Transformer.from_crs("epsg:4326", "epsg:32636", always_xy=True) # tranforming latitude and longitude from degree into meters for projection
-    x, y = transformer.transform(lons, lats)
-    # normalize coordinates so min(x) = 0 and min(y) = 0, similar to elevation normalization
-    x = np.array(x) - np.min(x)
-    y = np.array(y) - np.min(y)
-    return x, y
\ No newline at end of file
+# one Transformer per (source, target) CRS pair, building them is far slower than using them
+_transformers = {}
+
+def get_transformer(source_crs, target_crs):
+    key = (source_crs, target_crs)
+    if key not in _transformers:
+        _transformers[key] = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+    return _transformers[key]
+
+def utm_crs_for(lats, lons):
+    # WGS84 / UTM zone of the data centroid, north or south
+    # every step-th point is plenty for the zone and keeps nanmean's copy small for large surveys
+    step = max(len(lats) // PROJECTION_CHUNK_SIZE, 1)
+    lat = float(np.nanmean(lats[::step]))
+    lon = float(np.nanmean(lons[::step]))
+    zone = int((lon + 180) // 6) % 60 + 1
+    return f"epsg:{(32600 if lat >= 0 else 32700) + zone}"
+
+def resolve_target_crs(lats, lons, target_crs=TARGET_CRS):
+    return utm_crs_for(lats, lons) if target_crs == 'auto' else target_crs
+
+def project_coordinates(lats, lons, target_crs=TARGET_CRS, chunk_size=PROJECTION_CHUNK_SIZE, out=None):
+    '''
+    project latitude and longitude from degrees into metres, chunk by chunk into output buffers
+    arguments: lats, lons, target_crs - CRS string or 'auto', chunk_size - points per transform call,
+               out - optional preallocated (x, y) float64 arrays to write into
+    return: x, y absolute projected coordinates
+    '''
+    transformer = get_transformer(SOURCE_CRS, resolve_target_crs(lats, lons, target_crs))
+    n = len(lats)
+    if out is None:
+        x, y = np.empty(n, dtype=np.float64), np.empty(n, dtype=np.float64)
+    else:
+        x, y = out
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        x_chunk, y_chunk = x[start:stop], y[start:stop]
+        x_chunk[:] = lons[start:stop]
+        y_chunk[:] = lats[start:stop]
+        # pyproj overwrites the chunk views with the projected values, no temporaries
+        transformer.transform(x_chunk, y_chunk, inplace=True)
+    return x, y
+
+def normalize_coordinates(x, y, copy=True):
+    '''
+    normalize coordinates so min(x) = 0 and min(y) = 0, similar to elevation normalization
+    arguments: x, y, copy - set False to shift arrays the caller owns in place
+    return: x, y, origin - (min x, min y), add it back to get absolute coordinates
+    '''
+    x = np.array(x, dtype=np.float64) if copy else x
+    y = np.array(y, dtype=np.float64) if copy else y
+    origin = (float(np.min(x)), float(np.min(y)))
+    x -= origin[0]
+    y -= origin[1]
+    return x, y, origin
+
+def coord_transform(lats, lons, target_crs=TARGET_CRS, return_origin=False):
+    x, y = project_coordinates(lats, lons, target_crs)
+    x, y, origin = normalize_coordinates(x, y, copy=False)
+    if return_origin:
+        return x, y, origin
+    return x, y
@@ -1,11 +1,27 @@
 import numpy as np
 from scipy.spatial import Delaunay
-from scipy.interpolate import griddata
+from scipy.interpolate import griddata, LinearNDInterpolator
+from scipy.optimize import brentq
+from .mesh_topology import MeshTopology
+from .incremental_delaunay import IncrementalTriangulation
+from .analytics import calculate_triangle_fatness
+from .tiled_triangulation import tiled_delaunay
 
-def build_delaunay_triangulation(x, y, z):
+# triangles below this fatness (r/R) are refined, the same "skinny" threshold the quality report uses
+REFINE_MIN_FATNESS = 0.3
+# default Steiner point budget of the selective refinement, as a fraction of the input points
+REFINE_POINT_BUDGET = 0.25
+REFINE_MAX_ITERATIONS = 20
+
+def build_delaunay_triangulation(x, y, z, parallel=False, max_workers=None):
 
     points_2d = np.column_stack((x, y))
-    triangulation = Delaunay(points_2d)
+    # parallel=True splits the points into tiles triangulated across processes (opt-in: it only pays
+    # off with many cores, and interpolation still builds its own scipy Delaunay)
+    if parallel:
+        triangulation = tiled_delaunay(points_2d, max_workers=max_workers)
+    else:
+        triangulation = Delaunay(points_2d)
     triangles = triangulation.simplices
     
     print(f"Created {len(triangles)} triangles from {len(points_2d)} points")
@@ -13,44 +29,23 @@ def build_delaunay_triangulation(x, y, z):
     return triangulation, triangles, len(triangles)
 
 
-def optimize_with_steiner_points(x, y, z, triangulation):
+def optimize_with_steiner_points(x, y, z, triangulation, topology=None):
 
     # Get original points
     original_points = np.column_stack((x, y))
     original_z = np.array(z)
 
-    # Get all edges from triangulation
+    # Get all unique edges from the triangulation (topology: a prebuilt MeshTopology of it)
     triangles = triangulation.simplices
-    edges = set()
-
-    # Extract unique edges from all triangles
-    for triangle in triangles:
-        for i in range(3):
-            edge = tuple(sorted([triangle[i], triangle[(i + 1) % 3]]))
-            edges.add(edge)
+    if topology is None:
+        topology = MeshTopology(triangles, len(original_points))
 
-    print(f"Found {len(edges)} unique edges in triangulation")
+    print(f"Found {topology.n_edges} unique edges in triangulation")
 
     # Calculate Steiner points (midpoints of edges)
-    steiner_points = []
-    steiner_z = []
-
-    for edge in edges:
-        p1_idx, p2_idx = edge
-
-        # Midpoint coordinates
-        mid_x = (x[p1_idx] + x[p2_idx]) / 2
-        mid_y = (y[p1_idx] + y[p2_idx]) / 2
-
-        # Interpolate elevation at midpoint
-        # Use linear interpolation between the two edge endpoints
-        mid_z = (z[p1_idx] + z[p2_idx]) / 2
-
-        steiner_points.append([mid_x, mid_y])
-        steiner_z.append(mid_z)
-
-    steiner_points = np.array(steiner_points)
-    steiner_z = np.array(steiner_z)
+    # elevation is interpolated linearly between the two edge endpoints
+    mid_x, mid_y, steiner_z = topology.edge_midpoints(x, y, original_z)
+    steiner_points = np.column_stack((mid_x, mid_y))
     steiner_count = len(steiner_points)
 
     print(f"Generated {steiner_count} Steiner points at edge midpoints")
@@ -71,4 +66,142 @@ def optimize_with_steiner_points(x, y, z, triangulation):
     print(f"Optimized triangulation: {len(new_triangles)} triangles from {len(all_points)} points")
     print(f"Improvement: +{len(new_triangles) - len(triangles)} triangles, +{steiner_count} points")
 
-    return new_triangulation, new_triangles, new_x, new_y, new_z, steiner_count
\ No newline at end of file
+    return new_triangulation, new_triangles, new_x, new_y, new_z, steiner_count
+
+
+def _offcenter_apex_angle(min_fatness):
+    # apex angle of the isosceles triangle on the shortest edge whose fatness is exactly min_fatness
+    # (r/R = 4 sin(A/2) sin(B/2) sin(C/2), rising from 0 to 0.5 as the apex opens to 60 degrees)
+    def fatness(apex):
+        base = (np.pi - apex) / 2
+        return 4 * np.sin(apex / 2) * np.sin(base / 2) ** 2 - min_fatness
+    return brentq(fatness, 1e-9, np.pi / 3)
+
+
+def steiner_candidates(corners, insertion='offcenter', min_fatness=REFINE_MIN_FATNESS):
+    '''
+    insertion point of each triangle, its circumcenter or (Ungor's off-center) the point on the
+    shortest edge's bisector that makes a triangle of fatness min_fatness with that edge when the
+    circumcenter lies farther out - off-centers add fewer points and stay closer to the data
+    arguments: corners - (n, 3, 2) triangle vertex coordinates
+    return: (n, 2) insertion points, (n,) shortest edge lengths
+    '''
+    a, b, c = corners[:, 0], corners[:, 1], corners[:, 2]
+    # circumcenter relative to a
+    ab, ac = b - a, c - a
+    d = 2 * (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+    ab2, ac2 = np.sum(ab ** 2, axis=1), np.sum(ac ** 2, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = a + np.column_stack((ac[:, 1] * ab2 - ab[:, 1] * ac2, ab[:, 0] * ac2 - ac[:, 0] * ab2)) / d[:, None]
+
+    # side i is opposite corner i, as in MeshTopology
+    sides = np.stack((c - b, a - c, b - a), axis=1)
+    lengths = np.linalg.norm(sides, axis=2)
+    shortest = np.argmin(lengths, axis=1)
+    rows = np.arange(len(corners))
+    shortest_length = lengths[rows, shortest]
+    if insertion == 'circumcenter' or min_fatness >= 0.5:
+        return center, shortest_length
+    if insertion != 'offcenter':
+        raise ValueError(f"Unknown insertion mode: {insertion}")
+
+    p = corners[rows, (shortest + 1) % 3]
+    q = corners[rows, (shortest + 2) % 3]
+    midpoint = (p + q) / 2
+    to_center = center - midpoint
+    distance = np.linalg.norm(to_center, axis=1)
+    # apex height of the target triangle above the shortest edge
+    height = shortest_length / 2 / np.tan(_offcenter_apex_angle(min_fatness) / 2)
+    use_offcenter = height < distance
+    points = center.copy()
+    points[use_offcenter] = (midpoint[use_offcenter] + to_center[use_offcenter]
+                             * (height[use_offcenter] / distance[use_offcenter])[:, None])
+    return points, shortest_length
+
+
+def refine_skinny_triangles(x, y, z, triangulation=None, min_fatness=REFINE_MIN_FATNESS, max_points=None,
+                            max_iterations=REFINE_MAX_ITERATIONS, insertion='offcenter', min_edge_length=0.0):
+    '''
+    selective Steiner refinement (Ruppert/Chew style): points are inserted only for triangles whose
+    fatness is below min_fatness, one at a time into an incremental Delaunay mesh, so each insertion
+    only re-triangulates its own cavity and only the new triangles are re-measured
+    arguments: x, y, z - vertices, triangulation - scipy Delaunay of them (built if None),
+               min_fatness - r/R threshold, max_points - Steiner point budget (default REFINE_POINT_BUDGET
+               of the input points), max_iterations - refinement passes over the skinny triangles,
+               insertion - 'offcenter' or 'circumcenter', min_edge_length - triangles whose shortest edge
+               is below this are left alone (stops cascades between near-duplicate GPS fixes)
+    return: same as optimize_with_steiner_points, the triangulation is the IncrementalTriangulation
+    '''
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    if not isinstance(triangulation, Delaunay):
+        triangulation = Delaunay(np.column_stack((x, y)))
+    if max_points is None:
+        max_points = int(REFINE_POINT_BUDGET * len(x))
+
+    # new points are only accepted inside the hull, and take their elevation from the linear
+    # surface of the input mesh (the same surface the edge midpoints lie on)
+    surface = LinearNDInterpolator(triangulation, z)
+    mesh = IncrementalTriangulation(x, y, z)
+
+    fatness = {}
+    def measure(ids):
+        if len(ids):
+            points, triangles = mesh.local_mesh(ids)
+            ratios, _ = calculate_triangle_fatness(points, triangles)
+            fatness.update(zip(ids.tolist(), ratios.tolist()))
+
+    ids = mesh.triangle_ids
+    measure(ids)
+    skinny_before = sum(f < min_fatness for f in fatness.values())
+    print(f"Found {skinny_before} skinny triangles (r/R < {min_fatness}) in {len(ids)} triangles")
+
+    rejected = set()
+    steiner_count = 0
+    iterations = 0
+    while steiner_count < max_points and iterations < max_iterations:
+        skinny = sorted((f, t) for t, f in fatness.items() if f < min_fatness and t not in rejected)
+        if not skinny:
+            break
+        iterations += 1
+        # worst first, triangles destroyed by an earlier insertion of this pass are skipped
+        skinny = np.array([t for _, t in skinny], dtype=np.int64)
+        triangles = mesh.triangles_of(skinny)
+        corners = np.stack((mesh.x[triangles], mesh.y[triangles]), axis=-1)
+        candidates, shortest = steiner_candidates(corners, insertion, min_fatness)
+        candidate_z = surface(candidates)
+        usable = np.isfinite(candidate_z) & (shortest >= min_edge_length)
+        rejected.update(skinny[~usable].tolist())
+
+        touched = set()
+        changed = set()
+        for t, (px, py), pz in zip(skinny[usable].tolist(), candidates[usable], candidate_z[usable]):
+            if steiner_count >= max_points:
+                break
+            if t in touched:
+                continue
+            update = mesh.add_points([px], [py], [pz])
+            if len(update.new_vertices) == 0:
+                rejected.add(t)
+                continue
+            steiner_count += 1
+            for removed in update.removed_triangles.tolist():
+                fatness.pop(removed, None)
+                rejected.discard(removed)
+            touched.update(update.removed_triangles.tolist())
+            touched.update(update.changed_triangles.tolist())
+            changed.difference_update(update.removed_triangles.tolist())
+            changed.update(update.changed_triangles.tolist())
+        # an id can be reused by a new triangle, forget earlier rejections of it
+        rejected.difference_update(changed)
+        measure(np.array(sorted(changed), dtype=np.int64))
+
+    new_triangles = mesh.simplices
+    skinny_after = sum(f < min_fatness for f in fatness.values())
+    print(f"Inserted {steiner_count} Steiner points ({insertion}) in {iterations} passes")
+    print(f"Optimized triangulation: {len(new_triangles)} triangles from {mesh.npoints} points")
+    print(f"Skinny triangles: {skinny_before} -> {skinny_after} "
+          f"({skinny_after - skinny_before:+d}), +{steiner_count} points")
+
+    return mesh, new_triangles, mesh.x, mesh.y, mesh.z, steiner_count
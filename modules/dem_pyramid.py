@@ -0,0 +1,95 @@
+"""
+Multi-resolution DEM pyramid - one fine interpolated raster plus every-other-node subsampled levels,
+so any grid size up to the finest is served from the nearest level without re-interpolating the points
+"""
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+from .interpolation import grid_axes, interpolate_tiled
+
+# coarsest level kept, in nodes per side (2^k + 1 sizes halve down to 3)
+PYRAMID_MIN_SIZE = 3
+# largest grid handed to 3D/preview rendering
+DEM_PREVIEW_SIZE = 129
+# largest finest level, bigger grids are interpolated directly as a tiled raster
+DEM_PYRAMID_MAX_SIZE = 1025
+
+def pyramid_size(grid_size):
+    # smallest 2^k + 1 node count covering grid_size, halving it keeps every other node exactly
+    return 2 ** int(np.ceil(np.log2(max(grid_size - 1, 2)))) + 1
+
+class DEMPyramid:
+    '''
+    level 0 is the finest raster, level i holds every 2^i-th node of it
+    levels are strided views of level 0, so the whole pyramid costs no memory beyond the finest raster
+    '''
+    def __init__(self, xs, ys, zi):
+        self.levels = []
+        step = 1
+        while True:
+            self.levels.append((xs[::step], ys[::step], zi[::step, ::step]))
+            if (len(xs) - 1) // step < 2 * (PYRAMID_MIN_SIZE - 1) or (len(xs) - 1) % (2 * step):
+                break
+            step *= 2
+
+    def __len__(self):
+        return len(self.levels)
+
+    @property
+    def finest_size(self):
+        return len(self.levels[0][0])
+
+    def level_for(self, grid_size):
+        # coarsest level with at least grid_size nodes per side (the finest one if none has)
+        for index in range(len(self.levels) - 1, -1, -1):
+            if len(self.levels[index][0]) >= grid_size:
+                return index
+        return 0
+
+    def preview(self, max_size=DEM_PREVIEW_SIZE):
+        # finest level no larger than max_size, as xi, yi, zi grids, for overviews that need no resampling
+        for xs, ys, zi in self.levels:
+            if len(xs) <= max_size:
+                break
+        xi, yi = np.meshgrid(xs, ys)
+        return xi, yi, zi
+
+    def grid(self, grid_size, mask=None):
+        '''
+        serve a grid_size x grid_size grid over the same extent as create_grid
+        arguments: grid_size - nodes per side, mask - optional (grid_size, grid_size) bool array, cells
+                   outside it are NaN (e.g. a support mask)
+        return: xi, yi, zi, an exact copy of the level when the sizes match, otherwise a bilinear resample
+                of the nearest finer level; NaN level nodes don't spread, a cell is NaN only where its
+                nearest level node is
+        '''
+        xs, ys, zi = self.levels[self.level_for(grid_size)]
+        if len(xs) == grid_size:
+            xi, yi = np.meshgrid(xs, ys)
+            zi = np.array(zi)
+        else:
+            xi, yi = np.meshgrid(np.linspace(xs[0], xs[-1], grid_size), np.linspace(ys[0], ys[-1], grid_size))
+            query = (yi, xi)
+            valid = np.isfinite(zi)
+            # bilinear weights renormalized over the valid corners
+            values = RegularGridInterpolator((ys, xs), np.where(valid, zi, 0.0))(query)
+            weights = RegularGridInterpolator((ys, xs), valid.astype(np.float64))(query)
+            covered = RegularGridInterpolator((ys, xs), valid, method='nearest')(query).astype(bool)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                zi = np.where(covered & (weights > 0), values / weights, np.nan)
+        if mask is not None:
+            zi[~mask] = np.nan
+        return xi, yi, zi
+
+def build_dem_pyramid(interpolators, name, finest_size, method='linear', output=None, **options):
+    '''
+    interpolate the finest level once (tiled, see interpolate_tiled) and derive the coarser levels
+    arguments: interpolators - InterpolatorCache, name - field, finest_size - requested finest nodes per
+               side (rounded up to 2^k + 1), method - interpolation method, output - optional .npy path
+               for a memory-mapped finest raster, options - interpolate_tiled settings (support_distance,
+               parallel, ...) and idw settings
+    return: DEMPyramid
+    '''
+    size = pyramid_size(finest_size)
+    zi = interpolate_tiled(interpolators, name, size, method=method, output=output, **options)
+    xs, ys = grid_axes(interpolators.points[:, 0], interpolators.points[:, 1], size)
+    return DEMPyramid(xs, ys, zi)
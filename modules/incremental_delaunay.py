@@ -0,0 +1,405 @@
+"""
+Incremental Delaunay triangulation for streaming points (Bowyer-Watson insertion)
+
+scipy's Delaunay(incremental=True).add_points rebuilds its simplex/neighbor arrays on every call,
+so each batch costs O(total points). Here every insertion only touches the triangles whose
+circumcircle contains the new point, and triangle ids stay stable between batches so per-triangle
+and per-vertex metrics can be updated for the changed neighbourhood only.
+
+The hull is closed with "ghost" triangles (a, b, INF) on every hull edge, so points outside the
+current hull are inserted the same way as points inside it.
+"""
+from collections import namedtuple
+from fractions import Fraction
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+from .curvature import corner_angles
+
+# the vertex at infinity used by ghost triangles
+INF = -1
+
+# error bounds for the floating point predicate filters (Shewchuk), exact arithmetic below them
+_ORIENT_ERRBOUND = (3.0 + 16.0 * 2.0 ** -53) * 2.0 ** -53
+_INCIRCLE_ERRBOUND = (10.0 + 96.0 * 2.0 ** -53) * 2.0 ** -53
+
+# changed_triangles/removed_triangles are triangle ids, affected_vertices are vertices whose star changed
+MeshUpdate = namedtuple('MeshUpdate', ['new_vertices', 'skipped_vertices', 'changed_triangles',
+                                       'removed_triangles', 'affected_vertices'])
+
+def orient(ax, ay, bx, by, cx, cy):
+    # > 0 if a, b, c turn counter-clockwise, 0 if collinear
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    bound = _ORIENT_ERRBOUND * (abs(detleft) + abs(detright))
+    if det > bound or -det > bound:
+        return det
+    ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+    return float((ax - cx) * (by - cy) - (ay - cy) * (bx - cx))
+
+def incircle(ax, ay, bx, by, cx, cy, dx, dy):
+    # > 0 if d lies strictly inside the circumcircle of the counter-clockwise triangle a, b, c
+    adx, ady = ax - dx, ay - dy
+    bdx, bdy = bx - dx, by - dy
+    cdx, cdy = cx - dx, cy - dy
+    bdxcdy, cdxbdy = bdx * cdy, cdx * bdy
+    cdxady, adxcdy = cdx * ady, adx * cdy
+    adxbdy, bdxady = adx * bdy, bdx * ady
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    if det > _INCIRCLE_ERRBOUND * permanent or -det > _INCIRCLE_ERRBOUND * permanent:
+        return det
+
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (ax, ay, bx, by, cx, cy, dx, dy))
+    adx, ady = ax - dx, ay - dy
+    bdx, bdy = bx - dx, by - dy
+    cdx, cdy = cx - dx, cy - dy
+    return float((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+                 + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+                 + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+
+class IncrementalTriangulation:
+    '''
+    Delaunay mesh of a growing point set with stable triangle ids
+    the initial points are triangulated once with scipy, add_points then inserts batches locally
+    exposes .points and .simplices like scipy's Delaunay so the analytics/curvature code accepts it
+    '''
+    def __init__(self, x=None, y=None, z=None):
+        # python lists: scalar access in the insertion loop is much faster than numpy indexing
+        self._px, self._py, self._pz = [], [], []
+        self._tri = []          # [a, b, c] counter-clockwise, c == INF for ghost triangles
+        self._nbr = []          # [n0, n1, n2], n_i is the triangle across the edge opposite vertex i
+        self._alive = []
+        self._free = []
+        self._vertex_tri = []   # one alive triangle incident to each vertex, -1 if not in the mesh
+        self._last = -1         # walk start, the most recently created triangle
+        self._pending = []      # vertices waiting for a non-collinear triple before the mesh can start
+
+        if x is not None and len(x) > 0:
+            self._initialize(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                             np.asarray(z, dtype=np.float64))
+
+    @property
+    def npoints(self):
+        return len(self._px)
+
+    @property
+    def points(self):
+        return np.column_stack((self._px, self._py))
+
+    @property
+    def x(self):
+        return np.array(self._px)
+
+    @property
+    def y(self):
+        return np.array(self._py)
+
+    @property
+    def z(self):
+        return np.array(self._pz)
+
+    @property
+    def triangle_ids(self):
+        # ids of the alive finite triangles, in id order (the row order of .simplices)
+        tri = np.array(self._tri, dtype=np.int64).reshape(-1, 3)
+        return np.flatnonzero(np.array(self._alive, dtype=bool) & (tri[:, 2] != INF))
+
+    @property
+    def simplices(self):
+        ids = self.triangle_ids
+        return np.array(self._tri, dtype=np.int64).reshape(-1, 3)[ids]
+
+    def triangles_of(self, ids):
+        # vertex indices of the given triangle ids
+        return np.array([self._tri[t] for t in ids], dtype=np.int64).reshape(-1, 3)
+
+    def _initialize(self, x, y, z):
+        start = len(self._px)
+        self._px.extend(x.tolist())
+        self._py.extend(y.tolist())
+        self._pz.extend(z.tolist())
+        self._vertex_tri.extend([-1] * len(x))
+        vertices = list(range(start, start + len(x)))
+        if len(x) < 3:
+            self._pending.extend(vertices)
+            return
+        try:
+            triangulation = Delaunay(np.column_stack((x, y)))
+        except QhullError:
+            # all collinear (or too few distinct points), start once a third direction shows up
+            self._pending.extend(vertices)
+            self._try_start()
+            return
+        self._build(triangulation.simplices + start, triangulation.neighbors)
+
+    def _build(self, simplices, neighbors):
+        # load a triangulation (scipy layout, -1 neighbours on the hull) and close it with ghost triangles
+        simplices = np.array(simplices, dtype=np.int64)
+        neighbors = np.array(neighbors, dtype=np.int64)
+        p = np.column_stack((self._px, self._py))
+        a, b, c = p[simplices[:, 0]], p[simplices[:, 1]], p[simplices[:, 2]]
+        clockwise = ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])) < 0
+        # qhull doesn't promise an orientation, make every triangle counter-clockwise
+        simplices[clockwise] = simplices[clockwise][:, [0, 2, 1]]
+        neighbors[clockwise] = neighbors[clockwise][:, [0, 2, 1]]
+
+        offset = len(self._tri)
+        self._tri.extend(simplices.tolist())
+        self._nbr.extend((neighbors + offset).tolist())
+        self._alive.extend([True] * len(simplices))
+        for corner in range(3):
+            for v, t in zip(simplices[:, corner].tolist(), range(offset, offset + len(simplices))):
+                self._vertex_tri[v] = t
+
+        ghost_by_start, ghost_by_end = {}, {}
+        for t, i in zip(*np.nonzero(neighbors == -1)):
+            t = int(t) + offset
+            u, v = self._tri[t][(i + 1) % 3], self._tri[t][(i + 2) % 3]
+            g = len(self._tri)
+            self._tri.append([v, u, INF])
+            self._nbr.append([-1, -1, t])
+            self._alive.append(True)
+            self._nbr[t][i] = g
+            ghost_by_start[v] = g
+            ghost_by_end[u] = g
+        for g in ghost_by_start.values():
+            u, v, _ = self._tri[g]
+            self._nbr[g][0] = ghost_by_start[v]
+            self._nbr[g][1] = ghost_by_end[u]
+        self._last = offset
+
+    def _try_start(self):
+        # first non-collinear triple of pending vertices becomes the seed triangle
+        pending = self._pending
+        a = pending[0]
+        b = next((v for v in pending if (self._px[v], self._py[v]) != (self._px[a], self._py[a])), None)
+        if b is None:
+            return
+        for c in pending:
+            o = orient(self._px[a], self._py[a], self._px[b], self._py[b], self._px[c], self._py[c])
+            if o != 0:
+                break
+        else:
+            return
+        seed = [a, b, c] if o > 0 else [a, c, b]
+        self._pending = []
+        self._build([seed], [[-1, -1, -1]])
+        for v in pending:
+            if v not in seed:
+                self._insert(v)
+
+    def _in_conflict(self, t, px, py):
+        a, b, c = self._tri[t]
+        if c == INF:
+            # ghost: p beyond the hull edge a-b, or on its line strictly between a and b
+            ax, ay, bx, by = self._px[a], self._py[a], self._px[b], self._py[b]
+            o = orient(ax, ay, bx, by, px, py)
+            if o != 0:
+                return o > 0
+            return (px - ax) * (px - bx) + (py - ay) * (py - by) < 0
+        return incircle(self._px[a], self._py[a], self._px[b], self._py[b],
+                        self._px[c], self._py[c], px, py) > 0
+
+    def _locate(self, px, py):
+        # visibility walk from the last created triangle to a triangle in conflict with p
+        # return: triangle id, or None if p duplicates an existing vertex
+        tri, nbr = self._tri, self._nbr
+        t = self._last
+        if t < 0 or not self._alive[t]:
+            t = self._alive.index(True)
+        if tri[t][2] == INF:
+            t = nbr[t][2]
+
+        for step in range(len(tri) + 3):
+            a, b, c = tri[t]
+            if c == INF:
+                # stepped out through a hull edge that p lies beyond
+                return t
+            for k in range(3):
+                # rotate the first edge tested, a fixed order can cycle in degenerate meshes
+                i = (step + k) % 3
+                u, v = tri[t][(i + 1) % 3], tri[t][(i + 2) % 3]
+                if orient(self._px[u], self._py[u], self._px[v], self._py[v], px, py) < 0:
+                    t = nbr[t][i]
+                    break
+            else:
+                for v in (a, b, c):
+                    if self._px[v] == px and self._py[v] == py:
+                        return None
+                return t
+
+        # the walk should always terminate, scan as a last resort
+        for t in range(len(tri)):
+            if self._alive[t] and self._in_conflict(t, px, py):
+                return t
+        return None
+
+    def _insert(self, q, created=None, killed=None):
+        px, py = self._px[q], self._py[q]
+        seed = self._locate(px, py)
+        if seed is None:
+            return False
+
+        tri, nbr = self._tri, self._nbr
+        cavity = [seed]
+        in_cavity = {seed}
+        boundary = []   # (a, b, outer triangle, slot of the cavity triangle in outer's neighbours)
+        stack = [seed]
+        while stack:
+            t = stack.pop()
+            for i in range(3):
+                n = nbr[t][i]
+                if n in in_cavity:
+                    continue
+                if self._in_conflict(n, px, py):
+                    in_cavity.add(n)
+                    cavity.append(n)
+                    stack.append(n)
+                else:
+                    boundary.append((tri[t][(i + 1) % 3], tri[t][(i + 2) % 3], n, nbr[n].index(t)))
+
+        # the cavity is star-shaped around q: fan q to every boundary edge, reusing the cavity slots
+        if killed is not None:
+            for t in cavity:
+                if tri[t][2] != INF:
+                    killed.add(t)
+        ids = cavity[:]
+        while len(ids) < len(boundary):
+            if self._free:
+                ids.append(self._free.pop())
+            else:
+                ids.append(len(tri))
+                tri.append(None)
+                nbr.append(None)
+                self._alive.append(True)
+        for t in ids[len(boundary):]:
+            self._alive[t] = False
+            self._free.append(t)
+
+        new_ids = ids[:len(boundary)]
+        by_start = {a: t for (a, _, _, _), t in zip(boundary, new_ids)}
+        by_end = {b: t for (_, b, _, _), t in zip(boundary, new_ids)}
+        for (a, b, outer, slot), t in zip(boundary, new_ids):
+            vertices = [a, b, q]
+            neighbours = [by_start[b], by_end[a], outer]
+            # keep INF in the last position of ghost triangles
+            if a == INF:
+                vertices, neighbours = vertices[1:] + vertices[:1], neighbours[1:] + neighbours[:1]
+            elif b == INF:
+                vertices, neighbours = vertices[2:] + vertices[:2], neighbours[2:] + neighbours[:2]
+            tri[t] = vertices
+            nbr[t] = neighbours
+            self._alive[t] = True
+            nbr[outer][slot] = t
+            for v in vertices:
+                if v != INF:
+                    self._vertex_tri[v] = t
+            if created is not None:
+                created.add(t)
+        self._last = new_ids[0]
+        return True
+
+    def add_points(self, x, y, z):
+        '''
+        insert a batch of points
+        arguments: x, y, z arrays of the new points
+        return: MeshUpdate - new/skipped (duplicate) vertex ids, ids of created finite triangles, ids of
+                finite triangles that no longer exist, and vertices whose triangle fan changed
+        '''
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        start = len(self._px)
+        if not self._tri:
+            # no mesh yet: the whole current point set goes in as the first update
+            if self._pending:
+                self._px.extend(x.tolist())
+                self._py.extend(y.tolist())
+                self._pz.extend(z.tolist())
+                self._vertex_tri.extend([-1] * len(x))
+                self._pending.extend(range(start, len(self._px)))
+                self._try_start()
+            else:
+                self._initialize(x, y, z)
+            ids = self.triangle_ids
+            inserted = [v for v in range(len(self._px)) if self._vertex_tri[v] >= 0]
+            skipped = [v for v in range(start, len(self._px)) if self._vertex_tri[v] < 0 and v not in self._pending]
+            return MeshUpdate(np.array(inserted, dtype=np.int64), np.array(skipped, dtype=np.int64), ids,
+                              np.empty(0, dtype=np.int64), np.array(inserted, dtype=np.int64))
+
+        self._px.extend(x.tolist())
+        self._py.extend(y.tolist())
+        self._pz.extend(z.tolist())
+        self._vertex_tri.extend([-1] * len(x))
+
+        created, killed = set(), set()
+        inserted, skipped = [], []
+        for q in range(start, len(self._px)):
+            (inserted if self._insert(q, created, killed) else skipped).append(q)
+
+        changed = sorted(t for t in created if self._alive[t] and self._tri[t][2] != INF)
+        removed = sorted(killed - set(changed))
+        affected = sorted({v for t in changed for v in self._tri[t]})
+        return MeshUpdate(np.array(inserted, dtype=np.int64), np.array(skipped, dtype=np.int64),
+                          np.array(changed, dtype=np.int64), np.array(removed, dtype=np.int64),
+                          np.array(affected, dtype=np.int64))
+
+    def vertex_star(self, v):
+        # triangle ids around vertex v (ghosts included, so a hull vertex has one in its star)
+        start = self._vertex_tri[v]
+        if start < 0:
+            return []
+        star = []
+        t = start
+        while True:
+            star.append(t)
+            i = self._tri[t].index(v)
+            t = self._nbr[t][(i + 2) % 3]
+            if t == start:
+                return star
+
+    def is_boundary_vertex(self, v):
+        return any(self._tri[t][2] == INF for t in self.vertex_star(v))
+
+    def vertex_coordinates(self, vertices, with_z=False):
+        if with_z:
+            return np.array([(self._px[v], self._py[v], self._pz[v]) for v in vertices], dtype=np.float64)
+        return np.array([(self._px[v], self._py[v]) for v in vertices], dtype=np.float64).reshape(-1, 2)
+
+    def local_mesh(self, ids, with_z=False):
+        # compact (points, triangles) holding only the given triangles, for metrics on a neighbourhood
+        triangles = self.triangles_of(ids)
+        vertices, local = np.unique(triangles, return_inverse=True)
+        return self.vertex_coordinates(vertices, with_z), local.reshape(-1, 3)
+
+    def vertex_curvatures(self, vertices):
+        '''
+        angle deficit |2pi - sum of incident angles| on the 3D surface, 0 for hull vertices
+        (same definition as curvature.compute_curvature), touching only the stars of the given vertices
+        arguments: vertex ids
+        return: curvature array aligned with vertices
+        '''
+        curvatures = np.zeros(len(vertices), dtype=np.float64)
+        star_triangles, owners, corners = [], [], []
+        for k, v in enumerate(vertices):
+            star = self.vertex_star(v)
+            if not star or any(self._tri[t][2] == INF for t in star):
+                continue
+            for t in star:
+                star_triangles.append(t)
+                owners.append(k)
+                corners.append(self._tri[t].index(v))
+        if not star_triangles:
+            return curvatures
+
+        points, triangles = self.local_mesh(star_triangles, with_z=True)
+        angles = corner_angles(points, triangles)[np.arange(len(star_triangles)), corners]
+        angle_sums = np.bincount(owners, weights=angles, minlength=len(vertices))
+        interior = np.bincount(owners, minlength=len(vertices)) > 0
+        curvatures[interior] = np.abs(2 * np.pi - angle_sums[interior])
+        return curvatures
@@ -1,18 +1,470 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-from scipy.interpolate import griddata
+from scipy.ndimage import distance_transform_edt
+from scipy.interpolate import griddata, LinearNDInterpolator, CloughTocher2DInterpolator
+from scipy.optimize import curve_fit
+from scipy.spatial import Delaunay, cKDTree
+from scipy.spatial.distance import pdist
+
+INTERPOLATION_METHODS = ('linear', 'cubic', 'nearest', 'idw', 'kriging')
+# inverse distance weighting defaults: neighbours per node, weight power, grid nodes per KD-tree query batch
+IDW_NEIGHBOURS = 8
+IDW_POWER = 2.0
+IDW_BATCH_SIZE = 1 << 16
+# local kriging defaults: neighbours per node, points used to fit the variogram, nodes per batched solve
+KRIGING_NEIGHBOURS = 16
+KRIGING_SAMPLE_SIZE = 2000
+KRIGING_BATCH_SIZE = 2048
+# tiled interpolation: tile edge in grid nodes, and the smallest grid worth a process pool
+TILE_SIZE = 512
+PARALLEL_MIN_NODES = 1 << 20
 
 def create_grid(x, y, grid_size):
-    xi = np.linspace(min(x), max(x), grid_size)
-    yi = np.linspace(min(y), max(y), grid_size)
+    xi = np.linspace(np.min(x), np.max(x), grid_size)
+    yi = np.linspace(np.min(y), np.max(y), grid_size)
     xi, yi = np.meshgrid(xi, yi)
     return xi, yi
 
 def interpolate_elevation(x, y, z, xi, yi, method='linear'):
-    x = np.array(x, dtype=float)
-    y = np.array(y, dtype=float)
-    z = np.array(z, dtype=float)
+    # asarray avoids copying float64 inputs (e.g. memory-mapped point store columns)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+    if method == 'idw':
+        return interpolate_idw(x, y, z, xi, yi)
     zi = griddata((x, y), z, (xi, yi), method=method) 
     # nearest: Assigns the value of the nearest known data point
     # Cubic: Performs cubic interpolation over a triangle mesh
     # linear: Interpolates within triangles formed by your data points
-    return zi
\ No newline at end of file
+    return zi
+
+def support_mask(tree, query, max_distance, batch_size=IDW_BATCH_SIZE, workers=-1):
+    '''
+    data-support mask: which query points lie within max_distance of a sample
+    arguments: tree - cKDTree of the samples, query - (n, 2) points, max_distance - metres
+    return: (n,) bool array
+    '''
+    inside = np.empty(len(query), dtype=bool)
+    for start in range(0, len(query), batch_size):
+        batch = query[start:start + batch_size]
+        # k=1 with an upper bound, misses come back as inf
+        distances, _ = tree.query(batch, k=1, distance_upper_bound=max_distance, workers=workers)
+        inside[start:start + len(batch)] = np.isfinite(distances)
+    return inside
+
+def grid_support_mask(tree, xs, ys, max_distance):
+    '''
+    support_mask for a regular grid given by its axes (create_grid / grid_axes nodes)
+    a distance transform over the sample-occupied nodes rules out the far cells cheaply, only the
+    band near the threshold gets an exact KD-tree check
+    return: (len(ys), len(xs)) bool array, True where a sample lies within max_distance
+    '''
+    dx = (xs[-1] - xs[0]) / max(len(xs) - 1, 1) or 1.0
+    dy = (ys[-1] - ys[0]) / max(len(ys) - 1, 1) or 1.0
+    # snap every sample to its nearest node
+    cols = np.clip(np.rint((tree.data[:, 0] - xs[0]) / dx).astype(np.int64), 0, len(xs) - 1)
+    rows = np.clip(np.rint((tree.data[:, 1] - ys[0]) / dy).astype(np.int64), 0, len(ys) - 1)
+    empty = np.ones((len(ys), len(xs)), dtype=bool)
+    empty[rows, cols] = False
+
+    # node to nearest occupied node distance is off by at most half a cell diagonal from the true one
+    node_distance = distance_transform_edt(empty, sampling=(dy, dx))
+    slack = 0.5 * np.hypot(dx, dy)
+    mask = node_distance <= max_distance - slack
+    band = ~mask & (node_distance <= max_distance + slack)
+    if band.any():
+        band_rows, band_cols = np.nonzero(band)
+        mask[band_rows, band_cols] = support_mask(tree, np.column_stack((xs[band_cols], ys[band_rows])),
+                                                  max_distance)
+    return mask
+
+def evaluate_masked(interpolator, query, mask=None):
+    # evaluate only the query points inside the support mask, the rest are NaN
+    if mask is None:
+        return interpolator(query)
+    mask = np.asarray(mask).ravel()
+    result = np.full(len(query), np.nan)
+    if mask.any():
+        result[mask] = interpolator(query[mask])
+    return result
+
+class _NearestValues:
+    # nearest-vertex lookup over a shared KD-tree, a class rather than a closure so it can be pickled
+    def __init__(self, tree, values):
+        self.tree = tree
+        self.values = values
+
+    def __call__(self, query):
+        return self.values[self.tree.query(query)[1]]
+
+class _IDWValues:
+    '''
+    inverse distance weighting over the k nearest points of a KD-tree, no triangulation needed
+    radius: only points closer than this count (None = unlimited), nodes with none in range get NaN
+    a node that coincides with data points takes their mean value
+    '''
+    def __init__(self, tree, values, k=IDW_NEIGHBOURS, radius=None, power=IDW_POWER,
+                 batch_size=IDW_BATCH_SIZE, workers=-1):
+        self.tree = tree
+        self.values = values
+        self.k = min(k, tree.n)
+        self.radius = np.inf if radius is None else radius
+        self.power = power
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def __call__(self, query):
+        result = np.empty(len(query), dtype=np.float64)
+        # batches bound the (batch, k) distance/index arrays, the KD-tree queries run on worker threads
+        for start in range(0, len(query), self.batch_size):
+            batch = query[start:start + self.batch_size]
+            distances, indices = self.tree.query(batch, k=self.k, distance_upper_bound=self.radius,
+                                                 workers=self.workers)
+            distances = distances.reshape(len(batch), -1)
+            indices = indices.reshape(len(batch), -1)
+
+            # missing neighbours come back as inf distance and index n
+            found = np.isfinite(distances)
+            neighbour_values = self.values[np.where(found, indices, 0)]
+            with np.errstate(divide='ignore'):
+                weights = np.where(found, 1.0 / distances ** self.power, 0.0)
+            exact = distances == 0
+            has_exact = exact.any(axis=1)
+            weights[has_exact] = exact[has_exact]
+
+            total = weights.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[start:start + len(batch)] = (weights * neighbour_values).sum(axis=1) / total
+        return result
+
+def interpolate_idw(x, y, z, xi, yi, k=IDW_NEIGHBOURS, radius=None, power=IDW_POWER,
+                    batch_size=IDW_BATCH_SIZE, workers=-1):
+    '''
+    inverse distance weighted interpolation with a KD-tree
+    arguments: scattered x, y, z, grid xi, yi (as from create_grid), k - neighbours per node,
+               radius - search radius in metres (None = unlimited), power - distance weight exponent,
+               batch_size - grid nodes per query batch, workers - query threads (-1 = all CPUs)
+    return: interpolated grid, NaN where no point lies within radius
+    '''
+    tree = cKDTree(np.column_stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float))))
+    idw = _IDWValues(tree, np.asarray(z, dtype=float), k=k, radius=radius, power=power,
+                     batch_size=batch_size, workers=workers)
+    xi = np.asarray(xi, dtype=float)
+    return idw(np.column_stack((xi.ravel(), np.asarray(yi, dtype=float).ravel()))).reshape(xi.shape)
+
+VARIOGRAM_MODELS = ('spherical', 'exponential', 'gaussian')
+
+class Variogram:
+    '''
+    semivariance model gamma(h) = nugget + sill * shape(h / range), with gamma(0) = 0
+    '''
+    def __init__(self, model='spherical', nugget=0.0, sill=1.0, range_=1.0):
+        if model not in VARIOGRAM_MODELS:
+            raise ValueError(f"Unknown variogram model: {model} (expected one of {', '.join(VARIOGRAM_MODELS)})")
+        self.model = model
+        self.nugget = nugget
+        self.sill = sill
+        self.range = range_
+
+    @staticmethod
+    def shape(model, h, nugget, sill, range_):
+        # the model curve for h > 0, also what curve_fit fits
+        r = h / range_
+        if model == 'spherical':
+            return nugget + sill * np.where(r < 1, 1.5 * r - 0.5 * r ** 3, 1.0)
+        if model == 'exponential':
+            return nugget + sill * (1 - np.exp(-3 * r))
+        return nugget + sill * (1 - np.exp(-3 * r ** 2))
+
+    def __call__(self, h):
+        return np.where(h > 0, self.shape(self.model, h, self.nugget, self.sill, self.range), 0.0)
+
+    def __repr__(self):
+        return (f"Variogram({self.model}, nugget={self.nugget:.4g}, sill={self.sill:.4g}, "
+                f"range={self.range:.4g} m)")
+
+def fit_variogram(x, y, z, model='spherical', sample_size=KRIGING_SAMPLE_SIZE, n_lags=20, seed=0):
+    '''
+    fit a variogram model to the empirical semivariogram of a random subsample
+    arguments: sample arrays, model - one of VARIOGRAM_MODELS, sample_size - points used (pairs grow
+               quadratically), n_lags - distance bins up to half the largest pair distance
+    return: Variogram
+    '''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+    if len(x) > sample_size:
+        sample = np.random.default_rng(seed).choice(len(x), sample_size, replace=False)
+        x, y, z = x[sample], y[sample], z[sample]
+
+    points = np.column_stack((x, y))
+    distances = pdist(points)
+    semivariance = 0.5 * pdist(z[:, None], 'sqeuclidean')
+    max_lag = 0.5 * distances.max() if len(distances) else 0.0
+    if max_lag == 0:
+        return Variogram(model, 0.0, max(np.var(z), 1e-12), 1.0)
+
+    edges = np.linspace(0, max_lag, n_lags + 1)
+    lag = np.digitize(distances, edges) - 1
+    used = lag < n_lags
+    counts = np.bincount(lag[used], minlength=n_lags)
+    filled = counts > 0
+    lag_distance = (np.bincount(lag[used], weights=distances[used], minlength=n_lags)[filled] / counts[filled])
+    lag_gamma = (np.bincount(lag[used], weights=semivariance[used], minlength=n_lags)[filled] / counts[filled])
+
+    initial = (max(lag_gamma.min(), 0.0), max(lag_gamma.max() - lag_gamma.min(), 1e-12), max_lag / 2)
+    try:
+        # bins with more pairs are trusted more
+        (nugget, sill, range_), _ = curve_fit(
+            lambda h, n, s, r: Variogram.shape(model, h, n, s, r), lag_distance, lag_gamma, p0=initial,
+            sigma=1 / np.sqrt(counts[filled]), bounds=([0, 0, 1e-9], [np.inf, np.inf, 10 * max_lag]))
+    except (RuntimeError, ValueError):
+        nugget, sill, range_ = initial
+    return Variogram(model, float(nugget), float(sill), float(range_))
+
+class _KrigingValues:
+    '''
+    ordinary kriging over the k nearest samples of each query point, solved as one batch of small
+    (k+1)x(k+1) systems at a time
+    calling it gives the estimates (like the other interpolators), predict() also gives the variance
+    '''
+    def __init__(self, tree, values, variogram, k=KRIGING_NEIGHBOURS, batch_size=KRIGING_BATCH_SIZE, workers=-1):
+        self.tree = tree
+        self.values = values
+        self.variogram = variogram
+        self.k = min(k, tree.n)
+        self.batch_size = batch_size
+        self.workers = workers
+        # coincident samples would make two rows identical, a tiny nugget keeps the systems solvable
+        self.min_nugget = 1e-10 * max(variogram.nugget + variogram.sill, 1e-12)
+
+    def _solve_batch(self, batch):
+        distances, indices = self.tree.query(batch, k=self.k, workers=self.workers)
+        distances = distances.reshape(len(batch), -1)
+        indices = indices.reshape(len(batch), -1)
+        k = indices.shape[1]
+        neighbours = self.tree.data[indices]
+
+        # [gamma(d_ij) 1; 1 0] [w; mu] = [gamma(d_i0); 1]
+        pair_distances = np.linalg.norm(neighbours[:, :, None, :] - neighbours[:, None, :, :], axis=-1)
+        gamma = np.where(pair_distances > 0, self.variogram.shape(
+            self.variogram.model, pair_distances, self.variogram.nugget, self.variogram.sill,
+            self.variogram.range), 0.0)
+        off_diagonal = ~np.eye(k, dtype=bool)
+        gamma[:, off_diagonal] = np.maximum(gamma[:, off_diagonal], self.min_nugget)
+        system = np.ones((len(batch), k + 1, k + 1))
+        system[:, :k, :k] = gamma
+        system[:, k, k] = 0.0
+        rhs = np.ones((len(batch), k + 1))
+        rhs[:, :k] = self.variogram(distances)
+        try:
+            solution = np.linalg.solve(system, rhs[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            solution = np.einsum('bij,bj->bi', np.linalg.pinv(system), rhs)
+
+        weights = solution[:, :k]
+        estimate = np.einsum('bk,bk->b', weights, self.values[indices])
+        variance = np.maximum(np.einsum('bi,bi->b', solution, rhs), 0.0)
+        return estimate, variance
+
+    def predict(self, query):
+        # return: estimates and kriging variances at the query points
+        estimate = np.empty(len(query))
+        variance = np.empty(len(query))
+        for start in range(0, len(query), self.batch_size):
+            stop = start + self.batch_size
+            estimate[start:stop], variance[start:stop] = self._solve_batch(query[start:stop])
+        return estimate, variance
+
+    def __call__(self, query):
+        return self.predict(query)[0]
+
+class InterpolatorCache:
+    '''
+    linear, Clough-Tocher cubic, nearest, IDW and local kriging interpolators over one point set, built once
+    and reused for any per-vertex field (elevation, curvature, ...) and any grid
+    triangulation: an existing scipy Delaunay of the same points, otherwise one is built on first use
+    (nearest, idw and kriging only need the KD-tree and never triangulate)
+    results match interpolate_elevation (griddata) for the same points and values
+    '''
+    def __init__(self, x, y, triangulation=None):
+        self.points = np.column_stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)))
+        if isinstance(triangulation, Delaunay) and len(triangulation.points) == len(self.points):
+            self._triangulation = triangulation
+        else:
+            self._triangulation = None
+        self._tree = None
+        self.fields = {}
+        # (field, method, options) -> interpolator, the cubic one holds the field's estimated gradients
+        self._interpolators = {}
+        # (field, model) -> fitted Variogram, shared by every kriging neighbourhood size
+        self._variograms = {}
+
+    @property
+    def triangulation(self):
+        if self._triangulation is None:
+            self._triangulation = Delaunay(self.points)
+        return self._triangulation
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = cKDTree(self.points)
+        return self._tree
+
+    def add_field(self, name, values):
+        # (re)register a per-vertex field, drops interpolators built for its previous values
+        values = np.asarray(values, dtype=float)
+        if len(values) != len(self.points):
+            raise ValueError(f"Field {name} has {len(values)} values for {len(self.points)} points")
+        self.fields[name] = values
+        self._interpolators = {key: interpolator for key, interpolator in self._interpolators.items()
+                               if key[0] != name}
+        self._variograms = {key: variogram for key, variogram in self._variograms.items() if key[0] != name}
+
+    def variogram(self, name, model='spherical'):
+        # variogram of a field, fitted once on a subsample
+        if (name, model) not in self._variograms:
+            self._variograms[(name, model)] = fit_variogram(self.points[:, 0], self.points[:, 1],
+                                                            self.fields[name], model=model)
+        return self._variograms[(name, model)]
+
+    def interpolator(self, name, method='linear', **options):
+        # options: idw settings (k, radius, power, batch_size, workers) or kriging settings
+        # (model, k, batch_size, workers)
+        key = (name, method, tuple(sorted(options.items())))
+        if key not in self._interpolators:
+            values = self.fields[name]
+            if method == 'linear':
+                self._interpolators[key] = LinearNDInterpolator(self.triangulation, values)
+            elif method == 'cubic':
+                self._interpolators[key] = CloughTocher2DInterpolator(self.triangulation, values)
+            elif method == 'nearest':
+                self._interpolators[key] = _NearestValues(self.tree, values)
+            elif method == 'idw':
+                self._interpolators[key] = _IDWValues(self.tree, values, **options)
+            elif method == 'kriging':
+                options = dict(options)
+                variogram = self.variogram(name, options.pop('model', 'spherical'))
+                self._interpolators[key] = _KrigingValues(self.tree, values, variogram, **options)
+            else:
+                raise ValueError(f"Unknown interpolation method: {method} "
+                                 f"(expected one of {', '.join(INTERPOLATION_METHODS)})")
+        return self._interpolators[key]
+
+    def interpolate(self, name, xi, yi, method='linear', mask=None, **options):
+        # evaluate a registered field on a grid (any shape, xi/yi as from create_grid)
+        # mask: bool array shaped like xi, only True cells are evaluated, the rest are NaN
+        xi = np.asarray(xi, dtype=float)
+        query = np.column_stack((xi.ravel(), np.asarray(yi, dtype=float).ravel()))
+        return evaluate_masked(self.interpolator(name, method, **options), query, mask).reshape(xi.shape)
+
+def grid_axes(x, y, grid_size):
+    # 1D node coordinates of create_grid's meshgrid, tiles index into these so their values match exactly
+    return np.linspace(np.min(x), np.max(x), grid_size), np.linspace(np.min(y), np.max(y), grid_size)
+
+def grid_tiles(grid_size, tile_size=TILE_SIZE):
+    # (row slice, column slice) of every tile, row-major
+    return [(slice(r, min(r + tile_size, grid_size)), slice(c, min(c + tile_size, grid_size)))
+            for r in range(0, grid_size, tile_size) for c in range(0, grid_size, tile_size)]
+
+# worker-side interpolator, sent once per process by the pool initializer instead of once per tile
+_tile_interpolator = None
+
+def _init_tile_worker(interpolator):
+    global _tile_interpolator
+    _tile_interpolator = interpolator
+
+def _evaluate_tile(xs, ys, mask=None):
+    xi, yi = np.meshgrid(xs, ys)
+    query = np.column_stack((xi.ravel(), yi.ravel()))
+    return evaluate_masked(_tile_interpolator, query, mask).reshape(xi.shape)
+
+def interpolate_tiled(interpolators, name, grid_size, method='linear', output=None, tile_size=TILE_SIZE,
+                      parallel=None, max_workers=None, support_distance=None, **options):
+    '''
+    evaluate a field of an InterpolatorCache on a grid_size x grid_size grid tile by tile
+    arguments: interpolators - InterpolatorCache, name - registered field, method - interpolation method,
+               output - .npy path for a memory-mapped raster (None = in-memory array),
+               tile_size - tile edge in nodes, parallel - True/False or None to decide from the grid size,
+               support_distance - only cells within this many metres of a sample are evaluated (the rest
+               are NaN, None = all), options - idw settings
+    return: (grid_size, grid_size) array, bit-identical to interpolators.interpolate on create_grid's grid
+    '''
+    interpolator = interpolators.interpolator(name, method, **options)
+    xs, ys = grid_axes(interpolators.points[:, 0], interpolators.points[:, 1], grid_size)
+    if output is None:
+        zi = np.empty((grid_size, grid_size), dtype=np.float64)
+    else:
+        zi = np.lib.format.open_memmap(output, mode='w+', dtype=np.float64, shape=(grid_size, grid_size))
+    tiles = grid_tiles(grid_size, tile_size)
+    mask = None if support_distance is None else grid_support_mask(interpolators.tree, xs, ys, support_distance)
+
+    def tile_mask(rows, cols):
+        return None if mask is None else mask[rows, cols]
+
+    if parallel is None:
+        parallel = grid_size * grid_size >= PARALLEL_MIN_NODES and len(tiles) > 1
+    if parallel:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_tile_worker,
+                                 initargs=(interpolator,)) as executor:
+            futures = {executor.submit(_evaluate_tile, xs[cols], ys[rows], tile_mask(rows, cols)): (rows, cols)
+                       for rows, cols in tiles}
+            # finished tiles go straight into the raster, only a few tiles are ever held in memory
+            for future in as_completed(futures):
+                rows, cols = futures.pop(future)
+                zi[rows, cols] = future.result()
+    else:
+        _init_tile_worker(interpolator)
+        for rows, cols in tiles:
+            zi[rows, cols] = _evaluate_tile(xs[cols], ys[rows], tile_mask(rows, cols))
+
+    if output is not None:
+        zi.flush()
+    return zi
+
+# worker-side kriging interpolator, sent once per process like the tile interpolator
+_kriging_interpolator = None
+
+def _init_kriging_worker(kriging):
+    global _kriging_interpolator
+    _kriging_interpolator = kriging
+
+def _predict_chunk(query):
+    return _kriging_interpolator.predict(query)
+
+def interpolate_kriging(interpolators, name, xi, yi, mask=None, parallel=None, max_workers=None, **options):
+    '''
+    local ordinary kriging of a field on a grid, with its kriging variance
+    arguments: interpolators - InterpolatorCache, name - registered field, xi, yi - grid (as from create_grid),
+               mask - optional support mask shaped like xi, parallel - True/False or None to decide from
+               the number of nodes, options - kriging settings (model, k, batch_size)
+    return: estimate grid, variance grid (NaN outside the mask)
+    '''
+    kriging = interpolators.interpolator(name, 'kriging', **options)
+    xi = np.asarray(xi, dtype=float)
+    query = np.column_stack((xi.ravel(), np.asarray(yi, dtype=float).ravel()))
+    inside = np.ones(len(query), dtype=bool) if mask is None else np.asarray(mask).ravel()
+    query = query[inside]
+
+    estimate = np.full(inside.shape, np.nan)
+    variance = np.full(inside.shape, np.nan)
+    if parallel is None:
+        parallel = len(query) >= PARALLEL_MIN_NODES // 16
+    chunk_size = 4 * kriging.batch_size
+    chunks = [slice(start, start + chunk_size) for start in range(0, len(query), chunk_size)]
+    values = np.empty(len(query))
+    variances = np.empty(len(query))
+    if parallel and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_kriging_worker,
+                                 initargs=(kriging,)) as executor:
+            futures = {executor.submit(_predict_chunk, query[chunk]): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures.pop(future)
+                values[chunk], variances[chunk] = future.result()
+    else:
+        values, variances = kriging.predict(query)
+    estimate[inside] = values
+    variance[inside] = variances
+    return estimate.reshape(xi.shape), variance.reshape(xi.shape)
@@ -0,0 +1,276 @@
+"""
+Live GPS ingestion - asyncio acquisition from pluggable sources into a bounded ring buffer,
+with batched CSV flushes and non-blocking point batch subscriptions for downstream stages
+
+Run from the project root:
+    python -m modules.live_ingest --device COM6 --baud 9600
+    python -m modules.live_ingest --replay Data/Track1_24_4_2025.gpx --rate 25
+"""
+import argparse
+import asyncio
+import csv
+import os
+import time
+from datetime import datetime
+import numpy as np
+from .data_processing import load_track_data
+
+# one acquired sample, batches handed to subscribers are arrays of this dtype
+SAMPLE_DTYPE = np.dtype([('sample_id', np.int64), ('timestamp', np.float64), ('latitude', np.float64),
+                         ('longitude', np.float64), ('altitude', np.float64)])
+CSV_HEADER = ['sample id', 'timestamp', 'latitude', 'longitude', 'altitude']
+
+class RingBuffer:
+    '''
+    fixed capacity sample buffer, when full the oldest sample is overwritten so acquisition never waits
+    '''
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, sample_id, timestamp, lat, lon, alt):
+        if self.size == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+            self.size -= 1
+            self.dropped += 1
+        self.data[(self.start + self.size) % self.capacity] = (sample_id, timestamp, lat, lon, alt)
+        self.size += 1
+
+    def drain(self):
+        # return: every buffered sample in arrival order (a copy), the buffer is left empty
+        indices = (self.start + np.arange(self.size)) % self.capacity
+        batch = self.data[indices]
+        self.start = (self.start + self.size) % self.capacity
+        self.size = 0
+        return batch
+
+class MavlinkSource:
+    '''
+    GPS_RAW_INT messages from a Pixhawk over serial/USB (or any pymavlink connection string)
+    blocking pymavlink calls run in worker threads so the event loop stays free
+    '''
+    def __init__(self, device='COM6', baud=9600, message_type='GPS_RAW_INT', timeout=1.0):
+        self.device = device
+        self.baud = baud
+        self.message_type = message_type
+        self.timeout = timeout
+
+    async def samples(self):
+        try:
+            from pymavlink import mavutil
+        except ImportError:
+            raise ImportError("MavlinkSource needs pymavlink (pip install pymavlink)")
+
+        connection = await asyncio.to_thread(mavutil.mavlink_connection, self.device, baud=self.baud)
+        await asyncio.to_thread(connection.wait_heartbeat)
+        print("Connected to Pixhawk")
+        try:
+            while True:
+                msg = await asyncio.to_thread(connection.recv_match, type=self.message_type,
+                                              blocking=True, timeout=self.timeout)
+                if msg is None:
+                    continue
+                # lat/lon come in 1e-7 degrees, altitude in mm
+                yield time.time(), msg.lat / 1e7, msg.lon / 1e7, msg.alt / 1000.0
+        finally:
+            connection.close()
+
+class FileReplaySource:
+    '''
+    plays back a recorded track (.gpx, .kml or a .csv log written by this service) at a fixed rate
+    rate_hz=None replays as fast as possible, loop=True starts over at the end of the file
+    '''
+    def __init__(self, filename, rate_hz=2.0, loop=False):
+        self.filename = filename
+        self.rate_hz = rate_hz
+        self.loop = loop
+
+    def load(self):
+        if self.filename.lower().endswith('.csv'):
+            with open(self.filename, newline='') as f:
+                rows = [(float(row['latitude']), float(row['longitude']), float(row['altitude']))
+                        for row in csv.DictReader(f)]
+            rows = np.array(rows, dtype=np.float64).reshape(-1, 3)
+            return rows[:, 0], rows[:, 1], rows[:, 2]
+        return load_track_data(self.filename)
+
+    async def samples(self):
+        lats, lons, alts = self.load()
+        event_loop = asyncio.get_running_loop()
+        period = 1.0 / self.rate_hz if self.rate_hz else 0.0
+        next_time = event_loop.time()
+        while True:
+            for i in range(len(lats)):
+                if period:
+                    # schedule against absolute times so the replay rate doesn't drift
+                    next_time += period
+                    delay = next_time - event_loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif i % 256 == 0:
+                    # flat-out replay still has to let the flusher and subscribers run
+                    await asyncio.sleep(0)
+                yield time.time(), float(lats[i]), float(lons[i]), float(alts[i])
+            if not self.loop:
+                break
+
+class LiveIngestService:
+    '''
+    reads samples from a source into a ring buffer, flushes batches to a CSV log every flush_interval
+    seconds (or flush_size samples, acquisition hands such a batch over before reading on) and publishes
+    each batch to every subscriber queue
+    a subscriber that falls behind loses its oldest batch instead of stalling acquisition
+    '''
+    def __init__(self, source, output_csv=None, buffer_capacity=4096, flush_interval=0.5, flush_size=256,
+                 subscriber_queue_size=64):
+        self.source = source
+        self.output_csv = output_csv
+        self.buffer = RingBuffer(buffer_capacity)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.subscriber_queue_size = subscriber_queue_size
+        self.subscribers = []
+
+        self.samples_received = 0
+        self.batches_flushed = 0
+        self.dropped_batches = 0
+        self._flush_event = None
+        self._drained = None
+        self._done = False
+        self._csvfile = None
+        self._writer = None
+
+    def subscribe(self):
+        '''
+        return: asyncio.Queue receiving SAMPLE_DTYPE batches, None marks the end of the stream
+        '''
+        queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self.subscribers.append(queue)
+        return queue
+
+    def _publish(self, batch):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_batches += 1
+            queue.put_nowait(batch)
+
+    def _write_rows(self, batch):
+        for sample in batch:
+            self._writer.writerow([int(sample['sample_id']),
+                                   datetime.fromtimestamp(sample['timestamp']).isoformat(),
+                                   sample['latitude'], sample['longitude'], sample['altitude']])
+        self._csvfile.flush()
+
+    async def flush(self):
+        batch = self.buffer.drain()
+        if self._drained is not None:
+            self._drained.set()
+        if len(batch) == 0:
+            return
+        if self._writer is not None:
+            # disk writes run off the event loop
+            await asyncio.to_thread(self._write_rows, batch)
+        self.batches_flushed += 1
+        self._publish(batch)
+
+    async def _acquire(self, max_samples):
+        async for timestamp, lat, lon, alt in self.source.samples():
+            self.samples_received += 1
+            self.buffer.push(self.samples_received, timestamp, lat, lon, alt)
+            if len(self.buffer) >= self.flush_size:
+                # hand the batch over and wait until the flusher has taken it, a flat-out source never
+                # yields on its own and would keep filling the same batch
+                self._drained.clear()
+                self._flush_event.set()
+                await self._drained.wait()
+            if max_samples is not None and self.samples_received >= max_samples:
+                break
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+            if self._done and len(self.buffer) == 0:
+                break
+
+    async def run(self, duration=None, max_samples=None):
+        '''
+        acquire until the source ends, duration seconds pass or max_samples arrive
+        return: number of samples received
+        '''
+        self._flush_event = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._done = False
+        if self.output_csv is not None:
+            self._csvfile = open(self.output_csv, 'w', newline='')
+            self._writer = csv.writer(self._csvfile)
+            self._writer.writerow(CSV_HEADER)
+
+        flush_task = asyncio.create_task(self._flush_loop())
+        try:
+            await asyncio.wait_for(self._acquire(max_samples), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # drain what is left, then tell subscribers the stream is over
+            self._done = True
+            self._flush_event.set()
+            await flush_task
+            self._publish(None)
+            if self._csvfile is not None:
+                self._csvfile.close()
+                self._csvfile = self._writer = None
+        return self.samples_received
+
+async def print_batches(queue):
+    # simple subscriber: one summary line per batch
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            break
+        last = batch[-1]
+        print(f"Batch of {len(batch)} samples, last ID: {last['sample_id']}, Lat: {last['latitude']:.7f}, "
+              f"Lon: {last['longitude']:.7f}, Alt: {last['altitude']:.2f}")
+
+async def run_live_ingest(source, output_csv, duration=None):
+    service = LiveIngestService(source, output_csv=output_csv)
+    printer = asyncio.create_task(print_batches(service.subscribe()))
+    await service.run(duration=duration)
+    await printer
+    print(f"Received {service.samples_received} samples in {service.batches_flushed} batches "
+          f"({service.buffer.dropped} samples dropped by the ring buffer)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Live GPS ingestion into a CSV log")
+    parser.add_argument('--device', default='COM6', help="pymavlink connection string / serial port")
+    parser.add_argument('--baud', type=int, default=9600)
+    parser.add_argument('--replay', help="replay a .gpx/.kml/.csv track instead of reading the Pixhawk")
+    parser.add_argument('--rate', type=float, default=2.0, help="replay rate in Hz, 0 = as fast as possible")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--output', default=f'gps_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+    args = parser.parse_args()
+
+    if args.replay:
+        source = FileReplaySource(args.replay, rate_hz=args.rate or None)
+    else:
+        source = MavlinkSource(args.device, baud=args.baud)
+
+    try:
+        asyncio.run(run_live_ingest(source, args.output, duration=args.duration))
+    except KeyboardInterrupt:
+        print("Exiting loop.")
+    print(f"Log written to: {os.path.abspath(args.output)}")
+
+if __name__ == "__main__":
+    main()
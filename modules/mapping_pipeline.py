@@ -1,13 +1,43 @@
+import os
 import numpy as np
-from .data_processing import load_gpx_data, load_multiple_gpx, normalize_elevation, coord_transform
-from .visualization import plot_3D, create_contour_plot, create_3d_contour, render_triangular_mesh, render_wireframe_view
-from .interpolation import create_grid, interpolate_elevation
-from .delaunay_triangulation import build_delaunay_triangulation, optimize_with_steiner_points
-from .analytics import analyze_triangulation_quality
+from .data_processing import (load_track_data, resolve_track_file, load_gpx_parts, concatenate_parts,
+                              iter_track_chunks, normalize_elevation, project_coordinates, normalize_coordinates,
+                              resolve_target_crs, SOURCE_CRS, PROJECTION_CHUNK_SIZE)
+from .cache import PointCache, SurfaceCache, hash_arrays, DEFAULT_CACHE_DIR
+from .point_store import PointStore, STORE_CHUNK_SIZE
+from .thinning import thin_points
+from .visualization import (plot_3D, create_contour_plot, create_3d_contour, render_triangular_mesh, render_wireframe_view,
+                            create_adaptive_contour_plot, create_adaptive_3d_surface, create_variance_plot)
+from .interpolation import (create_grid, grid_axes, grid_support_mask, InterpolatorCache, interpolate_tiled,
+                            interpolate_kriging)
+from .dem_pyramid import DEMPyramid, pyramid_size, DEM_PREVIEW_SIZE, DEM_PYRAMID_MAX_SIZE
+from .adaptive_grid import build_quadtree, QUADTREE_MAX_POINTS, QUADTREE_MAX_STD
+from .delaunay_triangulation import (build_delaunay_triangulation, optimize_with_steiner_points,
+                                     refine_skinny_triangles)
+from .incremental_delaunay import IncrementalTriangulation
+from .mesh_decimation import decimate_terrain_mesh, print_decimation_report, DECIMATION_MAX_ERROR
+from .spatial_order import spatial_order, sort_simplices
+from .analytics import analyze_triangulation_quality, calculate_triangle_fatness
 from .curvature import compute_curvature
+from .mesh_topology import MeshTopology
 
 class MappingPipeline:
-    def __init__(self):
+    def __init__(self, use_cache=True, cache_dir=DEFAULT_CACHE_DIR, point_store_dir=None,
+                 point_dtype=np.float64, surface_cache=None, parallel_triangulation=False):
+        # On-disk cache of parsed and projected points per source file
+        self.cache = PointCache(cache_dir) if use_cache else None
+        self.source_keys = None
+        self.source_sizes = None
+        # Interpolated grids keyed by dataset hash and settings, pass one SurfaceCache to share its
+        # in-memory tier between pipelines
+        self.surface_cache = (surface_cache or SurfaceCache(cache_dir)) if use_cache else None
+        self.dataset_key = None
+
+        # Optional memory-mapped column store, point arrays below are then views into it and files are
+        # parsed straight into it (see point_store for the stages that still need RAM)
+        # point_dtype: float32 or float64 for x/y/z, raw lat/lon/ele stay float64
+        self.point_store = PointStore(point_store_dir, point_dtype) if point_store_dir else None
+
         # Raw GPS data
         self.lats = None
         self.lons = None
@@ -17,17 +47,43 @@ class MappingPipeline:
         self.x = None
         self.y = None
         self.z = None
+        # Space-filling-curve permutation of the points, None = preprocessed order
+        self.point_order = None
+        # Projection and normalization origin, absolute = normalized + origin
+        self.crs = None
+        self.origin = None
         
         # Grid and interpolated data
         self.xi = None
         self.yi = None
         self.zi = None
+        # Kriging variance on the same grid (kriging only)
+        self.zi_variance = None
+        # Cells of the grid within reach of a sample, None = the whole bounding box is interpolated
+        self.support_mask = None
+        # Interpolators over the current points, built once and shared by every field and grid
+        self.interpolators = None
+        # Multi-resolution DEM, grids up to its finest size are served from its levels, and the
+        # interpolation settings it was built with
+        self.dem_pyramid = None
+        self.dem_pyramid_settings = None
+        # Adaptive quadtree grid, surface values live on its nodes
+        self.adaptive_grid = None
+        self.adaptive_settings = None
         
-        # Triangulation data
+        # Triangulation data, parallel_triangulation: triangulate in tiles across processes
+        self.parallel_triangulation = parallel_triangulation
         self.triangulation = None
         self.triangles = None
         self.num_triangles = None
         self.points_2d = None
+        # Edges, adjacency and boundary masks of the triangulation, shared by refinement/curvature/analytics
+        self.topology = None
+
+        # Incremental triangulation for streaming points, quality metrics keyed by triangle/vertex id
+        self.incremental_mesh = None
+        self.triangle_fatness = None
+        self.vertex_curvature = None
 
         # Optimized triangulation data
         self.optimized_triangulation = None
@@ -36,33 +92,377 @@ class MappingPipeline:
         self.optimized_y = None
         self.optimized_z = None
         self.steiner_count = None
+        # Decimated mesh: ids (in the mesh it was simplified from) of the kept vertices, achieved error
+        self.decimated_vertices = None
+        self.decimation_stats = None
         
-    def load_data(self, data_source, is_multiple=False):
+    def load_data(self, data_source, is_multiple=False, parallel=None, prefer_kml=False):
         # Load GPS data from single file or multiple files
-        if is_multiple:
-            self.lats, self.lons, self.alts = load_multiple_gpx(data_source)
+        # parallel: parse multiple files in a process pool (None = decide from the file count)
+        # prefer_kml: read the .kml twin of a .gpx track when one exists next to it (off by default)
+        requested = data_source if is_multiple else [data_source]
+        files = [resolve_track_file(filename, prefer_kml) for filename in requested]
+        for filename, loaded in zip(requested, files):
+            if loaded != filename:
+                print(f"Reading {os.path.basename(loaded)} instead of {os.path.basename(filename)} (kml twin)")
+
+        if self.point_store is not None:
+            self._load_into_store(files)
+            return
+        if self.cache is None:
+            parts = load_gpx_parts(files, parallel=parallel) if is_multiple else [load_track_data(files[0])]
         else:
-            self.lats, self.lons, self.alts = load_gpx_data(data_source)
+            keys = [self.cache.source_key(filename) for filename in files]
+            parts = [self.cache.load_raw(key) for key in keys]
+
+            # only parse the files the cache doesn't have yet
+            missing = [i for i, part in enumerate(parts) if part is None]
+            if missing:
+                if is_multiple:
+                    loaded = load_gpx_parts([files[i] for i in missing], parallel=parallel)
+                else:
+                    loaded = [load_track_data(files[0])]
+                for i, part in zip(missing, loaded):
+                    self.cache.store_raw(keys[i], *part)
+                    parts[i] = part
+            print(f"Point cache: {len(files) - len(missing)} hit(s), {len(missing)} miss(es)")
+            self.source_keys = keys
+
+        self.source_sizes = [len(part[0]) for part in parts]
+        self.lats, self.lons, self.alts = parts[0] if len(parts) == 1 else concatenate_parts(parts)
         print(f"Number of GPS points: {len(self.lats)}")
-        
-    def preprocess_data(self):
+
+    def _load_into_store(self, files):
+        # Stream every file chunk by chunk into the lat/lon/ele store columns, no per-file arrays in RAM
+        # the point cache is bypassed, the store already is the on-disk copy of the points
+        names = ('lat', 'lon', 'ele')
+        appenders = [self.point_store.appender(name, np.float64) for name in names]
+        self.source_sizes = []
+        for i, filename in enumerate(files, 1):
+            n = 0
+            for chunk in iter_track_chunks(filename):
+                for appender, values in zip(appenders, chunk):
+                    appender.append(values)
+                n += len(chunk[0])
+            self.source_sizes.append(n)
+            print(f"[{i}/{len(files)}] streamed {filename} into the point store: {n} points")
+        self.source_keys = None
+        self.lats, self.lons, self.alts = (self.point_store.close_appender(name, appender)
+                                           for name, appender in zip(names, appenders))
+        print(f"Number of GPS points: {len(self.lats)}")
+
+    def _project_cached(self):
+        # Projected absolute x/y per source file from the cache, projecting and storing only the misses
+        projection = (SOURCE_CRS, self.crs)
+        parts = []
+        offset = 0
+        for key, size in zip(self.source_keys, self.source_sizes):
+            part = self.cache.load_projected(key, projection)
+            if part is None:
+                part = project_coordinates(self.lats[offset:offset + size], self.lons[offset:offset + size],
+                                           target_crs=self.crs)
+                self.cache.store_projected(key, projection, *part)
+            parts.append(part)
+            offset += size
+        return parts
+
+    def _project_into_store(self, parts=None):
+        # Write normalized x/y straight into point store columns, parts = cached absolute x/y per file
+        n = len(self.lats)
+        x = self.point_store.allocate('x', n)
+        y = self.point_store.allocate('y', n)
+
+        if parts is not None:
+            x_origin = min(float(np.min(part[0])) for part in parts)
+            y_origin = min(float(np.min(part[1])) for part in parts)
+            offset = 0
+            for part_x, part_y in parts:
+                x[offset:offset + len(part_x)] = part_x - x_origin
+                y[offset:offset + len(part_y)] = part_y - y_origin
+                offset += len(part_x)
+        elif x.dtype == np.float64:
+            project_coordinates(self.lats, self.lons, target_crs=self.crs, out=(x, y))
+            x, y, (x_origin, y_origin) = normalize_coordinates(x, y, copy=False)
+        else:
+            # float32 can't hold absolute UTM metres precisely: find the origin in a first
+            # pass, then project again and store only the normalized values
+            x_origin = y_origin = np.inf
+            for start in range(0, n, PROJECTION_CHUNK_SIZE):
+                chunk_x, chunk_y = project_coordinates(self.lats[start:start + PROJECTION_CHUNK_SIZE],
+                                                       self.lons[start:start + PROJECTION_CHUNK_SIZE],
+                                                       target_crs=self.crs)
+                x_origin = min(x_origin, float(np.min(chunk_x)))
+                y_origin = min(y_origin, float(np.min(chunk_y)))
+            for start in range(0, n, PROJECTION_CHUNK_SIZE):
+                chunk_x, chunk_y = project_coordinates(self.lats[start:start + PROJECTION_CHUNK_SIZE],
+                                                       self.lons[start:start + PROJECTION_CHUNK_SIZE],
+                                                       target_crs=self.crs)
+                x[start:start + PROJECTION_CHUNK_SIZE] = chunk_x - x_origin
+                y[start:start + PROJECTION_CHUNK_SIZE] = chunk_y - y_origin
+
+        x.flush()
+        y.flush()
+        return x, y, (x_origin, y_origin)
+
+    def preprocess_data(self, min_spacing=None, merge_policy='mean', point_order=None):
         # Normalize elevation and transform coordinates
-        self.alts = normalize_elevation(self.alts)
+        # min_spacing: merge points closer than this many metres (grid-hash thinning), None = keep all
+        # merge_policy: elevation of merged points, 'mean', 'median' or 'max'
+        # point_order: 'hilbert' or 'morton' to sort the points along a space-filling curve, None = keep
+        z_origin = float(np.min(self.alts))
+        if self.point_store is not None:
+            # normalize the memory-mapped elevation column in place
+            for start in range(0, len(self.alts), STORE_CHUNK_SIZE):
+                self.alts[start:start + STORE_CHUNK_SIZE] -= z_origin
+        else:
+            self.alts = normalize_elevation(self.alts)
         print(f"Elevation range: {np.min(self.alts):.1f} to {np.max(self.alts):.1f} meters")
-        
-        self.x, self.y = coord_transform(self.lats, self.lons)
-        self.z = np.array(self.alts)
-        
+
+        # UTM zone from the centroid of all loaded points, so every file lands in the same zone
+        self.crs = resolve_target_crs(self.lats, self.lons)
+        parts = self._project_cached() if self.cache is not None and self.source_keys is not None else None
+        if self.point_store is not None:
+            self.x, self.y, (x_origin, y_origin) = self._project_into_store(parts)
+        else:
+            if parts is None:
+                x, y = project_coordinates(self.lats, self.lons, target_crs=self.crs)
+            else:
+                x, y = np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
+            self.x, self.y, (x_origin, y_origin) = normalize_coordinates(x, y, copy=False)
+        self.origin = (x_origin, y_origin, z_origin)
+        print(f"Projection: {self.crs}, origin ({x_origin:.1f}, {y_origin:.1f}, {z_origin:.1f})")
+
+        # z shares memory with the normalized elevations rather than holding a second copy
+        if self.point_store is not None and self.point_store.dtype != self.alts.dtype:
+            self.z = self.point_store.write_column('z', self.alts)
+        else:
+            self.z = self.alts
+
+        self.interpolators = None
+        self.dem_pyramid = None
+        self.adaptive_grid = None
+        self.dataset_key = None
+        self.point_order = None
+        if min_spacing:
+            self.thin_points(min_spacing, merge_policy)
+        if point_order:
+            self.reorder_points(point_order)
+
+    def thin_points(self, min_spacing, merge_policy='mean'):
+        # Merge near-coincident points before triangulation/interpolation, raw lats/lons/alts are kept
+        n_before = len(self.x)
+        x, y, z = thin_points(self.x, self.y, self.z, min_spacing, merge=merge_policy)
+        if self.point_store is not None:
+            x, y, z = (self.point_store.write_column(f"thin_{name}", values)
+                       for name, values in (('x', x), ('y', y), ('z', z)))
+        self.x, self.y, self.z = x, y, z
+        self.point_order = None
+        self.interpolators = None
+        self.dem_pyramid = None
+        self.adaptive_grid = None
+        self.dataset_key = None
+        removed = n_before - len(self.x)
+        print(f"Thinning ({min_spacing} m, {merge_policy}): removed {removed} of {n_before} points "
+              f"({removed / n_before * 100:.1f}%), {len(self.x)} remain")
+
+    def reorder_points(self, curve='hilbert'):
+        # Sort the points along a space-filling curve so neighbours on the ground are neighbours in
+        # memory, the permutation is kept in point_order (new point i is preprocessed point point_order[i])
+        order = spatial_order(self.x, self.y, curve)
+        x, y, z = self.x[order], self.y[order], self.z[order]
+        if self.point_store is not None:
+            x, y, z = (self.point_store.write_column(f"ordered_{name}", values)
+                       for name, values in (('x', x), ('y', y), ('z', z)))
+        self.x, self.y, self.z = x, y, z
+        self.point_order = order if self.point_order is None else self.point_order[order]
+        self.interpolators = None
+        self.dem_pyramid = None
+        self.adaptive_grid = None
+        self.dataset_key = None
+        print(f"Reordered {len(order)} points along a {curve.capitalize()} curve")
+
+    def original_point_ids(self, ids=None):
+        # preprocessed point ids of current point ids (all points if ids is None)
+        if self.point_order is None:
+            return np.arange(len(self.x)) if ids is None else np.asarray(ids)
+        return self.point_order if ids is None else self.point_order[ids]
+
+    def to_absolute(self, x, y, z=None):
+        # Map normalized pipeline coordinates back to absolute projected coordinates and elevation
+        x_origin, y_origin, z_origin = self.origin
+        if z is None:
+            return np.asarray(x) + x_origin, np.asarray(y) + y_origin
+        return np.asarray(x) + x_origin, np.asarray(y) + y_origin, np.asarray(z) + z_origin
+
     def create_interpolation_grid(self, grid_size=20):
         # Create interpolation grid
         self.xi, self.yi = create_grid(self.x, self.y, grid_size)
         print(f"Grid size: {grid_size}x{grid_size} = {grid_size**2} interpolated points")
         
-    def interpolate_data(self, method='linear'):
+    def get_interpolators(self):
+        # Interpolator cache for the current points, reuses the Delaunay triangulation when there is one
+        if self.interpolators is None:
+            self.interpolators = InterpolatorCache(self.x, self.y, self.triangulation)
+            self.interpolators.add_field('elevation', self.z)
+        return self.interpolators
+
+    def cached_surface(self, settings, compute):
+        # Look a grid up in the surface cache by dataset hash + settings, compute() and store it on a miss
+        if self.surface_cache is None:
+            return compute()
+        if self.dataset_key is None:
+            self.dataset_key = hash_arrays(self.x, self.y, self.z)
+        key = self.surface_cache.key(self.dataset_key, *settings)
+        grid = self.surface_cache.load(key)
+        if grid is None:
+            grid = self.surface_cache.store(key, compute())
+        return grid
+
+    def interpolate_data(self, method='linear', idw_options=None, support_distance=None):
         # Interpolate elevation data using specified method
-        self.zi = interpolate_elevation(self.x, self.y, self.z, self.xi, self.yi, method=method)
+        # idw_options: k, radius, power for method='idw' (KD-tree inverse distance weighting)
+        # support_distance: only interpolate cells within this many metres of a sample, the rest stay NaN
+        # (support_mask stays None when the grid comes from the surface cache)
+        self.support_mask = None
+
+        def compute():
+            interpolators = self.get_interpolators()
+            if support_distance is not None:
+                self.support_mask = grid_support_mask(interpolators.tree, self.xi[0], self.yi[:, 0],
+                                                      support_distance)
+                print(f"Support mask: {self.support_mask.mean() * 100:.1f}% of grid cells within "
+                      f"{support_distance} m of a sample")
+            return interpolators.interpolate('elevation', self.xi, self.yi, method=method, mask=self.support_mask,
+                                             **(idw_options or {}))
+
+        extent = (float(self.xi[0, 0]), float(self.xi[0, -1]), float(self.yi[0, 0]), float(self.yi[-1, 0]))
+        settings = ('grid', method, self.xi.shape, extent, support_distance, sorted((idw_options or {}).items()))
+        self.zi = self.cached_surface(settings, compute)
+        return self.zi
         #print(f"Interpolated elevation range: {np.nanmin(self.zi):.1f} to {np.nanmax(self.zi):.1f} meters")
-        
+
+    def interpolate_kriging(self, support_distance=None, kriging_options=None):
+        # Local ordinary kriging on the current grid, fills zi and the kriging variance zi_variance
+        # kriging_options: model ('spherical', 'exponential', 'gaussian'), k neighbours, batch_size
+        def compute():
+            interpolators = self.get_interpolators()
+            mask = None
+            if support_distance is not None:
+                mask = grid_support_mask(interpolators.tree, self.xi[0], self.yi[:, 0], support_distance)
+            options = kriging_options or {}
+            print(f"Kriging variogram: {interpolators.variogram('elevation', options.get('model', 'spherical'))}")
+            return np.stack(interpolate_kriging(interpolators, 'elevation', self.xi, self.yi, mask=mask, **options))
+
+        extent = (float(self.xi[0, 0]), float(self.xi[0, -1]), float(self.yi[0, 0]), float(self.yi[-1, 0]))
+        settings = ('kriging', self.xi.shape, extent, support_distance, sorted((kriging_options or {}).items()))
+        self.zi, self.zi_variance = self.cached_surface(settings, compute)
+        print(f"Kriging variance: {np.nanmin(self.zi_variance):.3f} to {np.nanmax(self.zi_variance):.3f} m²")
+        return self.zi, self.zi_variance
+
+    def visualize_kriging_variance(self, show_gps_points=True):
+        if show_gps_points:
+            create_variance_plot(self.xi, self.yi, self.zi_variance, self.x, self.y)
+        else:
+            create_variance_plot(self.xi, self.yi, self.zi_variance)
+
+    def interpolate_raster(self, grid_size, method='linear', output=None, parallel=None, max_workers=None,
+                           idw_options=None, support_distance=None):
+        # Tiled (optionally parallel) elevation raster for grids too large for interpolate_data
+        # output: .npy path for a memory-mapped raster, None keeps it in memory
+        self.zi = interpolate_tiled(self.get_interpolators(), 'elevation', grid_size, method=method,
+                                    output=output, parallel=parallel, max_workers=max_workers,
+                                    support_distance=support_distance, **(idw_options or {}))
+        # the raster replaces any pyramid surface (its previews would show a different grid)
+        self.dem_pyramid = None
+        # broadcast views give the same node coordinates as create_grid without allocating two more grids
+        xs, ys = grid_axes(self.x, self.y, grid_size)
+        self.xi = np.broadcast_to(xs, (grid_size, grid_size))
+        self.yi = np.broadcast_to(ys[:, None], (grid_size, grid_size))
+        print(f"Raster size: {grid_size}x{grid_size} = {grid_size**2} interpolated points")
+        return self.zi
+
+    def build_dem_pyramid(self, grid_size, method='linear', output=None, idw_options=None, support_distance=None):
+        # Interpolate the finest DEM once (2^k + 1 >= grid_size nodes), coarser levels are subsampled views
+        # an existing pyramid at least as fine with the same settings is kept, so smaller grids reuse it
+        # output: .npy path for a memory-mapped finest raster, such rasters bypass the surface cache
+        size = pyramid_size(grid_size)
+        settings = (method, support_distance, sorted((idw_options or {}).items()))
+        if (self.dem_pyramid is not None and self.dem_pyramid_settings == settings
+                and self.dem_pyramid.finest_size >= size):
+            print(f"DEM pyramid: reusing the {self.dem_pyramid.finest_size}x{self.dem_pyramid.finest_size} pyramid")
+            return
+
+        def compute():
+            return interpolate_tiled(self.get_interpolators(), 'elevation', size, method=method, output=output,
+                                     support_distance=support_distance, **(idw_options or {}))
+
+        if output is None:
+            zi = self.cached_surface(('pyramid', method, size) + settings[1:], compute)
+        else:
+            zi = compute()
+        xs, ys = grid_axes(self.x, self.y, size)
+        self.dem_pyramid = DEMPyramid(xs, ys, zi)
+        self.dem_pyramid_settings = settings
+        sizes = [len(xs) for xs, _, _ in self.dem_pyramid.levels]
+        print(f"DEM pyramid: {len(sizes)} levels, {sizes[0]}x{sizes[0]} down to {sizes[-1]}x{sizes[-1]}")
+
+    def grid_from_pyramid(self, grid_size, support_distance=None):
+        # Serve the grid from the nearest pyramid level instead of re-interpolating the points
+        # support_distance: cells farther than this from a sample are NaN, like interpolate_data
+        self.support_mask = None
+        if support_distance is not None:
+            xs, ys = grid_axes(self.x, self.y, grid_size)
+            self.support_mask = grid_support_mask(self.get_interpolators().tree, xs, ys, support_distance)
+        self.xi, self.yi, self.zi = self.dem_pyramid.grid(grid_size, mask=self.support_mask)
+        level = len(self.dem_pyramid.levels[self.dem_pyramid.level_for(grid_size)][0])
+        source = "pyramid level" if level == grid_size else f"resampled from the {level}x{level} level"
+        print(f"Grid size: {grid_size}x{grid_size} = {grid_size**2} interpolated points ({source})")
+
+    def create_adaptive_grid(self, grid_size=20, max_points=QUADTREE_MAX_POINTS, max_std=QUADTREE_MAX_STD):
+        # Quadtree grid: finest cells match a grid_size uniform grid, refined only where samples are dense
+        # (more than max_points per cell) or their elevation spread exceeds max_std metres
+        self.adaptive_grid = build_quadtree(self.x, self.y, self.z, grid_size, max_points=max_points,
+                                            max_std=max_std)
+        self.adaptive_settings = (grid_size, max_points, max_std)
+        print(f"Adaptive grid: {len(self.adaptive_grid)} cells, {len(self.adaptive_grid.node_x)} interpolated "
+              f"points (uniform {grid_size}x{grid_size} = {grid_size**2})")
+
+    def interpolate_adaptive(self, method='linear', idw_options=None, support_distance=None):
+        # Interpolate elevation at the adaptive grid nodes
+        grid = self.adaptive_grid
+
+        def compute():
+            return grid.evaluate(self.get_interpolators(), 'elevation', method=method,
+                                 support_distance=support_distance, **(idw_options or {}))
+
+        settings = ('adaptive', method, self.adaptive_settings, support_distance,
+                    sorted((idw_options or {}).items()))
+        grid.values = self.cached_surface(settings, compute)
+        return grid.values
+
+    def visualize_adaptive_contour_2d(self, show_gps_points=True):
+        grid = self.adaptive_grid
+        if show_gps_points:
+            create_adaptive_contour_plot(grid.node_x, grid.node_y, grid.values, grid.triangles(), self.x, self.y)
+        else:
+            create_adaptive_contour_plot(grid.node_x, grid.node_y, grid.values, grid.triangles())
+
+    def visualize_adaptive_contour_3d(self, show_gps_points=True, vertical_exaggeration=3):
+        grid = self.adaptive_grid
+        if show_gps_points:
+            create_adaptive_3d_surface(grid.node_x, grid.node_y, grid.values, grid.triangles(),
+                                       self.x, self.y, self.z, vertical_exaggeration)
+        else:
+            create_adaptive_3d_surface(grid.node_x, grid.node_y, grid.values, grid.triangles(),
+                                       vertical_exaggeration=vertical_exaggeration)
+
+    def export_adaptive_grid(self, output_file="adaptive_grid_results.csv"):
+        try:
+            self.adaptive_grid.export_csv(output_file)
+            print(f"Adaptive grid exported to: {output_file}")
+        except Exception as e:
+            print(f"Warning: Could not export to CSV: {e}")
+
     def visualize_3d_original(self):
         # Create 3D plot of original GPS data
         plot_3D(self.lats, self.lons, self.alts)
@@ -76,16 +476,101 @@ class MappingPipeline:
             
     def visualize_contour_3d(self, show_gps_points=True, vertical_exaggeration=3):
         # Create 3D contour plot  
+        xi, yi, zi = self.xi, self.yi, self.zi
+        if self.dem_pyramid is not None and zi.shape[0] > DEM_PREVIEW_SIZE:
+            # the 3D surface only needs an overview, read a coarse pyramid level
+            xi, yi, zi = self.dem_pyramid.preview(DEM_PREVIEW_SIZE)
+        elif zi.shape[0] > DEM_PREVIEW_SIZE:
+            # large raster without a pyramid, every step-th node is enough for the overview
+            step = -(-zi.shape[0] // DEM_PREVIEW_SIZE)
+            xi, yi, zi = xi[::step, ::step], yi[::step, ::step], zi[::step, ::step]
         if show_gps_points:
-            create_3d_contour(self.xi, self.yi, self.zi, self.x, self.y, self.z, vertical_exaggeration)
+            create_3d_contour(xi, yi, zi, self.x, self.y, self.z, vertical_exaggeration)
         else:
-            create_3d_contour(self.xi, self.yi, self.zi, vertical_exaggeration=vertical_exaggeration)
+            create_3d_contour(xi, yi, zi, vertical_exaggeration=vertical_exaggeration)
             
-    def create_triangulation(self):
-        # Create Delaunay triangulation from GPS data
-        self.triangulation, self.triangles, self.num_triangles = build_delaunay_triangulation(self.x, self.y, self.z)
+    def create_triangulation(self, parallel=None):
+        # Create Delaunay triangulation from GPS data (parallel=True: tiled across processes,
+        # None = the pipeline's parallel_triangulation setting)
+        if parallel is None:
+            parallel = self.parallel_triangulation
+        self.triangulation, self.triangles, self.num_triangles = build_delaunay_triangulation(self.x, self.y, self.z,
+                                                                                              parallel=parallel)
+        if self.point_order is not None:
+            # curve-ordered points: walk the triangles in the same order (the Delaunay object keeps
+            # its own simplex order, find_simplex/neighbors depend on it)
+            self.triangles = sort_simplices(self.triangles)
         self.points_2d = np.column_stack((self.x, self.y))
+        self.topology = None
+        self.interpolators = None
         
+    def create_incremental_triangulation(self):
+        # Build an incremental Delaunay mesh over the current points, new batches go through update_triangulation
+        self.incremental_mesh = IncrementalTriangulation(self.x, self.y, self.z)
+        self.triangle_fatness = {}
+        self.vertex_curvature = {}
+        ids = self.incremental_mesh.triangle_ids
+        self.update_mesh_quality(ids, np.empty(0, dtype=np.int64), np.unique(self.incremental_mesh.triangles_of(ids)))
+        self.sync_incremental_triangulation()
+
+    def project_batch(self, lats, lons, alts):
+        # Project a batch of live samples with the CRS and origin fixed by the first batch
+        # (a running survey can't be re-normalized on every batch without moving every vertex)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        alts = np.asarray(alts, dtype=np.float64)
+        if self.origin is None:
+            self.crs = resolve_target_crs(lats, lons)
+            x, y = project_coordinates(lats, lons, target_crs=self.crs)
+            self.origin = (float(np.min(x)), float(np.min(y)), float(np.min(alts)))
+        else:
+            x, y = project_coordinates(lats, lons, target_crs=self.crs)
+        x_origin, y_origin, z_origin = self.origin
+        return x - x_origin, y - y_origin, alts - z_origin
+
+    def update_triangulation(self, x, y, z):
+        # Insert a batch of points and refresh fatness/curvature only around the changed triangles
+        update = self.incremental_mesh.add_points(x, y, z)
+        self.update_mesh_quality(update.changed_triangles, update.removed_triangles, update.affected_vertices)
+        return update
+
+    def update_mesh_quality(self, changed_triangles, removed_triangles, affected_vertices):
+        # Per-triangle fatness and per-vertex curvature maintained for the changed neighbourhood only
+        for t in removed_triangles.tolist():
+            self.triangle_fatness.pop(t, None)
+        if len(changed_triangles):
+            points, triangles = self.incremental_mesh.local_mesh(changed_triangles)
+            fatness_ratios, _ = calculate_triangle_fatness(points, triangles)
+            self.triangle_fatness.update(zip(changed_triangles.tolist(), fatness_ratios.tolist()))
+        if len(affected_vertices):
+            curvatures = self.incremental_mesh.vertex_curvatures(affected_vertices)
+            self.vertex_curvature.update(zip(affected_vertices.tolist(), curvatures.tolist()))
+
+    def sync_incremental_triangulation(self):
+        # Export the incremental mesh into the regular triangulation attributes (O(n), call before
+        # visualization or the full-mesh analytics, not per batch)
+        self.use_mesh(self.incremental_mesh)
+
+    def use_mesh(self, mesh):
+        # Make a mesh with .x/.y/.z/.points/.simplices the current triangulation
+        self.x, self.y, self.z = mesh.x, mesh.y, mesh.z
+        self.point_order = None
+        self.triangulation = mesh
+        self.triangles = mesh.simplices
+        self.num_triangles = len(self.triangles)
+        self.points_2d = mesh.points
+        self.topology = None
+        self.interpolators = None
+        self.dem_pyramid = None
+        self.adaptive_grid = None
+        self.dataset_key = None
+
+    def get_topology(self):
+        # Mesh topology of the current triangulation, built on first use
+        if self.topology is None:
+            self.topology = MeshTopology(self.triangles, len(self.x))
+        return self.topology
+
     def visualize_triangular_mesh(self, vertical_exaggeration=3):
         # Display 3D triangular mesh with colored surface
         render_triangular_mesh(self.x, self.y, self.z, self.triangles, vertical_exaggeration=vertical_exaggeration)
@@ -97,13 +582,40 @@ class MappingPipeline:
 
     def analyze_triangulation_quality(self):
         # Perform comprehensive triangle quality analysis
-        analyze_triangulation_quality(self.triangulation, self.points_2d)
+        # only an already built topology is passed, a streamed report of a huge mesh must not build one
+        analyze_triangulation_quality(self.triangulation, self.points_2d, topology=self.topology,
+                                      triangles=self.triangles)
 
     def optimize_triangulation(self):
         # Optimize triangulation by adding Steiner points at edge midpoints
         (self.optimized_triangulation, self.optimized_triangles,
          self.optimized_x, self.optimized_y, self.optimized_z,
-         self.steiner_count) = optimize_with_steiner_points(self.x, self.y, self.z, self.triangulation)
+         self.steiner_count) = optimize_with_steiner_points(self.x, self.y, self.z, self.triangulation,
+                                                            topology=self.get_topology())
+
+    def refine_triangulation(self, refine_options=None):
+        # Optimize triangulation by adding Steiner points only inside skinny triangles
+        # (the menu gives the point budget as a percentage of the GPS points)
+        refine_options = dict(refine_options or {})
+        budget_percent = refine_options.pop('budget_percent', None)
+        if budget_percent is not None:
+            refine_options['max_points'] = int(len(self.x) * budget_percent / 100)
+        (self.optimized_triangulation, self.optimized_triangles,
+         self.optimized_x, self.optimized_y, self.optimized_z,
+         self.steiner_count) = refine_skinny_triangles(self.x, self.y, self.z, self.triangulation,
+                                                       **refine_options)
+
+    def decimate_triangulation(self, max_error=DECIMATION_MAX_ERROR, target_triangles=None):
+        # Simplify the optimized mesh (the plain one if there is none) to a vertical tolerance, the
+        # result becomes the current triangulation so mesh views, analytics and curvature export use it
+        if self.optimized_triangles is not None:
+            x, y, z, triangles = self.optimized_x, self.optimized_y, self.optimized_z, self.optimized_triangles
+        else:
+            x, y, z, triangles = self.x, self.y, self.z, self.triangles
+        mesh, self.decimated_vertices, self.decimation_stats = decimate_terrain_mesh(
+            x, y, z, triangles, max_error=max_error, target_triangles=target_triangles)
+        print_decimation_report(self.decimation_stats)
+        self.use_mesh(mesh)
 
     def visualize_optimized_mesh(self, vertical_exaggeration=3):
         # Display optimized 3D triangular mesh with Steiner points
@@ -125,6 +637,7 @@ class MappingPipeline:
         # create 3D points array
         points_3d = np.column_stack((self.x, self.y, self.z))
 
-        compute_curvature(points_3d, self.triangulation.simplices,
+        compute_curvature(points_3d, self.triangles,
                          interpolation_method=interpolation_method,
-                         norm_mode=norm_mode, vmax=vmax)
\ No newline at end of file
+                         norm_mode=norm_mode, vmax=vmax, interpolators=self.get_interpolators(),
+                         topology=self.get_topology(), vertex_ids=self.point_order)
\ No newline at end of file
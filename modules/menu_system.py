@@ -14,15 +14,27 @@ def get_available_gpx_files():
         print(f"Error: {data_folder} folder not found!")
         return []
 
-def choose_single_file():
-    """Let user choose from all available GPX files"""
+def get_available_track_files():
+    """Scan Data folder for .gpx files plus .kml files that have no .gpx twin"""
     gpx_files = get_available_gpx_files()
+    gpx_roots = {os.path.splitext(f)[0] for f in gpx_files}
+    data_folder = 'Data'
+    try:
+        kml_files = [os.path.join(data_folder, f) for f in os.listdir(data_folder) if f.lower().endswith('.kml')]
+    except FileNotFoundError:
+        return gpx_files
+    # .kml twins of .gpx tracks are picked up automatically when the .gpx is loaded
+    return gpx_files + [f for f in kml_files if os.path.splitext(f)[0] not in gpx_roots]
+
+def choose_single_file():
+    """Let user choose from all available track files"""
+    gpx_files = get_available_track_files()
     
     if not gpx_files:
-        print("No GPX files found in Data folder!")
+        print("No GPX/KML files found in Data folder!")
         return None
         
-    print(f"\nAvailable GPX files ({len(gpx_files)} found):")
+    print(f"\nAvailable track files ({len(gpx_files)} found):")
     for i, file_path in enumerate(gpx_files, 1):
         filename = os.path.basename(file_path)  # Show just filename, not full path
         print(f"{i}. {filename}")
@@ -38,13 +50,13 @@ def choose_single_file():
             print("Please enter a valid number")
 
 def choose_multiple_files():
-    """Let user select multiple GPX files"""
-    gpx_files = get_available_gpx_files()
+    """Let user select multiple track files"""
+    gpx_files = get_available_track_files()
     
     if not gpx_files:
         return []
         
-    print(f"\nAvailable GPX files ({len(gpx_files)} found):")
+    print(f"\nAvailable track files ({len(gpx_files)} found):")
     for i, file_path in enumerate(gpx_files, 1):
         filename = os.path.basename(file_path)
         print(f"{i}. {filename}")
@@ -105,18 +117,24 @@ def choose_interpolation_method():
     print("1. Linear Interpolation")
     print("2. Cubic Interpolation")
     print("3. Nearest Value Interpolation")
+    print("4. Inverse Distance Weighting (no triangulation, for dense surveys)")
+    print("5. Kriging (with variance map)")
 
     while True:
         try:
-            choice = int(input("\nSelect interpolation method (1-3): "))
+            choice = int(input("\nSelect interpolation method (1-5): "))
             if choice == 1:
                 return 'linear'
             elif choice == 2:
                 return 'cubic'
             elif choice == 3:
                 return 'nearest'
+            elif choice == 4:
+                return 'idw'
+            elif choice == 5:
+                return 'kriging'
             else:
-                print("Please enter a number between 1 and 3")
+                print("Please enter a number between 1 and 5")
         except ValueError:
             print("Please enter a valid number")
 
@@ -127,18 +145,24 @@ def choose_delaunay_option():
     print("1. Create Mesh (3D visualization)")
     print("2. Analytics")
     print("3. Optimized Solution (Steiner points)")
+    print("4. Selective Refinement (Steiner points in skinny triangles only)")
+    print("5. Decimated Mesh (Steiner mesh simplified to a vertical tolerance)")
 
     while True:
         try:
-            choice = int(input("\nSelect option (1-3): "))
+            choice = int(input("\nSelect option (1-5): "))
             if choice == 1:
                 return 'delaunay_mesh'
             elif choice == 2:
                 return choose_analytics_option()
             elif choice == 3:
                 return 'delaunay_optimized'
+            elif choice == 4:
+                return 'delaunay_refined'
+            elif choice == 5:
+                return 'delaunay_decimated'
             else:
-                print("Please enter a number between 1 and 3")
+                print("Please enter a number between 1 and 5")
         except ValueError:
             print("Please enter a valid number")
 
@@ -197,6 +221,40 @@ def get_grid_size():
         except ValueError:
             print("Please enter a valid number")
 
+def choose_grid_type():
+    """Let user choose between a uniform and an adaptive grid"""
+    print("\nGrid Type:")
+    print("=" * 35)
+    print("1. Uniform grid")
+    print("2. Adaptive grid (fine only where points are dense or elevation changes)")
+
+    while True:
+        try:
+            choice = int(input("\nSelect grid type (1-2): "))
+            if choice == 1:
+                return False
+            elif choice == 2:
+                return True
+            else:
+                print("Please enter a number between 1 and 2")
+        except ValueError:
+            print("Please enter a valid number")
+
+def get_support_distance():
+    """Get the data-support distance from user"""
+    while True:
+        try:
+            distance = float(input("\nOnly map cells within this many meters of a GPS point "
+                                   "(default: 0 = whole bounding box): ") or "0")
+            if distance == 0:
+                return None
+            elif distance > 0:
+                return distance
+            else:
+                print("Distance must be zero or a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
 def get_vertical_exaggeration():
     """Get vertical exaggeration factor from user"""
     print("\nVertical Exaggeration Settings:")
@@ -215,6 +273,210 @@ def get_vertical_exaggeration():
         except ValueError:
             print("Please enter a valid number")
 
+def get_thinning_options():
+    """Get point thinning options from user"""
+    print("\nPoint Thinning (merges near-duplicate points from stationary logging):")
+    print("=" * 35)
+
+    while True:
+        try:
+            min_spacing = float(input("\nEnter minimum point spacing in meters (default: 0 = off): ") or "0")
+            if min_spacing == 0:
+                return None, 'mean'
+            elif min_spacing > 0:
+                break
+            else:
+                print("Spacing must be zero or a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    print("Select elevation merge policy:")
+    print("1. Mean")
+    print("2. Median")
+    print("3. Max")
+
+    while True:
+        try:
+            choice = int(input("\nEnter choice: "))
+            if choice == 1:
+                return min_spacing, 'mean'
+            elif choice == 2:
+                return min_spacing, 'median'
+            elif choice == 3:
+                return min_spacing, 'max'
+            else:
+                print("Please enter a number between 1 and 3")
+        except ValueError:
+            print("Please enter a valid number")
+
+def choose_point_order():
+    """Let user choose whether points are reordered along a space-filling curve"""
+    print("\nPoint Order (memory layout for large surveys):")
+    print("=" * 35)
+    print("1. Keep track order")
+    print("2. Hilbert curve")
+    print("3. Morton (Z-order) curve")
+
+    while True:
+        try:
+            choice = int(input("\nSelect point order (default: 1): ") or "1")
+            if choice == 1:
+                return None
+            elif choice == 2:
+                return 'hilbert'
+            elif choice == 3:
+                return 'morton'
+            else:
+                print("Please enter a number between 1 and 3")
+        except ValueError:
+            print("Please enter a valid number")
+
+def choose_point_storage():
+    """Let user choose whether the points are kept in memory or in a memory-mapped store on disk"""
+    print("\nPoint Storage (memory-mapped store for surveys that don't fit in RAM):")
+    print("=" * 35)
+    print("1. In memory")
+    print("2. Memory-mapped store, float64 coordinates")
+    print("3. Memory-mapped store, float32 coordinates (half the disk/memory traffic)")
+
+    while True:
+        try:
+            choice = int(input("\nSelect point storage (default: 1): ") or "1")
+            if choice == 1:
+                return None
+            elif choice == 2:
+                return 'float64'
+            elif choice == 3:
+                return 'float32'
+            else:
+                print("Please enter a number between 1 and 3")
+        except ValueError:
+            print("Please enter a valid number")
+
+def choose_triangulation_mode():
+    """Let user choose between one Delaunay call and tiles triangulated across processes"""
+    print("\nTriangulation:")
+    print("=" * 35)
+    print("1. Single Delaunay")
+    print("2. Parallel tiles (very large surveys on many-core machines)")
+
+    while True:
+        try:
+            choice = int(input("\nSelect triangulation (default: 1): ") or "1")
+            if choice == 1:
+                return False
+            elif choice == 2:
+                return True
+            else:
+                print("Please enter 1 or 2")
+        except ValueError:
+            print("Please enter a valid number")
+
+def get_idw_options():
+    """Get inverse distance weighting options from user"""
+    print("\nInverse Distance Weighting Options:")
+    print("=" * 35)
+
+    while True:
+        try:
+            k = int(input("\nEnter number of neighbours per grid point (default: 8): ") or "8")
+            if k > 0:
+                break
+            else:
+                print("Number of neighbours must be a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    while True:
+        try:
+            radius = float(input("Enter search radius in meters (default: 0 = unlimited): ") or "0")
+            if radius >= 0:
+                break
+            else:
+                print("Radius must be zero or a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    while True:
+        try:
+            power = float(input("Enter distance power (default: 2.0): ") or "2.0")
+            if power > 0:
+                break
+            else:
+                print("Power must be a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    return {'k': k, 'radius': radius or None, 'power': power}
+
+def get_refinement_options():
+    """Get selective Steiner refinement options from user"""
+    print("\nSelective Refinement Options:")
+    print("=" * 35)
+
+    while True:
+        try:
+            min_fatness = float(input("\nRefine triangles with fatness r/R below (default: 0.3): ") or "0.3")
+            if 0 < min_fatness <= 0.5:
+                break
+            else:
+                print("Fatness threshold must be between 0 and 0.5")
+        except ValueError:
+            print("Please enter a valid number")
+
+    while True:
+        try:
+            budget = float(input("Enter Steiner point budget as % of the GPS points (default: 25): ") or "25")
+            if budget > 0:
+                break
+            else:
+                print("Budget must be a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    print("\nSelect insertion point:")
+    print("1. Off-center (fewer points)")
+    print("2. Circumcenter")
+    while True:
+        try:
+            choice = int(input("\nEnter choice (default: 1): ") or "1")
+            if choice in (1, 2):
+                break
+            else:
+                print("Please enter 1 or 2")
+        except ValueError:
+            print("Please enter a valid number")
+
+    return {'min_fatness': min_fatness, 'budget_percent': budget,
+            'insertion': 'offcenter' if choice == 1 else 'circumcenter'}
+
+def get_decimation_options():
+    """Get mesh decimation options from user"""
+    print("\nMesh Decimation Options:")
+    print("=" * 35)
+
+    while True:
+        try:
+            max_error = float(input("\nEnter maximum vertical error in meters (default: 0.1): ") or "0.1")
+            if max_error >= 0:
+                break
+            else:
+                print("Tolerance must be zero or a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    while True:
+        try:
+            target = int(input("Enter target triangle count (default: 0 = as few as the tolerance allows): ") or "0")
+            if target >= 0:
+                break
+            else:
+                print("Target must be zero or a positive number")
+        except ValueError:
+            print("Please enter a valid number")
+
+    return {'max_error': max_error, 'target_triangles': target or None}
+
 def get_curvature_options():
     """Get curvature analysis options from user"""
     print("\nCurvature Visualization Options:")
@@ -296,16 +558,49 @@ def get_user_choices():
     method = choose_method()
 
     if method is None:
-        return None, None, None, None, None, None, None, None
+        return None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None
 
     # Get data source
     data_source, is_multiple = choose_data_source()
 
+    # Get point thinning options
+    min_spacing, merge_policy = get_thinning_options()
+    point_order = choose_point_order()
+    point_storage = choose_point_storage()
+
     # Get grid size for interpolation methods only
-    if method in ['linear', 'cubic', 'nearest']:
+    if method in ['linear', 'cubic', 'nearest', 'idw', 'kriging']:
+        adaptive_grid = choose_grid_type()
         grid_size = get_grid_size()
+        support_distance = get_support_distance()
     else:
+        adaptive_grid = False
         grid_size = None  # Not needed for non-interpolation methods
+        support_distance = None
+
+    # Get the triangulation mode for the Delaunay methods only
+    if method.startswith('delaunay'):
+        parallel_triangulation = choose_triangulation_mode()
+    else:
+        parallel_triangulation = False
+
+    # Get IDW parameters for the KD-tree method only
+    if method == 'idw':
+        idw_options = get_idw_options()
+    else:
+        idw_options = None
+
+    # Get refinement parameters for the selective Steiner method only
+    if method == 'delaunay_refined':
+        refine_options = get_refinement_options()
+    else:
+        refine_options = None
+
+    # Get decimation parameters for the decimated mesh method only
+    if method == 'delaunay_decimated':
+        decimation_options = get_decimation_options()
+    else:
+        decimation_options = None
 
     # Get vertical exaggeration for all 3D visualizations (except curvature)
     if method != 'delaunay_curvature':
@@ -321,4 +616,6 @@ def get_user_choices():
         norm_mode = None
         vmax = None
 
-    return method, data_source, is_multiple, grid_size, vertical_exaggeration, interpolation_method, norm_mode, vmax
\ No newline at end of file
+    return (method, data_source, is_multiple, grid_size, vertical_exaggeration, interpolation_method,
+            norm_mode, vmax, min_spacing, merge_policy, idw_options, support_distance, adaptive_grid,
+            refine_options, decimation_options, point_order, point_storage, parallel_triangulation)
\ No newline at end of file
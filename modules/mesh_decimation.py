@@ -0,0 +1,146 @@
+"""
+Terrain mesh decimation with a bounded vertical error
+
+Greedy insertion (Garland-Heckbert): the simplified mesh starts from the boundary vertices of the
+input mesh, then the dropped vertex farthest (vertically) from the current surface is added back
+until every dropped vertex lies within the tolerance. The maximum vertical error against the input
+vertices is therefore known exactly, and only the triangles around each insertion are re-measured.
+"""
+import heapq
+import numpy as np
+from .incremental_delaunay import IncrementalTriangulation
+from .mesh_topology import MeshTopology
+
+# default tolerance, metres of vertical deviation from the input vertices
+DECIMATION_MAX_ERROR = 0.1
+
+def _locate_in(px, py, corners):
+    '''
+    best containing triangle of each point among a few candidates
+    arguments: px, py - (m,) points, corners - (k, 3, 2) candidate triangles
+    return: (m,) candidate index, (m, 3) barycentric weights in it
+    '''
+    a, b, c = corners[:, 0], corners[:, 1], corners[:, 2]
+    v0, v1 = b - a, c - a
+    den = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+    dx = px[:, None] - a[None, :, 0]
+    dy = py[:, None] - a[None, :, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w1 = (dx * v1[None, :, 1] - v1[None, :, 0] * dy) / den
+        w2 = (v0[None, :, 0] * dy - dx * v0[None, :, 1]) / den
+    w0 = 1 - w1 - w2
+    # the triangle the point is deepest inside, points on shared edges or off by roundoff still land
+    depth = np.nan_to_num(np.minimum(np.minimum(w0, w1), w2), nan=-np.inf)
+    choice = np.argmax(depth, axis=1)
+    rows = np.arange(len(px))
+    return choice, np.column_stack((w0[rows, choice], w1[rows, choice], w2[rows, choice]))
+
+def decimate_terrain_mesh(x, y, z, triangles, max_error=DECIMATION_MAX_ERROR, target_triangles=None):
+    '''
+    simplify a terrain mesh, keeping the maximum vertical deviation of every dropped vertex within
+    max_error metres
+    arguments: x, y, z - input vertices, triangles - input mesh (its boundary vertices are always kept),
+               max_error - vertical tolerance in metres, target_triangles - keep refining past the
+               tolerance until the mesh has at least this many triangles (the tolerance always wins)
+    return: IncrementalTriangulation of the kept vertices, original ids of the kept vertices (in mesh
+            vertex order), stats dict with the achieved error
+    '''
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.int64)
+    topology = MeshTopology(triangles, len(x))
+
+    kept = np.flatnonzero(topology.boundary_vertex_mask).tolist()
+    n_boundary = len(kept)
+    mesh = IncrementalTriangulation(x[kept], y[kept], z[kept])
+    used = np.flatnonzero(np.bincount(triangles.ravel(), minlength=len(x)) > 0)
+    dropped = np.setdiff1d(used, kept)
+
+    error = np.zeros(len(x))
+    unplaceable = []
+    triangle_points = {}
+    version = {}
+    heap = []
+
+    def distribute(points, ids):
+        # hand points to the triangles that now contain them and queue each triangle's worst point
+        for t in ids:
+            version[t] = version.get(t, 0) + 1
+            triangle_points.pop(t, None)
+        if len(points) == 0 or len(ids) == 0:
+            return
+        vertices, local = mesh.local_mesh(ids, with_z=True)
+        corners = vertices[local]
+        choice, weights = _locate_in(x[points], y[points], corners[:, :, :2])
+        surface = np.sum(weights * corners[choice, :, 2], axis=1)
+        error[points] = np.abs(z[points] - surface)
+        order = np.argsort(choice, kind='stable')
+        groups = np.split(order, np.flatnonzero(np.diff(choice[order])) + 1)
+        for group in groups:
+            t = int(ids[choice[group[0]]])
+            members = points[group]
+            triangle_points[t] = members
+            worst = int(np.argmax(error[members]))
+            heapq.heappush(heap, (-error[members[worst]], t, version[t], int(members[worst])))
+
+    distribute(dropped, mesh.triangle_ids)
+
+    n_triangles = 2 * len(kept) - n_boundary - 2
+    while heap:
+        worst_error, t, ver, point = heap[0]
+        if version.get(t) != ver:
+            heapq.heappop(heap)
+            continue
+        if -worst_error <= max_error and (target_triangles is None or n_triangles >= target_triangles):
+            break
+        heapq.heappop(heap)
+
+        update = mesh.add_points([x[point]], [y[point]], [z[point]])
+        if len(update.new_vertices) == 0:
+            # same x/y as a kept vertex, its elevation can't be represented by this mesh
+            unplaceable.append(point)
+            members = triangle_points[t]
+            triangle_points[t] = members = members[members != point]
+            version[t] += 1
+            if len(members):
+                worst = int(np.argmax(error[members]))
+                heapq.heappush(heap, (-error[members[worst]], t, version[t], int(members[worst])))
+            continue
+        kept.append(point)
+        error[point] = 0.0
+        # every insertion is strictly inside the fixed boundary, so Euler's formula gives the count
+        n_triangles += 2
+
+        touched = np.concatenate((update.removed_triangles, update.changed_triangles))
+        orphans = [triangle_points.get(int(s), np.empty(0, dtype=np.int64)) for s in touched]
+        orphans = np.concatenate(orphans) if orphans else np.empty(0, dtype=np.int64)
+        distribute(orphans[orphans != point], update.changed_triangles)
+
+    kept = np.array(kept, dtype=np.int64)
+    placeable = np.setdiff1d(dropped, np.array(unplaceable, dtype=np.int64))
+    measured = np.concatenate((error[placeable], np.zeros(len(kept))))
+    stats = {
+        'input_vertices': len(used),
+        'input_triangles': len(triangles),
+        'output_vertices': len(kept),
+        'output_triangles': n_triangles,
+        'triangle_reduction': (1 - n_triangles / len(triangles)) * 100 if len(triangles) else 0.0,
+        'max_error': float(np.max(measured)) if len(measured) else 0.0,
+        'rms_error': float(np.sqrt(np.mean(measured ** 2))) if len(measured) else 0.0,
+        'tolerance': max_error,
+        'unplaceable_vertices': len(unplaceable),
+    }
+    return mesh, kept, stats
+
+def print_decimation_report(stats):
+    print("\nMesh Decimation Report")
+    print("="*35)
+    print(f"  Vertices: {stats['input_vertices']} -> {stats['output_vertices']}")
+    print(f"  Triangles: {stats['input_triangles']} -> {stats['output_triangles']} "
+          f"({stats['triangle_reduction']:.1f}% fewer)")
+    print(f"  Max vertical error: {stats['max_error']:.3f} m (tolerance {stats['tolerance']:.3f} m)")
+    print(f"  RMS vertical error: {stats['rms_error']:.3f} m")
+    if stats['unplaceable_vertices']:
+        print(f"  Vertices sharing x/y with a kept vertex (not measured): {stats['unplaceable_vertices']}")
+    print("="*35)
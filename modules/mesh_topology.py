@@ -0,0 +1,71 @@
+"""
+Mesh topology - edges, edge/triangle incidence, vertex/triangle adjacency and boundary masks,
+built once with NumPy from a triangle array and shared by refinement, curvature and analytics
+"""
+import numpy as np
+
+class MeshTopology:
+    '''
+    edges: (E, 2) unique vertex pairs, smaller id first, sorted
+    triangle_edges: (T, 3) edge id of each triangle side, side i is opposite corner i
+    edge_triangles: (E, 2) the triangles on each edge, -1 in the second column for boundary edges
+    edge_triangle_count: (E,) 1 for boundary edges, 2 for interior ones
+    vertex_triangle_indptr / vertex_triangle_indices: CSR vertex -> incident triangles
+    boundary_edge_mask / boundary_vertex_mask: edges with one triangle, vertices on such an edge
+    '''
+    def __init__(self, triangles, n_vertices=None):
+        triangles = np.asarray(triangles, dtype=np.int64)
+        self.triangles = triangles
+        n_triangles = len(triangles)
+        if n_vertices is None:
+            n_vertices = int(triangles.max()) + 1 if n_triangles else 0
+        self.n_vertices = n_vertices
+
+        # side i of a triangle joins the two corners other than i
+        sides = np.stack((triangles[:, [1, 2, 0]], triangles[:, [2, 0, 1]]), axis=-1).reshape(-1, 2)
+        sides.sort(axis=1)
+        # one int64 key per side, a 1D unique is much faster than np.unique(axis=0) and sorts the same way
+        keys, inverse, self.edge_triangle_count = np.unique(sides[:, 0] * max(n_vertices, 1) + sides[:, 1],
+                                                            return_inverse=True, return_counts=True)
+        self.edges = np.column_stack((keys // max(n_vertices, 1), keys % max(n_vertices, 1)))
+        inverse = inverse.ravel()
+        self.triangle_edges = inverse.reshape(n_triangles, 3)
+
+        # group the 3T sides by edge, the first and (if any) second side give the two triangles
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(self.edge_triangle_count)[:-1]))
+        side_triangles = order // 3
+        self.edge_triangles = np.full((len(self.edges), 2), -1, dtype=np.int64)
+        self.edge_triangles[:, 0] = side_triangles[starts]
+        interior = self.edge_triangle_count > 1
+        self.edge_triangles[interior, 1] = side_triangles[starts[interior] + 1]
+
+        corners = triangles.ravel()
+        counts = np.bincount(corners, minlength=n_vertices)
+        self.vertex_triangle_indptr = np.concatenate(([0], np.cumsum(counts)))
+        self.vertex_triangle_indices = np.argsort(corners, kind='stable') // 3
+
+        self.boundary_edge_mask = self.edge_triangle_count == 1
+        self.boundary_vertex_mask = np.zeros(n_vertices, dtype=bool)
+        self.boundary_vertex_mask[self.edges[self.boundary_edge_mask].ravel()] = True
+
+    @property
+    def n_edges(self):
+        return len(self.edges)
+
+    @property
+    def boundary_edges(self):
+        return self.edges[self.boundary_edge_mask]
+
+    @property
+    def vertex_triangle_counts(self):
+        return np.diff(self.vertex_triangle_indptr)
+
+    def vertex_triangles(self, vertex):
+        # triangle ids around one vertex, ascending
+        return self.vertex_triangle_indices[self.vertex_triangle_indptr[vertex]:self.vertex_triangle_indptr[vertex + 1]]
+
+    def edge_midpoints(self, *coordinates):
+        # per-edge midpoints of any per-vertex arrays, e.g. edge_midpoints(x, y, z)
+        return tuple((np.asarray(values)[self.edges[:, 0]] + np.asarray(values)[self.edges[:, 1]]) / 2
+                     for values in coordinates)
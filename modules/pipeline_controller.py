@@ -2,15 +2,48 @@
 Pipeline Controller - handles all business logic for running mapping pipelines
 """
 from .mapping_pipeline import MappingPipeline
+from .cache import SurfaceCache
+from .point_store import DEFAULT_STORE_DIR
+from .dem_pyramid import pyramid_size, DEM_PYRAMID_MAX_SIZE
 
-def run_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration):
+# interpolated surfaces outlive a single run, so re-running a file with the same settings is a memory hit
+_surface_cache = None
+
+def run_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration, idw_options=None,
+                               support_distance=None):
     # Execute interpolation-specific pipeline workflow
     pipeline.visualize_3d_original()
+    if pyramid_size(grid_size) > DEM_PYRAMID_MAX_SIZE:
+        # very large grids: a tiled (parallel) raster at exactly the requested size, no pyramid
+        pipeline.interpolate_raster(grid_size, method=method, idw_options=idw_options,
+                                    support_distance=support_distance)
+    else:
+        # one DEM pyramid per surface, the requested grid is served from its nearest level
+        pipeline.build_dem_pyramid(grid_size, method=method, idw_options=idw_options,
+                                   support_distance=support_distance)
+        pipeline.grid_from_pyramid(grid_size, support_distance=support_distance)
+    pipeline.visualize_contour_2d()
+    pipeline.visualize_contour_3d(vertical_exaggeration=vertical_exaggeration)
+
+def run_kriging_pipeline(pipeline, grid_size, vertical_exaggeration, support_distance=None):
+    # Execute kriging workflow, elevation grid plus its kriging variance
+    pipeline.visualize_3d_original()
     pipeline.create_interpolation_grid(grid_size=grid_size)
-    pipeline.interpolate_data(method=method)
+    pipeline.interpolate_kriging(support_distance=support_distance)
     pipeline.visualize_contour_2d()
+    pipeline.visualize_kriging_variance()
     pipeline.visualize_contour_3d(vertical_exaggeration=vertical_exaggeration)
 
+def run_adaptive_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration, idw_options=None,
+                                        support_distance=None):
+    # Execute interpolation workflow on an adaptive quadtree grid
+    pipeline.visualize_3d_original()
+    pipeline.create_adaptive_grid(grid_size=grid_size)
+    pipeline.interpolate_adaptive(method=method, idw_options=idw_options, support_distance=support_distance)
+    pipeline.visualize_adaptive_contour_2d()
+    pipeline.visualize_adaptive_contour_3d(vertical_exaggeration=vertical_exaggeration)
+    pipeline.export_adaptive_grid()
+
 def run_delaunay_mesh_pipeline(pipeline, method, vertical_exaggeration):
     # Execute Delaunay triangulation mesh creation workflow
     pipeline.visualize_3d_original()
@@ -32,6 +65,24 @@ def run_delaunay_optimized_pipeline(pipeline, method, vertical_exaggeration):
     pipeline.visualize_optimized_mesh(vertical_exaggeration=vertical_exaggeration)
     pipeline.visualize_optimized_wireframe(vertical_exaggeration=vertical_exaggeration)
 
+def run_delaunay_refined_pipeline(pipeline, method, vertical_exaggeration, refine_options=None):
+    # Execute Delaunay triangulation optimization workflow with Steiner points in skinny triangles only
+    pipeline.visualize_3d_original()
+    pipeline.create_triangulation()
+    pipeline.refine_triangulation(refine_options)
+    pipeline.visualize_optimized_mesh(vertical_exaggeration=vertical_exaggeration)
+    pipeline.visualize_optimized_wireframe(vertical_exaggeration=vertical_exaggeration)
+
+def run_delaunay_decimated_pipeline(pipeline, method, vertical_exaggeration, decimation_options=None):
+    # Execute Steiner optimization followed by decimation to a vertical error tolerance
+    pipeline.visualize_3d_original()
+    pipeline.create_triangulation()
+    pipeline.optimize_triangulation()
+    pipeline.decimate_triangulation(**(decimation_options or {}))
+    pipeline.visualize_triangular_mesh(vertical_exaggeration=vertical_exaggeration)
+    pipeline.visualize_wireframe(vertical_exaggeration=vertical_exaggeration)
+    pipeline.analyze_triangulation_quality()
+
 def run_delaunay_curvature_pipeline(pipeline, method, interpolation_method, norm_mode, vmax):
     # Execute Delaunay triangulation curvature analysis workflow
     pipeline.visualize_3d_original()
@@ -41,13 +92,19 @@ def run_delaunay_curvature_pipeline(pipeline, method, interpolation_method, norm
 
 # Execute a mapping pipeline with the specified method and data
 def run_pipeline(method, data_source, is_multiple, grid_size=20, vertical_exaggeration=3,
-                interpolation_method='cubic', norm_mode='normal', vmax=None):
+                interpolation_method='cubic', norm_mode='normal', vmax=None, min_spacing=None,
+                merge_policy='mean', idw_options=None, support_distance=None, adaptive_grid=False,
+                refine_options=None, decimation_options=None, point_order=None, point_storage=None,
+                parallel_triangulation=False):
+    # point_storage: None keeps the points in memory, 'float64'/'float32' streams them into a
+    # memory-mapped point store with that coordinate dtype
+    # parallel_triangulation: Delaunay methods triangulate in tiles across processes
     if data_source is None:
         print("No data source selected.")
         return False
 
     # Determine pipeline type based on method
-    if method in ['linear', 'cubic', 'nearest']:
+    if method in ['linear', 'cubic', 'nearest', 'idw', 'kriging']:
         pipeline_type = "interpolation"
     elif method == 'delaunay_mesh':
         pipeline_type = "delaunay_mesh"
@@ -55,6 +112,10 @@ def run_pipeline(method, data_source, is_multiple, grid_size=20, vertical_exagge
         pipeline_type = "delaunay_analytics"
     elif method == 'delaunay_optimized':
         pipeline_type = "delaunay_optimized"
+    elif method == 'delaunay_refined':
+        pipeline_type = "delaunay_refined"
+    elif method == 'delaunay_decimated':
+        pipeline_type = "delaunay_decimated"
     elif method == 'delaunay_curvature':
         pipeline_type = "delaunay_curvature"
     else:
@@ -69,20 +130,40 @@ def run_pipeline(method, data_source, is_multiple, grid_size=20, vertical_exagge
 
     try:
         # Shared setup for all methods
-        pipeline = MappingPipeline()
+        global _surface_cache
+        if _surface_cache is None:
+            _surface_cache = SurfaceCache()
+        pipeline = MappingPipeline(surface_cache=_surface_cache,
+                                   point_store_dir=DEFAULT_STORE_DIR if point_storage else None,
+                                   point_dtype=point_storage or 'float64',
+                                   parallel_triangulation=parallel_triangulation)
         pipeline.load_data(data_source, is_multiple)
-        pipeline.preprocess_data()
+        pipeline.preprocess_data(min_spacing=min_spacing, merge_policy=merge_policy, point_order=point_order)
 
-        if pipeline_type == "interpolation":
-            run_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration)
+        if pipeline_type == "interpolation" and adaptive_grid:
+            run_adaptive_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration, idw_options,
+                                                support_distance)
+        elif pipeline_type == "interpolation" and method == 'kriging':
+            run_kriging_pipeline(pipeline, grid_size, vertical_exaggeration, support_distance)
+        elif pipeline_type == "interpolation":
+            run_interpolation_pipeline(pipeline, method, grid_size, vertical_exaggeration, idw_options,
+                                       support_distance)
         elif pipeline_type == "delaunay_mesh":
             run_delaunay_mesh_pipeline(pipeline, method, vertical_exaggeration)
         elif pipeline_type == "delaunay_analytics":
             run_delaunay_analytics_pipeline(pipeline, method, vertical_exaggeration)
         elif pipeline_type == "delaunay_optimized":
             run_delaunay_optimized_pipeline(pipeline, method, vertical_exaggeration)
+        elif pipeline_type == "delaunay_refined":
+            run_delaunay_refined_pipeline(pipeline, method, vertical_exaggeration, refine_options)
+        elif pipeline_type == "delaunay_decimated":
+            run_delaunay_decimated_pipeline(pipeline, method, vertical_exaggeration, decimation_options)
         elif pipeline_type == "delaunay_curvature":
             run_delaunay_curvature_pipeline(pipeline, method, interpolation_method, norm_mode, vmax)
+
+        # one cache summary per run (totals for the session), only once a grid went through the cache
+        if _surface_cache.memory_hits + _surface_cache.hits + _surface_cache.misses:
+            print(_surface_cache.report())
         return True
 
     except Exception as e:
@@ -0,0 +1,103 @@
+"""
+Out-of-core point store - survey columns kept in memory-mapped .npy files instead of RAM
+
+Parsing, projection, elevation normalization and thinning's cell keys work chunk by chunk on the
+columns. scipy's Delaunay, the KD-tree and the interpolators still build in-memory (n, 2) coordinate
+arrays, so triangulation and gridding need RAM for the (thinned) points they run on.
+"""
+import os
+import numpy as np
+
+# rows copied per step when filling a column, bounds the resident memory of a copy
+STORE_CHUNK_SIZE = 1 << 20
+# store used by the interactive pipeline, its columns are overwritten by every run
+DEFAULT_STORE_DIR = '.point_store'
+
+class ColumnAppender:
+    '''
+    a .npy column grown chunk by chunk when its length isn't known up front (e.g. while parsing)
+    the header is written for length 0 and rewritten with the final length by close()
+    '''
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._header_size = self._write_header()
+
+    def _write_header(self):
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(self._file, {'descr': np.lib.format.dtype_to_descr(self.dtype),
+                                                          'fortran_order': False, 'shape': (self.count,)})
+        return self._file.tell()
+
+    def append(self, values):
+        np.ascontiguousarray(values, dtype=self.dtype).tofile(self._file)
+        self.count += len(values)
+
+    def close(self):
+        # return: the finished column, memory-mapped
+        self._file.flush()
+        if self._write_header() != self._header_size:
+            # both headers pad to the same 64-byte block, a longer one would overwrite data
+            raise ValueError(f"Header of {self.path} changed size")
+        self._file.close()
+        return np.load(self.path, mmap_mode='r+')
+
+class PointStore:
+    '''
+    named 1D columns backed by memory-mapped .npy files in one directory
+    dtype applies to derived columns (x/y/z), raw lat/lon/ele are always kept as float64
+    since float32 degrees lose ~0.5 m of precision
+    '''
+    def __init__(self, directory, dtype=np.float64):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.columns = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def allocate(self, name, n, dtype=None):
+        # create (or replace) a column and return its writable memory map
+        self.columns.pop(name, None)
+        column = np.lib.format.open_memmap(self._path(name), mode='w+',
+                                           dtype=self.dtype if dtype is None else dtype, shape=(n,))
+        self.columns[name] = column
+        return column
+
+    def appender(self, name, dtype=None):
+        # column of unknown length, append() chunks to it, close_appender() maps it
+        self.columns.pop(name, None)
+        return ColumnAppender(self._path(name), self.dtype if dtype is None else dtype)
+
+    def close_appender(self, name, appender):
+        self.columns[name] = appender.close()
+        return self.columns[name]
+
+    def write_column(self, name, values, dtype=None):
+        # copy values into a new column chunk by chunk and return the memory map
+        column = self.allocate(name, len(values), dtype)
+        for start in range(0, len(values), STORE_CHUNK_SIZE):
+            column[start:start + STORE_CHUNK_SIZE] = values[start:start + STORE_CHUNK_SIZE]
+        column.flush()
+        return column
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns[name] = np.load(self._path(name), mmap_mode='r+')
+        return self.columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def __contains__(self, name):
+        return name in self.columns or os.path.isfile(self._path(name))
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
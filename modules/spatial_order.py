@@ -0,0 +1,74 @@
+"""
+Space-filling-curve ordering - sorts points along a Hilbert or Morton (Z-order) curve so that points
+close on the ground are close in memory, and triangles follow the same order
+"""
+import numpy as np
+
+SPACE_FILLING_CURVES = ('hilbert', 'morton')
+# curve resolution, 2^bits cells along each axis (bits <= 31 keeps the keys in int64)
+CURVE_BITS = 16
+
+def quantize(x, y, bits=CURVE_BITS):
+    # integer cell coordinates on a square 2^bits lattice over the bounding box (square, so the
+    # curve isn't stretched along the longer side)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x0, y0 = np.min(x), np.min(y)
+    span = max(np.max(x) - x0, np.max(y) - y0) or 1.0
+    scale = ((1 << bits) - 1) / span
+    return ((x - x0) * scale).astype(np.int64), ((y - y0) * scale).astype(np.int64)
+
+def hilbert_keys(ix, iy, bits=CURVE_BITS):
+    # distance along the Hilbert curve of each lattice cell (the classic xy2d, vectorized)
+    n = 1 << bits
+    keys = np.zeros(len(ix), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (ix & s) > 0
+        ry = (iy & s) > 0
+        keys += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # rotate the quadrant so the sub-curve starts and ends at the right corners
+        flip = ~ry & rx
+        ix = np.where(flip, n - 1 - ix, ix)
+        iy = np.where(flip, n - 1 - iy, iy)
+        ix, iy = np.where(ry, ix, iy), np.where(ry, iy, ix)
+        s >>= 1
+    return keys
+
+def morton_keys(ix, iy, bits=CURVE_BITS):
+    # Z-order key, the bits of x and y interleaved
+    keys = np.zeros(len(ix), dtype=np.int64)
+    for b in range(bits):
+        keys |= ((ix >> b) & 1) << (2 * b)
+        keys |= ((iy >> b) & 1) << (2 * b + 1)
+    return keys
+
+def curve_keys(x, y, curve='hilbert', bits=CURVE_BITS):
+    ix, iy = quantize(x, y, bits)
+    if curve == 'hilbert':
+        return hilbert_keys(ix, iy, bits)
+    if curve == 'morton':
+        return morton_keys(ix, iy, bits)
+    raise ValueError(f"Unknown space-filling curve: {curve}")
+
+def spatial_order(x, y, curve='hilbert', bits=CURVE_BITS):
+    '''
+    permutation that sorts points along a space-filling curve
+    return: order - new point i is old point order[i] (stable, ties keep their input order)
+    '''
+    return np.argsort(curve_keys(x, y, curve, bits), kind='stable')
+
+def inverse_permutation(order):
+    # inverse[old id] = new id
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    return inverse
+
+def sort_simplices(simplices):
+    '''
+    triangles ordered by their smallest vertex id, with curve-ordered vertices that is the curve
+    position of the triangle, so consecutive triangles gather nearby vertices
+    '''
+    simplices = np.asarray(simplices)
+    first = np.min(simplices, axis=1)
+    return simplices[np.argsort(first, kind='stable')]
@@ -0,0 +1,73 @@
+"""
+Streaming statistics - running count/mean/std/min/max (Welford, merged chunk by chunk) and a
+fixed-bin histogram for approximate quantiles, in constant memory however many values are fed in
+"""
+import numpy as np
+
+# histogram resolution, quantiles are exact to within one bin width
+STREAMING_BINS = 1000
+
+class StreamingStats:
+    '''
+    statistics of a stream of value chunks, update() with each chunk
+    value_range: histogram range, values outside it are counted in the end bins (min/max stay exact)
+    '''
+    def __init__(self, value_range=(0.0, 1.0), bins=STREAMING_BINS):
+        self.value_range = (float(value_range[0]), float(value_range[1]))
+        self.edges = np.linspace(self.value_range[0], self.value_range[1], bins + 1)
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        n = len(values)
+        if n == 0:
+            return
+        # merge the chunk's mean/M2 into the running ones (Chan et al.), stable for long streams
+        chunk_mean = float(np.mean(values))
+        chunk_m2 = float(np.sum((values - chunk_mean) ** 2))
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+
+        clipped = np.clip(values, self.value_range[0], self.value_range[1])
+        self.histogram += np.histogram(clipped, bins=self.edges)[0]
+
+    @property
+    def variance(self):
+        # population variance, like np.var
+        return self._m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def quantile(self, q):
+        # approximate q-quantile, linear within the bin that holds it, clamped to the exact min/max
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.histogram)
+        target = q * self.count
+        i = min(int(np.searchsorted(cumulative, target)), len(self.histogram) - 1)
+        before = cumulative[i - 1] if i > 0 else 0
+        inside = self.histogram[i]
+        fraction = (target - before) / inside if inside else 0.0
+        value = self.edges[i] + fraction * (self.edges[i + 1] - self.edges[i])
+        return float(np.clip(value, self.min, self.max))
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    @property
+    def bin_width(self):
+        return self.edges[1] - self.edges[0]
+
@@ -0,0 +1,62 @@
+"""
+Spatial thinning - merges near-coincident GPS points (e.g. a stationary receiver logging at 2-25 Hz)
+"""
+import numpy as np
+
+MERGE_POLICIES = ('mean', 'median', 'max')
+# points converted per step when computing cell keys, memory-mapped columns are never copied whole
+THIN_CHUNK_SIZE = 1 << 20
+
+def thin_points(x, y, z, min_spacing, merge='mean'):
+    '''
+    grid-hash thinning: all points falling in the same min_spacing x min_spacing cell are merged into one
+    arguments: x, y, z arrays (metres), min_spacing - cell size in metres,
+               merge - elevation merge policy, 'mean', 'median' or 'max'
+    return: x, y, z of the merged points (x/y are the cell mean), in order of first appearance
+    '''
+    if merge not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy: {merge} (expected one of {', '.join(MERGE_POLICIES)})")
+    # memory-mapped store columns are read in place, only chunks are converted to float64
+    x, y, z = np.asarray(x), np.asarray(y), np.asarray(z)
+    if len(x) == 0 or min_spacing <= 0:
+        return (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                np.asarray(z, dtype=np.float64))
+
+    # integer cell coordinates, flattened into one key per point
+    x0, y0 = float(np.min(x)), float(np.min(y))
+    ix = np.empty(len(x), dtype=np.int64)
+    iy = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), THIN_CHUNK_SIZE):
+        chunk = slice(start, start + THIN_CHUNK_SIZE)
+        ix[chunk] = np.floor((x[chunk].astype(np.float64) - x0) / min_spacing)
+        iy[chunk] = np.floor((y[chunk].astype(np.float64) - y0) / min_spacing)
+    keys = ix
+    keys *= iy.max() + 1
+    keys += iy
+    del iy
+
+    _, first_index, inverse, counts = np.unique(keys, return_index=True, return_inverse=True,
+                                                return_counts=True)
+    inverse = inverse.ravel()
+    # renumber cells by first appearance so the output keeps the track order
+    order = np.argsort(first_index, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    cell = rank[inverse]
+    counts = counts[order]
+
+    x_out = np.bincount(cell, weights=x) / counts
+    y_out = np.bincount(cell, weights=y) / counts
+
+    if merge == 'mean':
+        z_out = np.bincount(cell, weights=z) / counts
+    else:
+        # sort by cell, then elevation, each cell is then a contiguous sorted run
+        sorted_z = z[np.lexsort((z, cell))].astype(np.float64, copy=False)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        if merge == 'max':
+            z_out = sorted_z[starts + counts - 1]
+        else:
+            z_out = 0.5 * (sorted_z[starts + (counts - 1) // 2] + sorted_z[starts + counts // 2])
+
+    return x_out, y_out, z_out
@@ -0,0 +1,204 @@
+"""
+Divide-and-conquer Delaunay triangulation - overlapping spatial tiles triangulated in a process pool
+and stitched into one global mesh
+
+Each tile is triangulated together with a halo of its neighbours' points. A tile keeps the triangles
+whose centroid lies in its own core and whose circumcircle is empty of every survey point (checked on
+a global KD-tree, with the exact incircle predicate for points near the circle), so no two tiles keep
+the same triangle. Triangles too large for the halo are left out; the holes they leave are filled from
+a Delaunay of the vertices around the holes only. The stitched mesh is checked against the convex hull
+and replaced by a single scipy Delaunay if the check fails (e.g. for cocircular points). Where four or
+more points are cocircular the kept diagonal may differ from scipy's, both are Delaunay.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.spatial import Delaunay, ConvexHull, cKDTree
+from .mesh_topology import MeshTopology
+from .incremental_delaunay import orient, incircle
+
+# target points per tile core
+TILE_POINTS = 100_000
+# halo around each core, as a fraction of the core's width/height
+TILE_HALO = 0.1
+# points within this relative distance of a circumcircle are re-tested with the exact incircle predicate
+EMPTY_CIRCLE_RTOL = 1e-6
+
+class TiledTriangulation:
+    '''
+    stitched mesh, exposes .points and .simplices like scipy's Delaunay so the analytics/curvature
+    code accepts it; simplices index the input points
+    '''
+    def __init__(self, points, simplices, tiles=0, filled=0):
+        self.points = points
+        self.simplices = simplices
+        self.tiles = tiles
+        self.filled = filled
+
+def circumcircles(points, simplices):
+    # return: (T, 2) circumcenters and (T,) circumradii
+    a, b, c = points[simplices[:, 0]], points[simplices[:, 1]], points[simplices[:, 2]]
+    ab, ac = b - a, c - a
+    d = 2 * (ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+    ab2, ac2 = np.sum(ab ** 2, axis=1), np.sum(ac ** 2, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.column_stack((ac[:, 1] * ab2 - ab[:, 1] * ac2, ab[:, 0] * ac2 - ac[:, 0] * ab2)) / d[:, None]
+    return a + offset, np.linalg.norm(offset, axis=1)
+
+def _exactly_empty(tree, points, triangle, center, radius):
+    # exact check of one triangle: no survey point strictly inside its circumcircle (incircle > 0)
+    a, b, c = (int(v) for v in triangle)
+    if orient(*points[a], *points[b], *points[c]) < 0:
+        b, c = c, b
+    candidates = np.asarray(tree.query_ball_point(center, radius * (1 + EMPTY_CIRCLE_RTOL)), dtype=np.int64)
+    # the vertices and their exact duplicates lie on the circle, skip them before the scalar predicate
+    on_vertex = np.zeros(len(candidates), dtype=bool)
+    for v in (a, b, c):
+        on_vertex |= np.all(points[candidates] == points[v], axis=1)
+    for j in candidates[~on_vertex]:
+        if incircle(*points[a], *points[b], *points[c], *points[j]) > 0:
+            return False
+    return True
+
+def empty_circumcircle(tree, points, simplices):
+    # mask of triangles whose circumcircle holds no point strictly inside, decided on the KD-tree
+    # distances when the nearest other point is clearly in or out, by the exact incircle otherwise
+    centers, radii = circumcircles(points, simplices)
+    valid = np.flatnonzero(np.isfinite(radii))
+    empty = np.zeros(len(simplices), dtype=bool)
+    if len(valid) == 0:
+        return empty
+    # nearest point to each circumcenter that isn't one of the triangle's own vertices
+    distances, near = tree.query(centers[valid], k=4)
+    own = (near[:, :, None] == simplices[valid][:, None, :]).any(axis=2)
+    nearest = np.min(np.where(own, np.inf, distances), axis=1)
+    inner, outer = radii[valid] * (1 - EMPTY_CIRCLE_RTOL), radii[valid] * (1 + EMPTY_CIRCLE_RTOL)
+    empty[valid] = nearest >= outer
+    for t in valid[(nearest >= inner) & (nearest < outer)]:
+        empty[t] = _exactly_empty(tree, points, simplices[t], centers[t], radii[t])
+    return empty
+
+def tile_layout(points, tile_points=TILE_POINTS, halo=TILE_HALO):
+    '''
+    split the points into tiles of about tile_points each: columns at x quantiles, then rows at the
+    y quantiles of each column, so dense stretches of track get narrow tiles
+    return: list of (core box (x0, x1, y0, y1), ids of the core + halo points), outer core edges are
+            infinite so every centroid has exactly one owner
+    '''
+    n = len(points)
+    n_tiles = max(int(np.ceil(n / tile_points)), 1)
+    n_columns = max(int(round(np.sqrt(n_tiles))), 1)
+    n_rows = max(int(np.ceil(n_tiles / n_columns)), 1)
+    x, y = points[:, 0], points[:, 1]
+
+    x_edges = np.quantile(x, np.linspace(0, 1, n_columns + 1))
+    x_edges[0], x_edges[-1] = -np.inf, np.inf
+    tiles = []
+    for i in range(n_columns):
+        in_column = (x >= x_edges[i]) & (x < x_edges[i + 1])
+        if not in_column.any():
+            continue
+        column_y = y[in_column]
+        y_edges = np.quantile(column_y, np.linspace(0, 1, n_rows + 1))
+        y_edges[0], y_edges[-1] = -np.inf, np.inf
+        for j in range(n_rows):
+            box = (x_edges[i], x_edges[i + 1], y_edges[j], y_edges[j + 1])
+            if not np.any((column_y >= box[2]) & (column_y < box[3])):
+                continue
+            # halo around the finite part of the core
+            x0, x1 = max(box[0], x.min()), min(box[1], x.max())
+            y0, y1 = max(box[2], y.min()), min(box[3], y.max())
+            dx, dy = (x1 - x0) * halo, (y1 - y0) * halo
+            selected = np.flatnonzero((x >= x0 - dx) & (x <= x1 + dx) & (y >= y0 - dy) & (y <= y1 + dy))
+            tiles.append((box, selected))
+    return tiles
+
+# worker-side global points and KD-tree, sent once per process by the pool initializer
+_tile_points = None
+_tile_tree = None
+
+def _init_triangulation_worker(points, tree):
+    global _tile_points, _tile_tree
+    _tile_points = points
+    _tile_tree = tree
+
+def _triangulate_tile(box, ids):
+    # return: global-index triangles of this tile that belong to the global Delaunay mesh
+    if len(ids) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    local = _tile_points[ids]
+    try:
+        simplices = ids[Delaunay(local).simplices]
+    except Exception:
+        # collinear or degenerate tile, its area is left to the hole filling
+        return np.empty((0, 3), dtype=np.int64)
+    centroids = _tile_points[simplices].mean(axis=1)
+    owned = ((centroids[:, 0] >= box[0]) & (centroids[:, 0] < box[1])
+             & (centroids[:, 1] >= box[2]) & (centroids[:, 1] < box[3]))
+    simplices = simplices[owned]
+    return simplices[empty_circumcircle(_tile_tree, _tile_points, simplices)]
+
+def _fill_holes(points, tree, simplices, distinct):
+    # triangles missing between the tiles: the Delaunay of the vertices around the holes
+    topology = MeshTopology(simplices, len(points))
+    frontier = topology.boundary_vertex_mask.copy()
+    frontier[(np.bincount(simplices.ravel(), minlength=len(points)) == 0) & distinct] = True
+    frontier_ids = np.flatnonzero(frontier)
+    if len(frontier_ids) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    candidates = frontier_ids[Delaunay(points[frontier_ids]).simplices]
+    candidates = candidates[empty_circumcircle(tree, points, candidates)]
+
+    # drop the candidates the tiles already produced, those have every vertex on the frontier
+    on_frontier = frontier[simplices].all(axis=1)
+    existing = {tuple(t) for t in np.sort(simplices[on_frontier], axis=1).tolist()}
+    new = np.array([t not in existing for t in map(tuple, np.sort(candidates, axis=1).tolist())], dtype=bool)
+    return candidates[new].reshape(-1, 3)
+
+def _is_complete(points, simplices, n_distinct):
+    # a proper triangulation of the hull: manifold edges, one boundary loop, every distinct point a
+    # vertex and the triangle areas adding up to the hull area
+    if len(simplices) == 0:
+        return False
+    topology = MeshTopology(simplices, len(points))
+    if topology.edge_triangle_count.max() > 2:
+        return False
+    if np.sum(topology.boundary_edge_mask) != np.sum(topology.boundary_vertex_mask):
+        return False
+    if np.count_nonzero(np.bincount(simplices.ravel(), minlength=len(points))) != n_distinct:
+        return False
+    a, b, c = points[simplices[:, 0]], points[simplices[:, 1]], points[simplices[:, 2]]
+    area = 0.5 * np.sum(np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])))
+    hull_area = ConvexHull(points).volume
+    return abs(area - hull_area) <= 1e-9 * hull_area
+
+def tiled_delaunay(points, tile_points=TILE_POINTS, halo=TILE_HALO, parallel=True, max_workers=None):
+    '''
+    Delaunay triangulation of a large point set, tiles triangulated in a process pool
+    arguments: points - (n, 2) array, tile_points - target points per tile, halo - overlap as a
+               fraction of the tile size, parallel - False runs the tiles in this process
+    return: TiledTriangulation (or scipy Delaunay when stitching fails and it falls back)
+    '''
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    tree = cKDTree(points)
+    # exact duplicates (first copy kept) are left out of every tile, otherwise tiles could pick different
+    # copies; sorting handles long runs of one repeated fix, pairwise matching would be quadratic in them
+    distinct = np.zeros(len(points), dtype=bool)
+    distinct[np.unique(points, axis=0, return_index=True)[1]] = True
+    tiles = [(box, ids[distinct[ids]]) for box, ids in tile_layout(points, tile_points, halo)]
+
+    if parallel and len(tiles) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_triangulation_worker,
+                                 initargs=(points, tree)) as executor:
+            parts = list(executor.map(_triangulate_tile, *zip(*tiles)))
+    else:
+        _init_triangulation_worker(points, tree)
+        parts = [_triangulate_tile(box, ids) for box, ids in tiles]
+
+    simplices = np.concatenate(parts)
+    filled = _fill_holes(points, tree, simplices, distinct)
+    simplices = np.concatenate((simplices, filled))
+    if not _is_complete(points, simplices, np.count_nonzero(distinct)):
+        print("Tiled triangulation did not stitch cleanly, falling back to a single Delaunay")
+        return Delaunay(points)
+    return TiledTriangulation(points, simplices, tiles=len(tiles), filled=len(filled))
@@ -1,4 +1,6 @@
+import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.tri as mtri
 import plotly.graph_objects as go
 
 def vertical_exaggeration_ratio(x, y, z, vertical_exaggeration=3):
@@ -204,4 +206,60 @@ def render_wireframe_view(x, y, z, triangles, title_suffix="", vertical_exaggera
     ax.set_box_aspect(vertical_exaggeration_ratio(x, y, z, vertical_exaggeration))
     
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def _valid_triangulation(node_x, node_y, node_z, triangles):
+    # triangles with an uninterpolated (NaN) corner are masked out of contours/surfaces
+    triangulation = mtri.Triangulation(node_x, node_y, triangles)
+    triangulation.set_mask(np.isnan(node_z)[triangles].any(axis=1))
+    return triangulation, np.nan_to_num(node_z, nan=np.nanmin(node_z))
+
+def create_adaptive_contour_plot(node_x, node_y, node_z, triangles, x_gps=None, y_gps=None):
+    # Contours over the adaptive grid nodes instead of a full lattice
+    triangulation, z = _valid_triangulation(node_x, node_y, node_z, triangles)
+    plt.tricontourf(triangulation, z, cmap='terrain')
+    plt.colorbar(label="Elevation (m)")
+    contour_lines = plt.tricontour(triangulation, z, colors='black', linewidths=0.5)
+    plt.clabel(contour_lines, inline=True, fontsize=4, fmt='%0.0f m')
+    if x_gps is not None and y_gps is not None:
+        plt.scatter(x_gps, y_gps, c="red", s=5, alpha=0.8)
+    plt.title(f"Topographic Contour Map (adaptive grid, {len(node_x)} nodes)")
+    plt.xlabel("X (m)")
+    plt.ylabel("Y (m)")
+    plt.axis('equal')
+    plt.show()
+
+def create_adaptive_3d_surface(node_x, node_y, node_z, triangles, x_gps=None, y_gps=None, z_gps=None,
+                               vertical_exaggeration=3):
+    fig = plt.figure(figsize=(12, 8))
+    ax = fig.add_subplot(111, projection='3d')
+
+    triangulation, z = _valid_triangulation(node_x, node_y, node_z, triangles)
+    surface = ax.plot_trisurf(triangulation, z, cmap='terrain', alpha=0.8, linewidth=0.1, antialiased=True)
+    fig.colorbar(surface, label='Elevation (m)', shrink=0.6)
+
+    if x_gps is not None and y_gps is not None and z_gps is not None:
+        ax.scatter(x_gps, y_gps, z_gps, c='red', s=10, alpha=0.8, label='GPS Sample Points')
+        ax.legend()
+        ax.set_box_aspect(vertical_exaggeration_ratio(x_gps, y_gps, z_gps, vertical_exaggeration))
+
+    ax.set_xlabel('X (m)')
+    ax.set_ylabel('Y (m)')
+    ax.set_zlabel('Elevation (m)')
+    ax.set_title(f'3D Topographic Map (adaptive grid, {len(node_x)} nodes)')
+    ax.view_init(elev=20, azim=45)
+
+    plt.tight_layout()
+    plt.show()
+
+def create_variance_plot(xi, yi, variance, x_gps=None, y_gps=None):
+    # Kriging variance map, high where the surface is poorly constrained by samples
+    plt.contourf(xi, yi, variance, levels=20, cmap='YlOrRd')
+    plt.colorbar(label="Kriging variance (m²)")
+    if x_gps is not None and y_gps is not None:
+        plt.scatter(x_gps, y_gps, c='black', s=5, alpha=0.8)
+    plt.title("Kriging Variance Map")
+    plt.xlabel("X (m)")
+    plt.ylabel("Y (m)")
+    plt.axis('equal')
+    plt.show()